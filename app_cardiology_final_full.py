@@ -1,67 +1,33 @@
-
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, Float, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 import streamlit as st
+from sqlalchemy.exc import IntegrityError
+
+from cardiology import stats
+from cardiology.bitmap import bitmap_index
+from cardiology.bulk_import import import_rows, read_file
+from cardiology.cache import (
+    find_patients, full_data_page, latest_page, list_patients_page, result_cache, search_patients,
+)
+from cardiology.db import get_engine, session_scope
+from cardiology.deletes import delete_patients, existing_ids, parse_ids
+from cardiology.encounters import add_record, missing_patient, record_encounter
+from cardiology.jobs import job_runner
+from cardiology.metrics import page_metrics, page_run
+from cardiology.models import Patient, PatientSummary, MedicalHistory, Lesion, Vessel, PCI
+from cardiology.replica import get_replica, read_engine, read_session
+from cardiology.risk import MAX_SCORE, count_at_least, ranked_page, risk_index, with_scores
+from cardiology.queries import RECORD_KINDS, patient_timeline
+from cardiology.ui import (
+    encounter_form, export_panel, job_result, keyset_pager, offset_pager, page_size_input, query_panel, start_job,
+    stats_dashboard,
+)
 
 # === DATABASE SETUP ===
-DATABASE_URL = "sqlite:///./database.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
-
-# === MODELS ===
-class Patient(Base):
-    __tablename__ = "patients"
-    patient_id = Column(Integer, primary_key=True, index=True)
-    first_name = Column(String)
-    last_name = Column(String)
-    age = Column(Integer)
-    medical_history = Column(String)
-
-class MedicalHistory(Base):
-    __tablename__ = "medical_history"
-    history_id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.patient_id"))
-    gender = Column(String)
-    hypertension = Column(Boolean)
-    smoking = Column(Boolean)
-    diabetes = Column(String)
-    hereditary = Column(Boolean)
-    BMI = Column(Float)
-    atrial_fibrillation = Column(Boolean)
-
-class Lesion(Base):
-    __tablename__ = "lesions"
-    lesion_id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.patient_id"))
-    LAD = Column(Boolean)
-    LCX = Column(Boolean)
-    RCA = Column(Boolean)
-
-class Vessel(Base):
-    __tablename__ = "vessels"
-    vessel_id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.patient_id"))
-    num_vessels = Column(Integer)
-    angioplasty = Column(Boolean)
-    imaging = Column(String)
-
-class PCI(Base):
-    __tablename__ = "pci"
-    pci_id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.patient_id"))
-    balloon = Column(Boolean)
-    IVL = Column(Boolean)
-    ROTA = Column(Boolean)
-
-# === CREATE TABLES ===
-Base.metadata.create_all(bind=engine)
+# Ένα engine (και pool συνδέσεων) ανά διεργασία, κοινό σε όλα τα reruns.
+get_engine()
 
 # === STREAMLIT APP START ===
 st.title("🫀 Cardiology App (SQLite Version)")
 
-db = SessionLocal()
 st.success("✅ Η βάση δεδομένων είναι έτοιμη.")
 
 st.write("Μπορείς να ξεκινήσεις να ενσωματώνεις τις ενότητες του frontend εδώ...")
@@ -73,6 +39,7 @@ option = st.sidebar.selectbox(
     "Επιλέξτε λειτουργία",
     (
         "Προσθήκη Ασθενή",
+        "Νέα Επέμβαση",
         "Λίστα Ασθενών",
         "Προσθήκη Ιατρικού Ιστορικού",
         "Λίστα Ιατρικών Ιστορικών",
@@ -82,58 +49,107 @@ option = st.sidebar.selectbox(
         "Προβολή Αγγείων",
         "Προσθήκη PCI",
         "Προβολή PCI",
+        "Χρονολόγιο Ασθενή",
         "Διαγραφή Ασθενή",
         "Προβολή Όλων των Ασθενών (Πλήρη Δεδομένα)",
-        "Αναζήτηση Ασθενών με Κριτήρια"
+        "Αναζήτηση Ασθενών με Κριτήρια",
+        "Μαζική Εισαγωγή",
+        "Στατιστικά"
     )
 )
 
-# === Προσθήκη Ασθενή ===
-if option == "Προσθήκη Ασθενή":
-    st.subheader("➕ Προσθήκη Νέου Ασθενή")
-    first_name = st.text_input("Όνομα")
-    last_name = st.text_input("Επώνυμο")
-    age = st.number_input("Ηλικία", min_value=1, max_value=120, step=1)
-    medical_history = st.text_area("Ιατρικό Ιστορικό")
-    if st.button("📝 Καταχώρηση"):
-        if first_name and last_name:
-            new_patient = Patient(
-                first_name=first_name,
-                last_name=last_name,
-                age=age,
-                medical_history=medical_history
+with st.sidebar.expander("🧠 Cache αποτελεσμάτων"):
+    st.json(result_cache.stats())
+with st.sidebar.expander("🧮 Bitmap index"):
+    st.json(bitmap_index.stats())
+with st.sidebar.expander("🪞 Στιγμιότυπο αναγνώσεων"):
+    st.json(get_replica().stats())
+with st.sidebar.expander("⚙️ Εργασίες στο παρασκήνιο"):
+    st.json(job_runner.stats())
+with st.sidebar.expander("⚠️ Βαθμός κινδύνου"):
+    st.json(risk_index.stats())
+
+show_queries = st.sidebar.checkbox("🐞 Debug: ερωτήματα SQL", key="sql_debug")
+
+# Μία συνεδρία βάσης ανά εκτέλεση του script· κλείνει πάντα στο τέλος.
+# Τα ερωτήματα SQL κάθε εκτέλεσης καταγράφονται ανά σελίδα (cardiology.metrics).
+with page_run(option) as run, session_scope() as db:
+    # === Προσθήκη Ασθενή ===
+    if option == "Προσθήκη Ασθενή":
+        st.subheader("➕ Προσθήκη Νέου Ασθενή")
+        first_name = st.text_input("Όνομα")
+        last_name = st.text_input("Επώνυμο")
+        age = st.number_input("Ηλικία", min_value=1, max_value=120, step=1)
+        medical_history = st.text_area("Ιατρικό Ιστορικό")
+        if st.button("📝 Καταχώρηση"):
+            if first_name and last_name:
+                new_patient = Patient(
+                    first_name=first_name,
+                    last_name=last_name,
+                    age=age,
+                    medical_history=medical_history
+                )
+                db.add(new_patient)
+                db.commit()
+                st.success("✅ Ο ασθενής προστέθηκε με επιτυχία!")
+            else:
+                st.warning("⚠️ Συμπληρώστε όλα τα πεδία.")
+
+    # === Νέα Επέμβαση ===
+    elif option == "Νέα Επέμβαση":
+        st.subheader("🫀 Νέα Επέμβαση")
+        st.caption("Ασθενής, ιστορικό, βλάβες, αγγεία και PCI σε μία καταχώρηση.")
+        body = encounter_form("encounter")
+        if body:
+            # Μία συναλλαγή για όλες τις εγγραφές· το foreign key ελέγχει αν υπάρχει ο ασθενής.
+            try:
+                ids = record_encounter(db, **body)
+                db.commit()
+                st.success(f"✅ Η επέμβαση καταχωρήθηκε για τον ασθενή με ID {ids['patient_id']}.")
+            except IntegrityError as exc:
+                db.rollback()
+                if missing_patient(exc):
+                    st.error("❌ Ο ασθενής δεν βρέθηκε.")
+                else:
+                    st.error(f"❌ Η επέμβαση απορρίφθηκε: {exc.orig}")
+
+    # === Λίστα Ασθενών ===
+    elif option == "Λίστα Ασθενών":
+        st.subheader("📋 Λίστα Ασθενών")
+        query = st.text_input("🔎 Αναζήτηση (όνομα, επώνυμο ή ιστορικό)", key="patients_query").strip()
+        page_size = page_size_input("patients_page_size")
+        if query:
+            rows = offset_pager(
+                "patients_found",
+                query,
+                lambda offset, limit: find_patients(db, query, offset, limit),
+                page_size,
             )
-            db.add(new_patient)
-            db.commit()
-            st.success("✅ Ο ασθενής προστέθηκε με επιτυχία!")
+            if not rows:
+                st.info("❕ Κανένας ασθενής δεν ταιριάζει στην αναζήτηση.")
         else:
-            st.warning("⚠️ Συμπληρώστε όλα τα πεδία.")
-
-# === Λίστα Ασθενών ===
-elif option == "Λίστα Ασθενών":
-    st.subheader("📋 Λίστα Ασθενών")
-    patients = db.query(Patient).all()
-    if patients:
-        for p in patients:
-            st.write(f"🆔 {p.patient_id} - {p.first_name} {p.last_name}, {p.age} ετών")
-    else:
-        st.info("❕ Δεν υπάρχουν καταχωρημένοι ασθενείς.")
-
-
-
-# === Προσθήκη Ιατρικού Ιστορικού ===
-elif option == "Προσθήκη Ιατρικού Ιστορικού":
-    st.subheader("➕ Προσθήκη Ιατρικού Ιστορικού")
-    patient_id = st.number_input("ID Ασθενή", min_value=1, step=1)
-    gender = st.selectbox("Φύλο", ["Male", "Female"])
-    hypertension = st.checkbox("Υπέρταση")
-    smoking = st.checkbox("Κάπνισμα")
-    diabetes = st.selectbox("Διαβήτης", ["None", "Type 1", "Type 2"])
-    hereditary = st.checkbox("Κληρονομικό Ιστορικό")
-    BMI = st.number_input("BMI", min_value=10.0, max_value=50.0, step=0.1)
-    atrial_fibrillation = st.checkbox("Κολπική Μαρμαρυγή")
-    if st.button("📝 Καταχώρηση Ιστορικού"):
-        if db.query(Patient).filter_by(patient_id=patient_id).first():
+            rows = keyset_pager(
+                "patients_cursor",
+                lambda after_id, limit: list_patients_page(db, after_id, limit),
+                page_size,
+            )
+            if not rows:
+                st.info("❕ Δεν υπάρχουν καταχωρημένοι ασθενείς.")
+
+
+
+    # === Προσθήκη Ιατρικού Ιστορικού ===
+    elif option == "Προσθήκη Ιατρικού Ιστορικού":
+        st.subheader("➕ Προσθήκη Ιατρικού Ιστορικού")
+        patient_id = st.number_input("ID Ασθενή", min_value=1, step=1)
+        gender = st.selectbox("Φύλο", ["Male", "Female"])
+        hypertension = st.checkbox("Υπέρταση")
+        smoking = st.checkbox("Κάπνισμα")
+        diabetes = st.selectbox("Διαβήτης", ["None", "Type 1", "Type 2"])
+        hereditary = st.checkbox("Κληρονομικό Ιστορικό")
+        BMI = st.number_input("BMI", min_value=10.0, max_value=50.0, step=0.1)
+        atrial_fibrillation = st.checkbox("Κολπική Μαρμαρυγή")
+        if st.button("📝 Καταχώρηση Ιστορικού"):
             hist = MedicalHistory(
                 patient_id=patient_id,
                 gender=gender,
@@ -144,260 +160,302 @@ elif option == "Προσθήκη Ιατρικού Ιστορικού":
                 BMI=BMI,
                 atrial_fibrillation=atrial_fibrillation
             )
-            db.add(hist)
-            db.commit()
-            st.success("✅ Το ιστορικό προστέθηκε.")
-        else:
-            st.error("❌ Ο ασθενής δεν βρέθηκε.")
-
-
-elif option == "Λίστα Ιατρικών Ιστορικών":
-    st.header("📜 Λίστα Ιατρικών Ιστορικών")
-    patient_id = st.number_input("ID Ασθενή για Αναζήτηση", min_value=1, step=1)
-    if st.button("🔍 Αναζήτηση"):
-        history = db.query(MedicalHistory).filter_by(patient_id=patient_id).first()
-        if history:
-            st.json({
-                "Φύλο": history.gender,
-                "Υπέρταση": history.hypertension,
-                "Κάπνισμα": history.smoking,
-                "Διαβήτης": history.diabetes,
-                "Κληρονομικότητα": history.hereditary,
-                "BMI": history.BMI,
-                "Κολπική Μαρμαρυγή": history.atrial_fibrillation
-            })
-        else:
-            st.warning("❕ Δεν βρέθηκε ιατρικό ιστορικό.")
-
-
-# === Προσθήκη Βλαβών Αγγείων ===
-elif option == "Προσθήκη Βλαβών Αγγείων":
-    st.subheader("➕ Προσθήκη Βλαβών Αγγείων")
-    patient_id = st.number_input("ID Ασθενή", min_value=1, step=1)
-    LAD = st.checkbox("LAD")
-    LCX = st.checkbox("LCX")
-    RCA = st.checkbox("RCA")
-    if st.button("📝 Καταχώρηση Βλαβών"):
-        if db.query(Patient).filter_by(patient_id=patient_id).first():
-            lesion = Lesion(patient_id=patient_id, LAD=LAD, LCX=LCX, RCA=RCA)
-            db.add(lesion)
-            db.commit()
-            st.success("✅ Οι βλάβες προστέθηκαν.")
-        else:
-            st.error("❌ Ο ασθενής δεν βρέθηκε.")
-
-elif option == "Προβολή Βλαβών":
-    st.header("📋 Προβολή Βλαβών")
-    patient_id = st.number_input("ID Ασθενή για Αναζήτηση", min_value=1, step=1)
-    if st.button("🔍 Αναζήτηση"):
-        lesion = db.query(Lesion).filter_by(patient_id=patient_id).first()
-        if lesion:
-            st.json({
-                "LAD": lesion.LAD,
-                "LCX": lesion.LCX,
-                "RCA": lesion.RCA
-            })
-        else:
-            st.warning("❕ Δεν βρέθηκαν καταχωρημένες βλάβες.")
-
-
-# === Προσθήκη Αγγείων ===
-elif option == "Προσθήκη Αγγείων":
-    st.subheader("➕ Προσθήκη Αγγείων")
-    patient_id = st.number_input("ID Ασθενή", min_value=1, step=1)
-    num_vessels = st.number_input("Αριθμός Αγγείων", min_value=0, max_value=10, step=1)
-    angioplasty = st.checkbox("Αγγειοπλαστική")
-    imaging = st.selectbox("Απεικόνιση", ["NONE", "OCT", "IVUS"])
-    if st.button("📝 Καταχώρηση Αγγείων"):
-        if db.query(Patient).filter_by(patient_id=patient_id).first():
-            vessel = Vessel(patient_id=patient_id, num_vessels=num_vessels, angioplasty=angioplasty, imaging=imaging)
-            db.add(vessel)
-            db.commit()
-            st.success("✅ Τα αγγεία προστέθηκαν.")
-        else:
-            st.error("❌ Ο ασθενής δεν βρέθηκε.")
-
-elif option == "Προβολή Αγγείων":
-    st.header("📋 Προβολή Αγγείων")
-    patient_id = st.number_input("ID Ασθενή για Αναζήτηση", min_value=1, step=1)
-    if st.button("🔍 Αναζήτηση"):
-        vessel = db.query(Vessel).filter_by(patient_id=patient_id).first()
-        if vessel:
-            st.json({
-                "Αριθμός Αγγείων": vessel.num_vessels,
-                "Αγγειοπλαστική": "ΝΑΙ" if vessel.angioplasty else "ΟΧΙ",
-                "Απεικόνιση": vessel.imaging
-            })
-        else:
-            st.warning("❕ Δεν βρέθηκαν δεδομένα αγγείων.")
-
-
-# === Προσθήκη PCI ===
-elif option == "Προσθήκη PCI":
-    st.subheader("➕ Προσθήκη PCI")
-    patient_id = st.number_input("ID Ασθενή", min_value=1, step=1)
-    balloon = st.checkbox("Balloon")
-    IVL = st.checkbox("IVL")
-    ROTA = st.checkbox("ROTA")
-    if st.button("📝 Καταχώρηση PCI"):
-        if db.query(Patient).filter_by(patient_id=patient_id).first():
-            pci = PCI(patient_id=patient_id, balloon=balloon, IVL=IVL, ROTA=ROTA)
-            db.add(pci)
-            db.commit()
-            st.success("✅ PCI προστέθηκε.")
-        else:
-            st.error("❌ Ο ασθενής δεν βρέθηκε.")
-
-elif option == "Προβολή PCI":
-    st.header("📋 Προβολή PCI")
-    patient_id = st.number_input("ID Ασθενή για Αναζήτηση", min_value=1, step=1)
-    if st.button("🔍 Αναζήτηση"):
-        pci = db.query(PCI).filter_by(patient_id=patient_id).first()
-        if pci:
-            st.json({
-                "Balloon": pci.balloon,
-                "IVL": pci.IVL,
-                "ROTA": pci.ROTA
-            })
-        else:
-            st.warning("❕ Δεν βρέθηκαν δεδομένα PCI.")
-
-
-# === Διαγραφή Ασθενή ===
-elif option == "Διαγραφή Ασθενή":
-    st.subheader("🗑️ Διαγραφή Ασθενή")
-    patient_id = st.number_input("ID Ασθενή για διαγραφή", min_value=1, step=1)
-    if st.button("⚠️ Διαγραφή"):
-        patient = db.query(Patient).filter_by(patient_id=patient_id).first()
-        if patient:
-            db.delete(patient)
-            db.commit()
-            st.success("✅ Ο ασθενής διαγράφηκε.")
-        else:
-            st.error("❌ Δεν βρέθηκε ασθενής.")
-
-
-elif option == "Προβολή Όλων των Ασθενών (Πλήρη Δεδομένα)":
-    st.header("📋 Πλήρης Πίνακας Όλων των Ασθενών")
-    if st.button("📥 Φόρτωση Δεδομένων"):
-        rows = []
-        patients = db.query(Patient).all()
-        for p in patients:
-            h = db.query(MedicalHistory).filter_by(patient_id=p.patient_id).first()
-            l = db.query(Lesion).filter_by(patient_id=p.patient_id).first()
-            v = db.query(Vessel).filter_by(patient_id=p.patient_id).first()
-            pci = db.query(PCI).filter_by(patient_id=p.patient_id).first()
-            row = {
-                "ID": p.patient_id,
-                "Όνομα": p.first_name,
-                "Επώνυμο": p.last_name,
-                "Ηλικία": p.age,
-                "Ιστορικό": p.medical_history,
-                "Φύλο": h.gender if h else "",
-                "Υπέρταση": "ΝΑΙ" if h and h.hypertension else "ΟΧΙ",
-                "Κάπνισμα": "ΝΑΙ" if h and h.smoking else "ΟΧΙ",
-                "Διαβήτης": h.diabetes if h else "",
-                "Κληρονομικότητα": "ΝΑΙ" if h and h.hereditary else "ΟΧΙ",
-                "Κολπική Μαρμαρυγή": "ΝΑΙ" if h and h.atrial_fibrillation else "ΟΧΙ",
-                "BMI": h.BMI if h else "",
-                "LAD": "ΝΑΙ" if l and l.LAD else "ΟΧΙ",
-                "LCX": "ΝΑΙ" if l and l.LCX else "ΟΧΙ",
-                "RCA": "ΝΑΙ" if l and l.RCA else "ΟΧΙ",
-                "Αρ. Αγγείων": v.num_vessels if v else "",
-                "Αγγειοπλαστική": "ΝΑΙ" if v and v.angioplasty else "ΟΧΙ",
-                "Απεικόνιση": v.imaging if v else "",
-                "Balloon": "ΝΑΙ" if pci and pci.balloon else "ΟΧΙ",
-                "IVL": "ΝΑΙ" if pci and pci.IVL else "ΟΧΙ",
-                "ROTA": "ΝΑΙ" if pci and pci.ROTA else "ΟΧΙ"
-            }
-            rows.append(row)
-        st.dataframe(rows, use_container_width=True)
-
-elif option == "Αναζήτηση Ασθενών με Κριτήρια":
-    st.header("🔍 Αναζήτηση με Κριτήρια")
-
-    with st.expander("🧍‍♂️ Ιστορικό"):
-        col1, col2 = st.columns(2)
-        with col1:
-            age = st.number_input("Ηλικία", min_value=0, max_value=120, step=1, value=0)
-            diabetes = st.selectbox("Διαβήτης", ["", "Type 1", "Type 2"])
-            gender = st.selectbox("Φύλο", ["", "Male", "Female"])
-        with col2:
-            hypertension = st.checkbox("Υπέρταση")
-            smoking = st.checkbox("Κάπνισμα")
-            atrial_fibrillation = st.checkbox("Κολπική Μαρμαρυγή")
-
-    with st.expander("🫀 Βλάβες Αγγείων"):
+            if add_record(db, hist):
+                st.success("✅ Το ιστορικό προστέθηκε.")
+            else:
+                st.error("❌ Ο ασθενής δεν βρέθηκε.")
+
+
+    elif option == "Λίστα Ιατρικών Ιστορικών":
+        st.header("📜 Λίστα Ιατρικών Ιστορικών")
+        patient_id = st.number_input("ID Ασθενή για Αναζήτηση", min_value=1, step=1)
+        if st.button("🔍 Αναζήτηση"):
+            # Μία γραμμή του patient_summary αντί για ερώτημα στον πίνακα.
+            history = db.get(PatientSummary, patient_id)
+            if history and history.history_id is not None:
+                st.json({
+                    "Φύλο": history.gender,
+                    "Υπέρταση": history.hypertension,
+                    "Κάπνισμα": history.smoking,
+                    "Διαβήτης": history.diabetes,
+                    "Κληρονομικότητα": history.hereditary,
+                    "BMI": history.BMI,
+                    "Κολπική Μαρμαρυγή": history.atrial_fibrillation
+                })
+            else:
+                st.warning("❕ Δεν βρέθηκε ιατρικό ιστορικό.")
+
+
+    # === Προσθήκη Βλαβών Αγγείων ===
+    elif option == "Προσθήκη Βλαβών Αγγείων":
+        st.subheader("➕ Προσθήκη Βλαβών Αγγείων")
+        patient_id = st.number_input("ID Ασθενή", min_value=1, step=1)
         LAD = st.checkbox("LAD")
         LCX = st.checkbox("LCX")
         RCA = st.checkbox("RCA")
+        if st.button("📝 Καταχώρηση Βλαβών"):
+            lesion = Lesion(patient_id=patient_id, LAD=LAD, LCX=LCX, RCA=RCA)
+            if add_record(db, lesion):
+                st.success("✅ Οι βλάβες προστέθηκαν.")
+            else:
+                st.error("❌ Ο ασθενής δεν βρέθηκε.")
+
+    elif option == "Προβολή Βλαβών":
+        st.header("📋 Προβολή Βλαβών")
+        patient_id = st.number_input("ID Ασθενή για Αναζήτηση", min_value=1, step=1)
+        if st.button("🔍 Αναζήτηση"):
+            # Μία γραμμή του patient_summary αντί για ερώτημα στον πίνακα.
+            lesion = db.get(PatientSummary, patient_id)
+            if lesion and lesion.lesion_id is not None:
+                st.json({
+                    "LAD": lesion.LAD,
+                    "LCX": lesion.LCX,
+                    "RCA": lesion.RCA
+                })
+            else:
+                st.warning("❕ Δεν βρέθηκαν καταχωρημένες βλάβες.")
 
-    with st.expander("🩺 PCI"):
-        balloon = st.checkbox("Balloon")
-        IVL = st.checkbox("IVL")
-        ROTA = st.checkbox("ROTA")
 
-    with st.expander("🧬 Αγγεία"):
-        min_vessels = st.slider("Ελάχιστος αριθμός αγγείων", 0, 10, 0)
+    # === Προσθήκη Αγγείων ===
+    elif option == "Προσθήκη Αγγείων":
+        st.subheader("➕ Προσθήκη Αγγείων")
+        patient_id = st.number_input("ID Ασθενή", min_value=1, step=1)
+        num_vessels = st.number_input("Αριθμός Αγγείων", min_value=0, max_value=10, step=1)
         angioplasty = st.checkbox("Αγγειοπλαστική")
-        imaging = st.selectbox("Απεικόνιση", ["", "NONE", "OCT", "IVUS"])
-
-    if st.button("🔎 Αναζήτηση"):
-        results = []
-        all_patients = db.query(Patient).all()
-
-        for p in all_patients:
-            h = db.query(MedicalHistory).filter_by(patient_id=p.patient_id).first()
-            l = db.query(Lesion).filter_by(patient_id=p.patient_id).first()
-            v = db.query(Vessel).filter_by(patient_id=p.patient_id).first()
-            pci = db.query(PCI).filter_by(patient_id=p.patient_id).first()
-
-            match = True
-            if age > 0 and p.age != age:
-                match = False
-            if gender and (not h or h.gender != gender):
-                match = False
-            if diabetes and (not h or h.diabetes != diabetes):
-                match = False
-            if hypertension and (not h or not h.hypertension):
-                match = False
-            if smoking and (not h or not h.smoking):
-                match = False
-            if atrial_fibrillation and (not h or not h.atrial_fibrillation):
-                match = False
-            if LAD and (not l or not l.LAD):
-                match = False
-            if LCX and (not l or not l.LCX):
-                match = False
-            if RCA and (not l or not l.RCA):
-                match = False
-            if balloon and (not pci or not pci.balloon):
-                match = False
-            if IVL and (not pci or not pci.IVL):
-                match = False
-            if ROTA and (not pci or not pci.ROTA):
-                match = False
-            if angioplasty and (not v or not v.angioplasty):
-                match = False
-            if imaging and (not v or v.imaging != imaging):
-                match = False
-            if min_vessels > 0 and (not v or v.num_vessels < min_vessels):
-                match = False
-
-            if match:
-                results.append({
-                    "ID": p.patient_id,
-                    "Όνομα": p.first_name,
-                    "Επώνυμο": p.last_name,
-                    "Ηλικία": p.age,
-                    "Φύλο": h.gender if h else "",
-                    "Διαβήτης": h.diabetes if h else "",
-                    "Αρ. Αγγείων": v.num_vessels if v else "",
-                    "Balloon": "ΝΑΙ" if pci and pci.balloon else "ΟΧΙ"
+        imaging = st.selectbox("Απεικόνιση", ["NONE", "OCT", "IVUS"])
+        if st.button("📝 Καταχώρηση Αγγείων"):
+            vessel = Vessel(patient_id=patient_id, num_vessels=num_vessels, angioplasty=angioplasty, imaging=imaging)
+            if add_record(db, vessel):
+                st.success("✅ Τα αγγεία προστέθηκαν.")
+            else:
+                st.error("❌ Ο ασθενής δεν βρέθηκε.")
+
+    elif option == "Προβολή Αγγείων":
+        st.header("📋 Προβολή Αγγείων")
+        patient_id = st.number_input("ID Ασθενή για Αναζήτηση", min_value=1, step=1)
+        if st.button("🔍 Αναζήτηση"):
+            # Μία γραμμή του patient_summary αντί για ερώτημα στον πίνακα.
+            vessel = db.get(PatientSummary, patient_id)
+            if vessel and vessel.vessel_id is not None:
+                st.json({
+                    "Αριθμός Αγγείων": vessel.num_vessels,
+                    "Αγγειοπλαστική": "ΝΑΙ" if vessel.angioplasty else "ΟΧΙ",
+                    "Απεικόνιση": vessel.imaging
                 })
+            else:
+                st.warning("❕ Δεν βρέθηκαν δεδομένα αγγείων.")
 
-        if results:
-            st.success(f"✅ Βρέθηκαν {len(results)} αποτελέσματα.")
-            st.dataframe(results, use_container_width=True)
+
+    # === Προσθήκη PCI ===
+    elif option == "Προσθήκη PCI":
+        st.subheader("➕ Προσθήκη PCI")
+        patient_id = st.number_input("ID Ασθενή", min_value=1, step=1)
+        balloon = st.checkbox("Balloon")
+        IVL = st.checkbox("IVL")
+        ROTA = st.checkbox("ROTA")
+        if st.button("📝 Καταχώρηση PCI"):
+            pci = PCI(patient_id=patient_id, balloon=balloon, IVL=IVL, ROTA=ROTA)
+            if add_record(db, pci):
+                st.success("✅ PCI προστέθηκε.")
+            else:
+                st.error("❌ Ο ασθενής δεν βρέθηκε.")
+
+    elif option == "Προβολή PCI":
+        st.header("📋 Προβολή PCI")
+        patient_id = st.number_input("ID Ασθενή για Αναζήτηση", min_value=1, step=1)
+        if st.button("🔍 Αναζήτηση"):
+            # Μία γραμμή του patient_summary αντί για ερώτημα στον πίνακα.
+            pci = db.get(PatientSummary, patient_id)
+            if pci and pci.pci_id is not None:
+                st.json({
+                    "Balloon": pci.balloon,
+                    "IVL": pci.IVL,
+                    "ROTA": pci.ROTA
+                })
+            else:
+                st.warning("❕ Δεν βρέθηκαν δεδομένα PCI.")
+
+
+    # === Χρονολόγιο Ασθενή ===
+    elif option == "Χρονολόγιο Ασθενή":
+        st.subheader("🕒 Χρονολόγιο Ασθενή")
+        patient_id = st.number_input("ID Ασθενή", min_value=1, step=1, key="timeline_patient")
+        # Όλες οι εγγραφές του ασθενή (όχι μόνο η πρώτη κάθε πίνακα), από την παλαιότερη.
+        timeline = patient_timeline(db, patient_id)
+        if timeline:
+            st.dataframe(timeline, use_container_width=True, hide_index=True)
         else:
-            st.warning("❕ Δεν βρέθηκαν αποτελέσματα.")
+            st.warning("❕ Δεν υπάρχουν εγγραφές για τον ασθενή.")
+
+        st.markdown("#### Τελευταία εγγραφή ανά ασθενή")
+        kinds = {label: model for model, label in RECORD_KINDS.items()}
+        model = kinds[st.selectbox("Πίνακας", list(kinds), key="latest_kind")]
+        page_size = page_size_input("latest_page_size")
+        keyset_pager(
+            f"latest_cursor_{model.__tablename__}",
+            lambda after_id, limit: latest_page(db, model, after_id, limit),
+            page_size,
+        )
+
+
+    # === Διαγραφή Ασθενή ===
+    elif option == "Διαγραφή Ασθενή":
+        st.subheader("🗑️ Διαγραφή Ασθενή")
+        patient_id = st.number_input("ID Ασθενή για διαγραφή", min_value=1, step=1)
+        if st.button("⚠️ Διαγραφή"):
+            # Ο ασθενής και όλα τα σχετικά δεδομένα, σε μία συναλλαγή.
+            if delete_patients(db, [patient_id]):
+                db.commit()
+                st.success("✅ Ο ασθενής διαγράφηκε.")
+            else:
+                st.error("❌ Δεν βρέθηκε ασθενής.")
+
+        with st.expander("🗑️ Μαζική διαγραφή"):
+            spec = st.text_input("IDs ή διαστήματα", placeholder="π.χ. 12, 15, 40-60")
+            if st.button("⚠️ Διαγραφή όλων") and spec:
+                try:
+                    ids = existing_ids(db, parse_ids(spec))
+                except ValueError as exc:
+                    st.error(f"❌ {exc}")
+                else:
+                    deleted = delete_patients(db, ids)
+                    db.commit()
+                    st.success(f"✅ Διαγράφηκαν {deleted} ασθενείς.")
+
+
+    elif option == "Προβολή Όλων των Ασθενών (Πλήρη Δεδομένα)":
+        st.header("📋 Πλήρης Πίνακας Όλων των Ασθενών")
+        # Ανάγνωση από το στιγμιότυπο (cardiology.replica), όχι από την κύρια βάση.
+        # Το σύνολο από τον μετρητή του cardiology.stats: χωρίς χτίσιμο του bitmap index εδώ.
+        export_panel("full_data_export", read_engine(), total=stats.patient_count(db))
+        page_size = page_size_input("full_data_page_size")
+        order = st.radio("Ταξινόμηση", ["ID", "Κίνδυνος (φθίνουσα)"], horizontal=True, key="full_data_order")
+        if st.button("📥 Φόρτωση Δεδομένων"):
+            st.session_state["full_data_loaded"] = True
+        if st.session_state.get("full_data_loaded"):
+            # Οι βαθμοί κινδύνου έρχονται από το cardiology.risk (στη μνήμη), όχι από το στιγμιότυπο.
+            with read_session() as reader:
+                if order == "ID":
+                    keyset_pager(
+                        "full_data_cursor",
+                        lambda after_id, limit: with_scores(get_engine(), full_data_page(reader, after_id, limit)),
+                        page_size,
+                    )
+                else:
+                    offset_pager(
+                        "full_data_risk",
+                        None,
+                        lambda offset, limit: ranked_page(reader, get_engine(), offset, limit),
+                        page_size,
+                    )
+
+    elif option == "Αναζήτηση Ασθενών με Κριτήρια":
+        st.header("🔍 Αναζήτηση με Κριτήρια")
+
+        with st.expander("🧍‍♂️ Ιστορικό"):
+            col1, col2 = st.columns(2)
+            with col1:
+                age = st.number_input("Ηλικία", min_value=0, max_value=120, step=1, value=0)
+                diabetes = st.selectbox("Διαβήτης", ["", "Type 1", "Type 2"])
+                gender = st.selectbox("Φύλο", ["", "Male", "Female"])
+            with col2:
+                hypertension = st.checkbox("Υπέρταση")
+                smoking = st.checkbox("Κάπνισμα")
+                atrial_fibrillation = st.checkbox("Κολπική Μαρμαρυγή")
+
+        with st.expander("🫀 Βλάβες Αγγείων"):
+            LAD = st.checkbox("LAD")
+            LCX = st.checkbox("LCX")
+            RCA = st.checkbox("RCA")
+
+        with st.expander("🩺 PCI"):
+            balloon = st.checkbox("Balloon")
+            IVL = st.checkbox("IVL")
+            ROTA = st.checkbox("ROTA")
+
+        with st.expander("🧬 Αγγεία"):
+            min_vessels = st.slider("Ελάχιστος αριθμός αγγείων", 0, 10, 0)
+            angioplasty = st.checkbox("Αγγειοπλαστική")
+            imaging = st.selectbox("Απεικόνιση", ["", "NONE", "OCT", "IVUS"])
+
+        with st.expander("⚠️ Κίνδυνος"):
+            min_risk = st.slider("Ελάχιστος βαθμός κινδύνου", 0, MAX_SCORE, 0)
+
+        criteria = {
+            "age": age, "gender": gender, "diabetes": diabetes,
+            "hypertension": hypertension, "smoking": smoking, "atrial_fibrillation": atrial_fibrillation,
+            "LAD": LAD, "LCX": LCX, "RCA": RCA,
+            "balloon": balloon, "IVL": IVL, "ROTA": ROTA,
+            "angioplasty": angioplasty, "imaging": imaging, "min_vessels": min_vessels,
+        }
+        # Άμεση καταμέτρηση από τον bitmap index, πριν από την αναζήτηση.
+        matching = bitmap_index.count(get_engine(), criteria)
+        scored = matching
+        if min_risk:
+            scored = count_at_least(get_engine(), bitmap_index.patient_ids(get_engine(), criteria), min_risk)
+        st.metric("👥 Ασθενείς που ταιριάζουν", scored)
+        # Η εξαγωγή δεν φιλτράρει με τον βαθμό κινδύνου.
+        export_panel("search_export", read_engine(), criteria, total=matching)
+
+        def search_job(criteria, min_risk, progress):
+            # Σε νήμα του cardiology.jobs: δική του συνεδρία, χωρίς κλήσεις st.*.
+            # Με ελάχιστο βαθμό διαβάζονται μόνο οι γραμμές των ασθενών που τον πιάνουν·
+            # ίδια αναζήτηση χωρίς ενδιάμεση εγγραφή έρχεται από την cache.
+            with read_session() as reader:
+                return search_patients(reader, get_engine(), criteria, min_risk, progress=progress)
+
+        # Η αναζήτηση τρέχει στο παρασκήνιο· το αποτέλεσμα μένει και μετά από rerun.
+        job_key = {**criteria, "min_risk": min_risk}
+        if st.button("🔎 Αναζήτηση"):
+            start_job("search", job_key, search_job, criteria, min_risk, total=scored)
+        job = job_result("search", job_key)
+        if job:
+            results = job.result
+            if results:
+                st.success(f"✅ Βρέθηκαν {len(results)} αποτελέσματα σε {job.elapsed():.1f} δευτ.")
+                st.caption("Ταξινόμηση με κλικ στην επικεφαλίδα μιας στήλης (π.χ. «Κίνδυνος»).")
+                st.dataframe(results, use_container_width=True)
+            else:
+                st.warning("❕ Δεν βρέθηκαν αποτελέσματα.")
+
+    # === Μαζική Εισαγωγή ===
+    elif option == "Μαζική Εισαγωγή":
+        st.header("📦 Μαζική Εισαγωγή από CSV/Excel")
+        st.caption("Οι στήλες είναι ίδιες με τον πίνακα «Πλήρη Δεδομένα»· η στήλη ID είναι προαιρετική.")
+        uploaded = st.file_uploader("Αρχείο", type=["csv", "xlsx"])
+        if uploaded and st.button("📥 Εισαγωγή"):
+            data = uploaded.getvalue()
+            total = data.count(b"\n") if uploaded.name.lower().endswith(".csv") else None
+            bar = st.progress(0.0)
+
+            def progress(imported, rejected):
+                text = f"{imported} εισήχθησαν, {rejected} απορρίφθηκαν"
+                bar.progress(min((imported + rejected) / total, 1.0) if total else 0.0, text=text)
+
+            try:
+                report = import_rows(get_engine(), read_file(data, uploaded.name), progress=progress)
+            except ValueError as exc:
+                st.error(f"❌ {exc}")
+            else:
+                bar.progress(1.0)
+                st.success(f"✅ Εισήχθησαν {report['imported']} ασθενείς σε {report['seconds']:.1f} δευτ.")
+                if report["rejected"]:
+                    st.warning(f"⚠️ Απορρίφθηκαν {len(report['rejected'])} γραμμές.")
+                    st.dataframe(
+                        [{"Γραμμή": line, "Αιτία": reason} for line, reason in report["rejected"]],
+                        use_container_width=True,
+                    )
+
+    # === Στατιστικά ===
+    elif option == "Στατιστικά":
+        st.header("📊 Στατιστικά Μητρώου")
+        # Οι μετρητές ενημερώνονται από triggers σε κάθε εισαγωγή/διαγραφή.
+        stats_dashboard(stats.load(db))
+        if st.button("🔄 Επανυπολογισμός από την αρχή"):
+            with get_engine().begin() as conn:
+                stats.rebuild(conn)
+            st.rerun()
+
+# === Debug ===
+if show_queries:
+    query_panel(run, page_metrics.snapshot())
@@ -0,0 +1,119 @@
+"""Localhost load test for the async API backend.
+
+    python -m benchmarks.api_load [n_patients] [seconds] [concurrency]
+
+Seeds a temporary database, starts ``uvicorn cardiology.api:app`` on a free
+127.0.0.1 port in a subprocess and drives it with concurrent clients doing
+the standalone app's request mix; reports requests/s and latency percentiles
+per route.
+"""
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from cardiology.bulk_import import import_rows, read_file
+from cardiology.db import make_engine
+from cardiology.migrations import init_db
+from benchmarks import bulk_import
+
+# (weight, method, path, params/body factory)
+MIX = [
+    (30, "GET", "/patients/", lambda rng: {"after_id": rng.randint(0, 1000), "limit": 50}),
+    (20, "GET", "/all_data/", lambda rng: {"after_id": rng.randint(0, 1000), "limit": 50}),
+    (15, "GET", "/search_patients/", lambda rng: {"LAD": True, "min_vessels": rng.randint(1, 3), "age": rng.randint(30, 95)}),
+    (15, "GET", "/medical_history/{pid}", None),
+    (10, "GET", "/lesions/{pid}", None),
+    (10, "POST", "/patients/", lambda rng: {"first_name": "Load", "last_name": "Test", "age": 50}),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_url, port):
+    env = dict(os.environ, CARDIOLOGY_DATABASE_URL=db_url)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "cardiology.api:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/patients/", params={"limit": 1})
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("API server did not start")
+
+
+async def run_load(base_url, n_patients, seconds, concurrency):
+    latencies = {}
+    errors = 0
+    routes = [m for m in MIX for _ in range(m[0])]
+
+    async def worker(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+            stop = time.perf_counter() + seconds
+            while time.perf_counter() < stop:
+                _, method, path, factory = rng.choice(routes)
+                url = path.format(pid=rng.randint(1, n_patients))
+                start = time.perf_counter()
+                if method == "GET":
+                    response = await client.get(url, params=factory(rng) if factory else None)
+                else:
+                    response = await client.post(url, json=factory(rng))
+                latencies.setdefault(f"{method} {path}", []).append(time.perf_counter() - start)
+                if response.status_code not in (200, 404):
+                    errors += 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def main(n_patients=20000, seconds=15, concurrency=32):
+    tmp = tempfile.mkdtemp()
+    csv_path = os.path.join(tmp, "registry.csv")
+    bulk_import.write_csv(csv_path, n_patients)
+    db_url = f"sqlite:///{os.path.join(tmp, 'api.db')}"
+    engine = make_engine(db_url)
+    init_db(engine)
+    import_rows(engine, read_file(csv_path))
+    engine.dispose()
+
+    port = free_port()
+    server = start_server(db_url, port)
+    try:
+        latencies, errors = asyncio.run(run_load(f"http://127.0.0.1:{port}", n_patients, seconds, concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{n_patients} patients, {concurrency} concurrent clients, {seconds}s: "
+          f"{total / seconds:.0f} req/s, {errors} errors")
+    for route, values in sorted(latencies.items()):
+        print(f"  {route:<28} {len(values):>6} req  p50 {percentile(values, 50) * 1000:7.1f} ms  "
+              f"p99 {percentile(values, 99) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,101 @@
+"""Bitmap index: build time, cohort lookups vs SQL, and incremental upkeep.
+
+    python -m benchmarks.bitmap [n_patients] [rounds]
+
+Bulk-imports a synthetic registry into a temporary database, builds the
+index, times random criteria combinations against the SQL search (and
+checks that both return the same patients), then inserts and deletes
+patients through ORM sessions and verifies the index again.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import func, select
+
+from cardiology.bitmap import BitmapIndex, bitmap_index
+from cardiology.bulk_import import import_rows, read_file
+from cardiology.db import get_engine, session_scope
+from cardiology.models import Patient, MedicalHistory, Lesion, Vessel
+from cardiology.queries import RELATED_MODELS, search_query
+from benchmarks import bulk_import
+from benchmarks.search import random_criteria
+
+
+def main(n_patients=100000, rounds=50):
+    tmp = tempfile.mkdtemp()
+    url = f"sqlite:///{os.path.join(tmp, 'bitmap.db')}"
+    csv_path = os.path.join(tmp, "registry.csv")
+    bulk_import.write_csv(csv_path, n_patients)
+    engine = get_engine(url)
+    import_rows(engine, read_file(csv_path))
+
+    start = time.perf_counter()
+    bitmap_index.rebuild(engine)
+    print(f"build: {time.perf_counter() - start:.2f}s, {bitmap_index.stats()}")
+
+    rng = random.Random(2)
+    count_time = ids_time = sql_time = 0.0
+    with engine.connect() as conn:
+        for _ in range(rounds):
+            criteria = random_criteria(rng)
+            start = time.perf_counter()
+            count = bitmap_index.count(engine, criteria)
+            count_time += time.perf_counter() - start
+            start = time.perf_counter()
+            ids = bitmap_index.patient_ids(engine, criteria)
+            ids_time += time.perf_counter() - start
+            start = time.perf_counter()
+            expected = [r.patient_id for r in conn.execute(search_query(criteria))]
+            sql_time += time.perf_counter() - start
+            if count != len(expected) or not np.array_equal(ids, expected):
+                print(f"MISMATCH for {criteria}: {count} vs {len(expected)}")
+                return 1
+    print(f"{rounds} cohorts: bitmap count {count_time / rounds * 1e6:.0f} µs, "
+          f"IDs {ids_time / rounds * 1e6:.0f} µs; SQL search {sql_time / rounds * 1000:.1f} ms")
+
+    # Incremental upkeep through ORM sessions.
+    with session_scope(url) as db:
+        for i in range(50):
+            p = Patient(first_name="Νέος", last_name="Ασθενής", age=60 + i % 5, medical_history="")
+            db.add(p)
+            db.flush()
+            db.add(MedicalHistory(patient_id=p.patient_id, gender="Female", diabetes="Type 2", BMI=27.0,
+                                  hypertension=True, smoking=False, hereditary=True, atrial_fibrillation=False))
+            db.add(Lesion(patient_id=p.patient_id, LAD=True, LCX=False, RCA=i % 2 == 0))
+            db.add(Vessel(patient_id=p.patient_id, num_vessels=3, angioplasty=True, imaging="OCT"))
+        # A second row for an existing patient does not change its (first-row) data.
+        db.add(Lesion(patient_id=1, LAD=True, LCX=True, RCA=True))
+        db.commit()
+        for pid in range(2, 200, 3):
+            db.query(Lesion).filter_by(patient_id=pid).delete()
+            db.query(Vessel).filter_by(patient_id=pid).delete()
+        db.query(MedicalHistory).filter(MedicalHistory.patient_id.in_([5, 6, 7])).delete()
+        db.commit()
+        # Deleting patients, as the "Διαγραφή Ασθενή" page does.
+        for pid in range(300, 310):
+            for model in RELATED_MODELS:
+                db.query(model).filter_by(patient_id=pid).delete()
+            db.delete(db.get(Patient, pid))
+        db.commit()
+    start = time.perf_counter()
+    bitmap_index.sync(engine)
+    print(f"incremental refresh: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    extra = [random_criteria(rng) for _ in range(20)] + [{"hereditary": True, "diabetes": "Type 2"}]
+    mismatches = bitmap_index.verify(engine, extra)
+    fresh = BitmapIndex()
+    fresh.rebuild(engine)
+    same = fresh.bitsets == bitmap_index.bitsets
+    with engine.connect() as conn:
+        total = conn.scalar(select(func.count()).select_from(Patient))
+    print(f"after writes: {bitmap_index.stats()['patients']} / {total} patients indexed, "
+          f"{len(mismatches)} mismatches, identical to a fresh build: {same}")
+    return 0 if not mismatches and same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
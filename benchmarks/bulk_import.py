@@ -0,0 +1,64 @@
+"""Throughput of the bulk importer on a synthetic wide CSV file.
+
+    python -m benchmarks.bulk_import [n_rows] [min_rows_per_s]
+
+Exits with status 1 when fewer than ``min_rows_per_s`` wide rows per second
+(default MIN_RATE) are imported, so that a regression such as per-batch
+upkeep of the derived tables growing with the data does not go unnoticed.
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+
+from cardiology.bulk_import import import_rows, read_file
+from cardiology.db import make_engine
+from cardiology.migrations import init_db
+from cardiology.queries import FULL_DATA_COLUMNS
+from benchmarks.synthetic import FIRST_NAMES, LAST_NAMES
+
+# Wide rows per second, statistics, summary and search upkeep included.
+MIN_RATE = 7500
+
+
+def write_csv(path, n_rows, seed=0):
+    rng = random.Random(seed)
+    yn = lambda p: "ΝΑΙ" if rng.random() < p else "ΟΧΙ"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(c for c in FULL_DATA_COLUMNS if c != "ID")
+        for i in range(n_rows):
+            writer.writerow([
+                rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.randint(30, 95), "",
+                rng.choice(["Male", "Female"]), yn(0.5), yn(0.3), rng.choice(["None", "Type 1", "Type 2"]),
+                yn(0.2), yn(0.1), round(rng.uniform(18, 40), 1),
+                yn(0.5), yn(0.3), yn(0.4),
+                rng.randint(0, 3), yn(0.6), rng.choice(["NONE", "OCT", "IVUS"]),
+                yn(0.6), yn(0.1), yn(0.05),
+            ] if i % 1000 else ["", "", "abc"] + [""] * 17)  # one invalid row per 1000
+
+
+def main(n_rows=200000, min_rate=MIN_RATE):
+    tmp = tempfile.mkdtemp()
+    csv_path = os.path.join(tmp, "registry.csv")
+    write_csv(csv_path, n_rows)
+    engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bulk.db')}")
+    init_db(engine)
+    report = import_rows(engine, read_file(csv_path))
+    with engine.connect() as conn:
+        table_rows = sum(conn.exec_driver_sql(f"SELECT count(*) FROM {t}").scalar()
+                         for t in ("patients", "medical_history", "lesions", "vessels", "pci"))
+    seconds = report["seconds"]
+    print(f"{report['imported']} patients imported, {len(report['rejected'])} rejected in {seconds:.2f}s")
+    rate = report["imported"] / seconds
+    print(f"  {rate:,.0f} wide rows/s, {table_rows / seconds:,.0f} table rows/s "
+          f"({table_rows} rows across the five tables)")
+    if rate < min_rate:
+        print(f"FAIL: below the floor of {min_rate:,} wide rows/s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
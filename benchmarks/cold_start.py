@@ -0,0 +1,109 @@
+"""Cold start of both apps: imports, schema check and first render.
+
+    python -m benchmarks.cold_start [--tree PATH] [--runs 5]
+
+Every measurement runs in a fresh interpreter, as a new Streamlit server
+process or bench process would:
+
+- imports: the app script's top-level import statements (streamlit itself
+  is imported before the clock starts; it is the same for every version);
+- schema check: ``init_db`` on a database that is already current;
+- first render: ``AppTest.from_file(app).run()`` on that database.
+
+--tree runs the same measurements against another checkout, e.g. one made
+with ``git worktree add /tmp/before <commit>``, to compare before and after.
+The standalone app's first page sends no request, so no API server is
+needed.
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APPS = ("app_cardiology_final_full.py", "app_standalone_full.py")
+
+IMPORTS = """
+import sys, time
+import streamlit
+start = time.perf_counter()
+exec(compile({source!r}, {app!r}, "exec"))
+print(time.perf_counter() - start, "sqlalchemy" in sys.modules)
+"""
+
+SCHEMA = """
+import time
+from cardiology.db import make_engine
+from cardiology.migrations import init_db
+engine = make_engine()
+start = time.perf_counter()
+init_db(engine)
+print(time.perf_counter() - start)
+"""
+
+RENDER = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=60).run()
+assert not at.exception, at.exception
+print(time.perf_counter() - start)
+"""
+
+
+def import_source(path):
+    """The module-level import statements of a script."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return ast.unparse(ast.Module(body=nodes, type_ignores=[]))
+
+
+def run(tree, code, database, runs):
+    env = dict(os.environ, PYTHONPATH=tree, CARDIOLOGY_DATABASE_URL=f"sqlite:///{database}")
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=tree, env=env, capture_output=True, text=True)
+        if out.returncode:
+            raise RuntimeError(out.stderr)
+        results.append(out.stdout.split())
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Χρόνος εκκίνησης των εφαρμογών")
+    parser.add_argument("--tree", default=os.getcwd(), help="checkout to measure (default: this one)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+    tree = os.path.abspath(args.tree)
+    database = os.path.join(tempfile.mkdtemp(), "cold.db")
+    run(tree, SCHEMA, database, 1)  # create and migrate it once
+
+    median = lambda values: statistics.median(float(v) for v in values) * 1000
+    report = {}
+    for app in APPS:
+        path = os.path.join(tree, app)
+        imports = run(tree, IMPORTS.format(source=import_source(path), app=path), database, args.runs)
+        render = run(tree, RENDER.format(app=path), database, args.runs)
+        report[app] = {
+            "imports_ms": median(r[0] for r in imports),
+            "loads_sqlalchemy": imports[0][1] == "True",
+            "first_render_ms": median(r[0] for r in render),
+        }
+    report["schema_check_ms"] = median(r[0] for r in run(tree, SCHEMA, database, args.runs))
+
+    print(f"{tree} (median of {args.runs} fresh processes)")
+    for app in APPS:
+        r = report[app]
+        print(f"  {app:<32} imports {r['imports_ms']:6.0f} ms  first render {r['first_render_ms']:6.0f} ms"
+              f"  SQLAlchemy loaded: {r['loads_sqlalchemy']}")
+    print(f"  init_db() on a current database: {report['schema_check_ms']:.1f} ms")
+    print(json.dumps(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Orphan cleanup, space reclamation and batch deletes.
+
+    python -m benchmarks.deletes [n_patients] [batch]
+
+Builds a database the way an old deployment looks (default auto_vacuum,
+patients deleted without their records), times a scan of the related
+tables, removes the orphans and converts the file to incremental
+auto_vacuum.  Then compares the page's old per-patient delete loop with one
+``delete_patients`` call for ``batch`` patients, and checks the statistics
+counters, patient_summary and the bitmap index against the tables.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from cardiology import deletes, stats, summary
+from cardiology.bitmap import bitmap_index
+from cardiology.db import make_engine
+from cardiology.migrations import init_db
+from cardiology.models import Patient
+from cardiology.queries import RELATED_MODELS
+from benchmarks.synthetic import populate
+
+
+def scan_time(engine):
+    # The statistics recount reads every row of the five tables.
+    with engine.connect() as conn:
+        start = time.perf_counter()
+        conn.exec_driver_sql(stats._recount_sql()).fetchall()
+        return time.perf_counter() - start
+
+
+def mib(path):
+    return os.path.getsize(path) / 2**20
+
+
+def main(n_patients=200000, batch=20000):
+    path = os.path.join(tempfile.mkdtemp(), "deletes.db")
+    engine = make_engine(f"sqlite:///{path}", "legacy")  # auto_vacuum NONE, foreign keys off
+    init_db(engine)
+    populate(engine, n_patients)
+    Session = sessionmaker(bind=engine)
+
+    # What "Διαγραφή Ασθενή" used to leave behind: the patient gone, its records not.
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TRIGGER cascade_patients_delete")
+        conn.exec_driver_sql("DELETE FROM patients WHERE patient_id % 5 = 0")
+        deletes.install(conn)
+    before = scan_time(engine)
+    size = mib(path)
+    with Session() as db:
+        start = time.perf_counter()
+        removed = deletes.delete_orphans(db)
+        db.commit()
+        cleanup = time.perf_counter() - start
+    print(f"orphan cleanup: {sum(removed.values())} rows {removed} in {cleanup:.2f}s; "
+          f"scan {before * 1000:.0f} -> {scan_time(engine) * 1000:.0f} ms")
+    start = time.perf_counter()
+    pages = deletes.enable_incremental_vacuum(engine)
+    print(f"incremental auto_vacuum: VACUUM {time.perf_counter() - start:.1f}s, "
+          f"{size:.1f} -> {mib(path):.1f} MiB ({pages[0]} -> {pages[1]} pages)")
+
+    with Session() as db:
+        ids = db.scalars(Patient.__table__.select().with_only_columns(Patient.patient_id)).all()
+    old_ids, batch_ids = ids[:500], ids[500:500 + batch]
+
+    with Session() as db:
+        start = time.perf_counter()
+        for patient_id in old_ids:
+            for model in RELATED_MODELS:
+                db.query(model).filter_by(patient_id=patient_id).delete()
+            db.delete(db.query(Patient).filter_by(patient_id=patient_id).first())
+            db.commit()
+        per_patient = (time.perf_counter() - start) / len(old_ids)
+    size = mib(path)
+    with Session() as db:
+        start = time.perf_counter()
+        deleted = deletes.delete_patients(db, batch_ids)
+        db.commit()
+        batched = time.perf_counter() - start
+    print(f"delete: {per_patient * 1000:.2f} ms/patient one by one; {deleted} patients in one batch "
+          f"{batched:.2f}s ({batched / deleted * 1000:.3f} ms/patient); file {size:.1f} -> {mib(path):.1f} MiB")
+
+    with engine.connect() as conn:
+        drift, differing = stats.verify(conn), summary.verify(conn)
+        orphans = deletes.orphan_counts(Session(bind=conn))
+    mismatches = bitmap_index.verify(engine)
+    print(f"after deletes: counter drift {len(drift)}, summary rows differing {len(differing)}, "
+          f"bitmap mismatches {len(mismatches)}, orphans {orphans}")
+    return 1 if drift or differing or mismatches or any(orphans.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
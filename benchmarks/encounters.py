@@ -0,0 +1,122 @@
+"""Recording one encounter: five sidebar pages against the single form.
+
+    python -m benchmarks.encounters [n_patients] [encounters]
+
+On a temporary database with synthetic patients, records the same
+encounters (a new patient with history, lesion, vessel and PCI) two ways:
+
+- pages: what the five "Προσθήκη ..." pages did, one session (rerun) each,
+  with the existence check of the patient and a commit per page;
+- encounter: ``record_encounter`` in one session, one flush and one commit.
+
+Then the same through the API: POST /patients/ plus four POSTs against one
+POST /encounters/.  Reports encounters/s, p50/p99 latency and the SQL
+statements per encounter, and checks the derived tables afterwards.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import httpx
+
+from cardiology import fulltext, stats, summary
+from cardiology.db import get_engine, session_scope
+from cardiology.encounters import record_encounter
+from cardiology.metrics import page_run
+from cardiology.models import Patient, MedicalHistory, Lesion, Vessel, PCI
+from benchmarks.api_load import free_port, percentile, start_server
+from benchmarks.synthetic import populate
+
+
+def random_encounter(rng):
+    return {
+        "patient": {"first_name": "Νέος", "last_name": "Ασθενής", "age": rng.randint(30, 95), "medical_history": ""},
+        "history": {"gender": rng.choice(["Male", "Female"]), "hypertension": rng.random() < 0.6,
+                    "smoking": rng.random() < 0.3, "diabetes": rng.choice(["None", "Type 1", "Type 2"]),
+                    "hereditary": False, "BMI": round(rng.uniform(18, 40), 1), "atrial_fibrillation": False},
+        "lesion": {"LAD": True, "LCX": rng.random() < 0.4, "RCA": rng.random() < 0.3},
+        "vessel": {"num_vessels": rng.randint(1, 3), "angioplasty": True, "imaging": rng.choice(["NONE", "OCT", "IVUS"])},
+        "pci": {"balloon": True, "IVL": rng.random() < 0.1, "ROTA": rng.random() < 0.05},
+    }
+
+
+def five_pages(url, encounter):
+    with session_scope(url) as db:
+        patient = Patient(**encounter["patient"])
+        db.add(patient)
+        db.commit()
+        patient_id = patient.patient_id
+    for name, model in (("history", MedicalHistory), ("lesion", Lesion), ("vessel", Vessel), ("pci", PCI)):
+        with session_scope(url) as db:
+            if db.query(Patient).filter_by(patient_id=patient_id).first():
+                db.add(model(patient_id=patient_id, **encounter[name]))
+                db.commit()
+
+
+def one_form(url, encounter):
+    with session_scope(url) as db:
+        record_encounter(db, **encounter)
+        db.commit()
+
+
+def api_pages(client, encounter):
+    patient_id = client.post("/patients/", json=encounter["patient"]).json()["patient_id"]
+    for name, path in (("history", "/medical_history/"), ("lesion", "/lesions/"), ("vessel", "/vessels/"),
+                       ("pci", "/pci/")):
+        client.post(path, json={"patient_id": patient_id, **encounter[name]}).raise_for_status()
+
+
+def api_form(client, encounter):
+    client.post("/encounters/", json=encounter).raise_for_status()
+
+
+def measure(run, encounters):
+    latencies, statements = [], 0
+    for encounter in encounters:
+        with page_run("benchmark") as rerun:
+            start = time.perf_counter()
+            run(encounter)
+            latencies.append(time.perf_counter() - start)
+        statements += rerun.statements
+    return latencies, statements / len(encounters)
+
+
+def report(name, latencies, statements=None):
+    per_encounter = f"{statements:5.1f} statements/encounter" if statements is not None else ""
+    print(f"{name:<20} {len(latencies) / sum(latencies):8.1f}/s  p50 {percentile(latencies, 50) * 1000:6.2f} ms"
+          f"  p99 {percentile(latencies, 99) * 1000:6.2f} ms  {per_encounter}")
+
+
+def main(n_patients=100000, count=500):
+    path = os.path.join(tempfile.mkdtemp(), "encounters.db")
+    url = f"sqlite:///{path}"
+    engine = get_engine(url)
+    populate(engine, n_patients)
+    rng = random.Random(0)
+    print(f"{n_patients} synthetic patients, {count} encounters per flow")
+
+    for name, run in (("pages (direct)", five_pages), ("encounter (direct)", one_form)):
+        encounters = [random_encounter(rng) for _ in range(count)]
+        report(name, *measure(lambda e: run(url, e), encounters))
+
+    port = free_port()
+    server = start_server(url, port)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            for name, run in (("pages (API)", api_pages), ("encounter (API)", api_form)):
+                encounters = [random_encounter(rng) for _ in range(count)]
+                latencies, _ = measure(lambda e: run(client, e), encounters)
+                report(name, latencies)
+    finally:
+        server.terminate()
+
+    with engine.connect() as conn:
+        drift, differing, unindexed = stats.verify(conn), summary.verify(conn), fulltext.verify(conn)
+    print(f"counter drift {len(drift)}, summary rows differing {len(differing)}, search index differs {len(unindexed)}")
+    return 1 if drift or differing or unindexed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
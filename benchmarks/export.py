@@ -0,0 +1,44 @@
+"""Peak memory and speed of the streaming export at growing registry sizes.
+
+    python -m benchmarks.export [n_patients ...]
+
+Peak Python memory (tracemalloc) should stay flat as the registry grows.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from cardiology.bulk_import import import_rows, read_file
+from cardiology.db import make_engine
+from cardiology.export import export
+from cardiology.migrations import init_db
+from benchmarks import bulk_import
+
+
+def main(*sizes):
+    sizes = sizes or (20000, 100000)
+    for n in sizes:
+        tmp = tempfile.mkdtemp()
+        csv_path = os.path.join(tmp, "registry.csv")
+        bulk_import.write_csv(csv_path, n)
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'export.db')}")
+        init_db(engine)
+        import_rows(engine, read_file(csv_path))
+        for fmt in ("csv", "parquet"):
+            out = os.path.join(tmp, f"out.{fmt}")
+            start = time.perf_counter()
+            count = export(engine, out, fmt)
+            elapsed = time.perf_counter() - start
+            # Second run under tracemalloc, which slows allocation down too much to time.
+            tracemalloc.start()
+            export(engine, out, fmt)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{n:>8} patients  {fmt:<7} {count} rows in {elapsed:5.2f}s  "
+                  f"peak {peak / 2**20:6.1f} MiB  file {os.path.getsize(out) / 2**20:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
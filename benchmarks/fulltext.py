@@ -0,0 +1,102 @@
+"""Full-text patient search: latency at scale and index synchronisation.
+
+    python -m benchmarks.fulltext [n_patients] [repeats]
+
+Fills a temporary database with synthetic patients (benchmarks.synthetic,
+imported in bulk), then times typical queries typed into the search box
+(first page and the 20th page, and whether bm25 ordered them) against a ``LIKE '%...%'`` scan of patients,
+the closest thing to the search box before the index.  Finally adds,
+renames and deletes patients through the ORM and the batch delete, and
+checks that the index agrees with the patients table.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import or_, select, text
+
+from cardiology import fulltext
+from cardiology.db import get_engine, session_scope
+from cardiology.deletes import delete_patients
+from cardiology.models import Patient
+from benchmarks.api_load import percentile
+from benchmarks.synthetic import populate
+
+PAGE_SIZE = 50
+
+# What staff would type: accents optional, prefixes, name plus note.
+QUERIES = [
+    "Παπαδόπουλος",
+    "παπαδοπουλος",
+    "ΓΙΩΡΓ",
+    "γιωργ παπαδ",
+    "ευαγγ μακρ",
+    "στηθαγχη",
+    "εμφρ νεφρ",
+    "χαπ ζαχαριου",
+    "υποθυρ",
+]
+
+
+def like_search(db, query, offset, limit):
+    conditions = [
+        or_(*(column.like(f"%{word}%") for column in (Patient.first_name, Patient.last_name, Patient.medical_history)))
+        for word in query.split()
+    ]
+    stmt = select(Patient).where(*conditions).order_by(Patient.patient_id).offset(offset).limit(limit)
+    return db.scalars(stmt).all()
+
+
+def timed(run, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = run()
+        latencies.append(time.perf_counter() - start)
+    return rows, latencies
+
+
+def main(n_patients=300000, repeats=20):
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'fulltext.db')}"
+    engine = get_engine(url)
+    report = populate(engine, n_patients)
+    print(f"{report['imported']} synthetic patients in {report['seconds']:.1f}s")
+
+    print(f"{'query':<16} {'matches':>8} {'order':>7} {'p50 ms':>8} {'p99 ms':>8} {'page 20':>8} {'LIKE ms':>8}")
+    with session_scope(url) as db:
+        for query in QUERIES:
+            match = fulltext.match_expression(query)
+            count = db.scalar(text(f"SELECT count(*) FROM {fulltext.TABLE} WHERE {fulltext.TABLE} MATCH :m"),
+                              {"m": match})
+            order = "rank" if fulltext.ranked(db, match) else "newest"
+            _, first = timed(lambda: fulltext.find_patients(db, query, 0, PAGE_SIZE + 1), repeats)
+            _, deep = timed(lambda: fulltext.find_patients(db, query, 19 * PAGE_SIZE, PAGE_SIZE + 1), repeats)
+            _, like = timed(lambda: like_search(db, query, 0, PAGE_SIZE + 1), max(1, repeats // 10))
+            print(f"{query:<16} {count:>8} {order:>7} {percentile(first, 50) * 1000:>8.2f} {percentile(first, 99) * 1000:>8.2f} "
+                  f"{percentile(deep, 50) * 1000:>8.2f} {percentile(like, 50) * 1000:>8.1f}")
+
+    with session_scope(url) as db:
+        added = Patient(first_name="Ευθύμιος", last_name="Ξανθόπουλος", age=64, medical_history="Ανεύρυσμα αορτής")
+        db.add(added)
+        db.commit()
+        found_new = [r["ID"] for r in fulltext.find_patients(db, "ευθυμ ξανθοπ")] == [added.patient_id]
+        added.last_name = "Ξενάκης"
+        db.commit()
+        renamed = (not fulltext.find_patients(db, "ξανθοπ")
+                   and [r["ID"] for r in fulltext.find_patients(db, "ξενακ")] == [added.patient_id])
+        db.delete(added)
+        db.commit()
+        ids = db.scalars(select(Patient.patient_id).limit(1000)).all()
+        delete_patients(db, ids)
+        db.commit()
+        gone = not fulltext.find_patients(db, "ξενακ")
+    with engine.connect() as conn:
+        differing = fulltext.verify(conn)
+    print(f"sync: insert found {found_new}, rename followed {renamed}, deletes removed {gone}; "
+          f"index differs for {len(differing)} patients")
+    return 0 if found_new and renamed and gone and not differing else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
@@ -0,0 +1,68 @@
+"""Time per-patient lookups before and after the index migration.
+
+    python -m benchmarks.indexes [n_patients] [lookups]
+
+Builds a synthetic database the way an old deployment looks (no indexes on
+patient_id, user_version 0), times the ``filter_by(patient_id=...).first()``
+lookups the pages issue, runs ``migrate`` and times them again.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from cardiology.migrations import migrate, schema_version
+from cardiology.models import Base, Patient, MedicalHistory, Lesion, Vessel, PCI
+from cardiology.queries import search_patients
+from benchmarks.synthetic import seed
+
+
+def time_lookups(db, ids):
+    start = time.perf_counter()
+    for pid in ids:
+        for model in (MedicalHistory, Lesion, Vessel, PCI):
+            db.query(model).filter_by(patient_id=pid).first()
+    return (time.perf_counter() - start) / (len(ids) * 4)
+
+
+def time_search(db):
+    start = time.perf_counter()
+    search_patients(db, {"hypertension": True, "LAD": True, "balloon": True})
+    return time.perf_counter() - start
+
+
+def main(n_patients=50000, lookups=200):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if not index.columns.contains_column(table.primary_key.columns[0]):
+                    index.drop(conn)
+    db = sessionmaker(bind=engine)()
+    seed(db, n_patients)
+    max_id = db.scalar(select(func.max(Patient.patient_id)))
+    ids = random.Random(0).sample(range(1, max_id + 1), lookups)
+
+    before = time_lookups(db, ids)
+    db.close()
+    applied = migrate(engine)
+    with engine.connect() as conn:
+        version = schema_version(conn)
+    db = sessionmaker(bind=engine)()
+    after, search = time_lookups(db, ids), time_search(db)
+
+    print(f"{n_patients} patients, migrations applied: {applied} (schema version {version})")
+    print(f"per-table lookup: {before * 1e6:9.1f} us -> {after * 1e6:7.1f} us  ({before / after:.0f}x)")
+    # Without the patient_id indexes every joined row needs a table scan, so
+    # the search is only timed once the migration has run.
+    print(f"criteria search after migration: {search * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,122 @@
+"""Background jobs: how long the page is blocked, cancellation, and the worker limit.
+
+    python -m benchmarks.jobs [n_patients] [sessions]
+
+On a temporary database with synthetic patients:
+
+- page blocked: the criteria search run inline, as the page did, against
+  submitting it as a job (what the script thread now waits for);
+- cancel: time from JobRunner.cancel to the job having stopped, for a
+  running full export;
+- load: ``sessions`` sessions each start a search and an export at once
+  while one clinician records encounters.  Runs with MAX_WORKERS workers
+  and with one worker per job (no limit), and reports how long the jobs
+  took and the encounters' p50/p99 commit latency.
+"""
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from cardiology.db import get_engine, session_scope
+from cardiology.encounters import record_encounter
+from cardiology.export import export
+from cardiology.jobs import MAX_WORKERS, JobRunner
+from cardiology.queries import search_patients
+from benchmarks.api_load import percentile
+from benchmarks.replica import ENCOUNTER
+from benchmarks.synthetic import populate
+
+CRITERIA = {"hypertension": True}
+
+
+def search(engine, criteria, progress=None):
+    with Session(bind=engine) as db:
+        return search_patients(db, criteria, progress=progress)
+
+
+def export_csv(engine, progress=None):
+    sink = io.BytesIO()
+    return export(engine, sink, "csv", progress=progress)
+
+
+def wait(jobs):
+    while not all(job.finished for job in jobs):
+        time.sleep(0.005)
+
+
+def load(url, engine, sessions, workers):
+    runner = JobRunner(max_workers=workers)
+    latencies, stop = [], threading.Event()
+
+    def clinician():
+        while not stop.is_set():
+            start = time.perf_counter()
+            with session_scope(url) as db:
+                record_encounter(db, **ENCOUNTER)
+                db.commit()
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.05)
+
+    writer = threading.Thread(target=clinician)
+    writer.start()
+    start = time.perf_counter()
+    jobs = []
+    for n in range(sessions):
+        jobs.append(runner.submit(f"session-{n}", "search", CRITERIA, search, engine, CRITERIA))
+        jobs.append(runner.submit(f"session-{n}", "export", None, export_csv, engine))
+    wait(jobs)
+    seconds = time.perf_counter() - start
+    stop.set()
+    writer.join()
+    return seconds, latencies
+
+
+def main(n_patients=100000, sessions=8):
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'jobs.db')}"
+    engine = get_engine(url)
+    populate(engine, n_patients)
+    print(f"{n_patients} patients")
+
+    runner = JobRunner()
+    inline, submitted, finished = [], [], []
+    for _ in range(5):
+        start = time.perf_counter()
+        rows = search(engine, CRITERIA)
+        inline.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        job = runner.submit("bench", "search", CRITERIA, search, engine, CRITERIA, total=len(rows))
+        submitted.append(time.perf_counter() - start)
+        wait([job])
+        finished.append(time.perf_counter() - start)
+        runner.forget("bench", "search")
+    print(f"page blocked by the search ({len(rows)} rows): inline p50 {percentile(inline, 50) * 1000:.0f} ms, "
+          f"as a job {percentile(submitted, 50) * 1000:.2f} ms (job done after {percentile(finished, 50) * 1000:.0f} ms)")
+
+    stopped = []
+    for _ in range(5):
+        job = runner.submit("bench", "export", None, export_csv, engine)
+        while job.done == 0:
+            time.sleep(0.001)
+        start = time.perf_counter()
+        runner.cancel("bench", "export")
+        wait([job])
+        stopped.append(time.perf_counter() - start)
+        runner.forget("bench", "export")
+    print(f"cancel a running export: stopped after p50 {percentile(stopped, 50) * 1000:.1f} ms, "
+          f"max {max(stopped) * 1000:.1f} ms")
+
+    print(f"{sessions} sessions x (search + export), one clinician recording encounters:")
+    for workers in (MAX_WORKERS, 2 * sessions):
+        seconds, latencies = load(url, engine, sessions, workers)
+        print(f"  {workers:>3} workers: jobs done in {seconds:5.1f}s, encounter commit p50 "
+              f"{percentile(latencies, 50) * 1000:6.2f} ms  p99 {percentile(latencies, 99) * 1000:7.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
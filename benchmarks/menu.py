@@ -0,0 +1,222 @@
+"""Headless benchmark of the database work behind every sidebar option.
+
+    python -m benchmarks.menu [--patients 10000] [--ops 200] [--seed 0]
+                              [--database URL] [--only search ...]
+                              [--save results.json] [--baseline results.json]
+
+Without --database a temporary database is filled with synthetic patients
+(benchmarks.synthetic).  Each scenario repeats what its page does when the
+button is pressed, in a fresh session per operation as every Streamlit
+rerun has, without starting Streamlit; the result cache is bypassed so the
+database is actually queried.  Reports ops/s, p50/p99 latency and the peak
+Python memory allocated by one run of the scenario (tracemalloc, measured in
+a separate, shorter pass so tracing does not skew the timings), after one
+untimed warm-up operation.
+
+--save writes the numbers as JSON; --baseline compares with such a file and
+shows the p50 change, so regressions show up between runs.  Read-only
+scenarios run first; the write scenarios add and finally delete patients.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+
+from cardiology import stats
+from cardiology.bitmap import bitmap_index
+from cardiology.bulk_import import import_rows
+from cardiology.db import get_engine, session_scope
+from cardiology.deletes import delete_patients
+from cardiology.encounters import add_record, record_encounter
+from cardiology.models import Patient, PatientSummary, MedicalHistory, Lesion, Vessel, PCI
+from cardiology.queries import full_data_page, list_patients_page, patient_timeline, search_patients
+from benchmarks.api_load import percentile
+from benchmarks.search import random_criteria
+from benchmarks.synthetic import populate, registry_rows
+
+PAGE_SIZE = 50
+IMPORT_ROWS = 1000
+
+
+@dataclass
+class Context:
+    url: str
+    rng: random.Random
+    max_id: int
+    deletable: list
+
+
+# === Σενάρια: ένα ανά επιλογή του μενού ===
+def add_patient(db, ctx):
+    db.add(Patient(first_name="Νέος", last_name="Ασθενής", age=ctx.rng.randint(30, 95), medical_history=""))
+    db.commit()
+
+
+def list_patients(db, ctx):
+    list_patients_page(db, ctx.rng.randint(0, ctx.max_id), PAGE_SIZE)
+
+
+def _add_related(make):
+    def scenario(db, ctx):
+        add_record(db, make(ctx.rng.randint(1, ctx.max_id), ctx.rng))
+    return scenario
+
+
+def encounter(db, ctx):
+    rng = ctx.rng
+    record_encounter(
+        db,
+        patient={"first_name": "Νέος", "last_name": "Ασθενής", "age": rng.randint(30, 95), "medical_history": ""},
+        history={"gender": rng.choice(["Male", "Female"]), "hypertension": True, "smoking": False,
+                 "diabetes": "Type 2", "hereditary": False, "BMI": 27.5, "atrial_fibrillation": False},
+        lesion={"LAD": True, "LCX": rng.random() < 0.5, "RCA": False},
+        vessel={"num_vessels": rng.randint(0, 3), "angioplasty": True, "imaging": "OCT"},
+        pci={"balloon": True, "IVL": False, "ROTA": rng.random() < 0.1},
+    )
+    db.commit()
+
+
+def view_patient(db, ctx):
+    db.get(PatientSummary, ctx.rng.randint(1, ctx.max_id))
+
+
+def timeline(db, ctx):
+    patient_timeline(db, ctx.rng.randint(1, ctx.max_id))
+
+
+def delete_patient(db, ctx):
+    if delete_patients(db, [ctx.deletable.pop()]):
+        db.commit()
+
+
+def full_data(db, ctx):
+    full_data_page(db, ctx.rng.randint(0, ctx.max_id), PAGE_SIZE)
+
+
+def search(db, ctx):
+    criteria = random_criteria(ctx.rng)
+    bitmap_index.count(db.get_bind(), criteria)
+    search_patients(db, criteria)
+
+
+def bulk_import(db, ctx):
+    import_rows(db.get_bind(), registry_rows(IMPORT_ROWS, ctx.rng.randrange(2**32)))
+
+
+def statistics(db, ctx):
+    stats.load(db)
+
+
+@dataclass
+class Scenario:
+    page: str
+    run: callable
+    max_ops: int = None  # for scenarios much slower than a page view
+
+
+SCENARIOS = {
+    "list": Scenario("Λίστα Ασθενών", list_patients),
+    # The four per-patient pages read the same patient_summary row.
+    "view": Scenario("Λίστα Ιατρικών Ιστορικών / Προβολή Βλαβών, Αγγείων, PCI", view_patient),
+    "timeline": Scenario("Χρονολόγιο Ασθενή", timeline),
+    "full_data": Scenario("Προβολή Όλων των Ασθενών (Πλήρη Δεδομένα)", full_data),
+    "search": Scenario("Αναζήτηση Ασθενών με Κριτήρια", search),
+    "stats": Scenario("Στατιστικά", statistics),
+    "add_patient": Scenario("Προσθήκη Ασθενή", add_patient),
+    "add_history": Scenario("Προσθήκη Ιατρικού Ιστορικού", _add_related(lambda pid, rng: MedicalHistory(
+        patient_id=pid, gender=rng.choice(["Male", "Female"]), hypertension=True, smoking=False,
+        diabetes="Type 2", hereditary=False, BMI=27.5, atrial_fibrillation=False))),
+    "add_lesion": Scenario("Προσθήκη Βλαβών Αγγείων", _add_related(
+        lambda pid, rng: Lesion(patient_id=pid, LAD=True, LCX=rng.random() < 0.5, RCA=False))),
+    "add_vessel": Scenario("Προσθήκη Αγγείων", _add_related(
+        lambda pid, rng: Vessel(patient_id=pid, num_vessels=rng.randint(0, 3), angioplasty=True, imaging="OCT"))),
+    "add_pci": Scenario("Προσθήκη PCI", _add_related(
+        lambda pid, rng: PCI(patient_id=pid, balloon=True, IVL=False, ROTA=rng.random() < 0.1))),
+    "encounter": Scenario("Νέα Επέμβαση", encounter),
+    "bulk_import": Scenario(f"Μαζική Εισαγωγή ({IMPORT_ROWS} γραμμές)", bulk_import, max_ops=20),
+    "delete": Scenario("Διαγραφή Ασθενή", delete_patient),
+}
+
+
+def _run(scenario, ctx, ops):
+    latencies = []
+    for _ in range(ops):
+        start = time.perf_counter()
+        with session_scope(ctx.url) as db:
+            scenario.run(db, ctx)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def measure(name, ctx, ops):
+    scenario = SCENARIOS[name]
+    ops = min(ops, scenario.max_ops or ops)
+    _run(scenario, ctx, 1)  # warm-up: first-use work such as building the bitmap index
+    latencies = _run(scenario, ctx, ops)
+    tracemalloc.start()
+    try:
+        _run(scenario, ctx, max(1, ops // 10))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "ops": ops,
+        "ops_per_s": ops / sum(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Μετρήσεις απόδοσης ανά επιλογή του μενού")
+    parser.add_argument("--patients", type=int, default=10000, help="synthetic patients in the temporary database")
+    parser.add_argument("--ops", type=int, default=200, help="operations per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", help="benchmark this database instead (it gets written to!)")
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS, metavar="SCENARIO")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results saved earlier with --save")
+    args = parser.parse_args(argv)
+
+    url = args.database or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'menu.db')}"
+    engine = get_engine(url)
+    if not args.database:
+        report = populate(engine, args.patients, args.seed)
+        print(f"{report['imported']} synthetic patients in {report['seconds']:.1f}s")
+    with engine.connect() as conn:
+        max_id = conn.scalar(select(func.max(Patient.patient_id))) or 0
+    rng = random.Random(args.seed)
+    deletable = rng.sample(range(1, max_id + 1), min(max_id, args.ops * 2))
+    ctx = Context(url, rng, max_id, deletable)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    print(f"{'scenario':<13} {'ops':>5} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak KiB':>9}  page")
+    for name in args.only or SCENARIOS:
+        r = results[name] = measure(name, ctx, args.ops)
+        change = ""
+        if name in baseline:
+            change = f"  p50 {(r['p50_ms'] / baseline[name]['p50_ms'] - 1) * 100:+.0f}%"
+        print(f"{name:<13} {r['ops']:>5} {r['ops_per_s']:>9.1f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{r['peak_kib']:>9.0f}  {SCENARIOS[name].page}{change}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"patients": max_id, "ops": args.ops, "seed": args.seed, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Check that the full-data loader issues a constant number of SQL statements.
+
+    python -m benchmarks.query_count
+
+Seeds in-memory databases of growing size, counts the statements executed by
+``load_full_data`` and compares its output with the old per-patient loop.
+"""
+import sys
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from cardiology.migrations import init_db
+from cardiology.models import Patient, MedicalHistory, Lesion, Vessel, PCI
+from cardiology.queries import load_full_data, full_data_row
+from benchmarks.synthetic import seed
+
+SIZES = (10, 100, 1000)
+
+
+class _Row:
+    """Attribute bag with the column names ``full_data_row`` expects."""
+
+    def __init__(self, p, h, l, v, pci):
+        self.patient_id, self.first_name, self.last_name = p.patient_id, p.first_name, p.last_name
+        self.age, self.medical_history = p.age, p.medical_history
+        self.history_id = h.history_id if h else None
+        for name in ("gender", "hypertension", "smoking", "diabetes", "hereditary", "atrial_fibrillation", "BMI"):
+            setattr(self, name, getattr(h, name) if h else None)
+        for name in ("LAD", "LCX", "RCA"):
+            setattr(self, name, getattr(l, name) if l else None)
+        self.vessel_id = v.vessel_id if v else None
+        for name in ("num_vessels", "angioplasty", "imaging"):
+            setattr(self, name, getattr(v, name) if v else None)
+        for name in ("balloon", "IVL", "ROTA"):
+            setattr(self, name, getattr(pci, name) if pci else None)
+
+
+def legacy_load_full_data(db):
+    rows = []
+    for p in db.query(Patient).all():
+        h = db.query(MedicalHistory).filter_by(patient_id=p.patient_id).first()
+        l = db.query(Lesion).filter_by(patient_id=p.patient_id).first()
+        v = db.query(Vessel).filter_by(patient_id=p.patient_id).first()
+        pci = db.query(PCI).filter_by(patient_id=p.patient_id).first()
+        rows.append(full_data_row(_Row(p, h, l, v, pci)))
+    return rows
+
+
+def count_statements(engine, fn):
+    count = 0
+
+    def _count(*args):
+        nonlocal count
+        count += 1
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    return count, elapsed, result
+
+
+def main():
+    counts = set()
+    for n in SIZES:
+        engine = create_engine("sqlite://")
+        init_db(engine)
+        db = sessionmaker(bind=engine)()
+        seed(db, n, seed=n)
+        # A second procedure for some patients must not change which row is shown.
+        db.add_all([Lesion(patient_id=pid, LAD=False, LCX=False, RCA=True) for pid in range(1, n + 1, 7)])
+        db.commit()
+
+        new_count, new_time, rows = count_statements(engine, lambda: load_full_data(db))
+        db.expire_all()
+        old_count, old_time, legacy = count_statements(engine, lambda: legacy_load_full_data(db))
+        if rows != legacy:
+            print(f"n={n}: joined loader output differs from the per-patient loop")
+            return 1
+        counts.add(new_count)
+        print(f"n={n:>5}  joined: {new_count} statement(s) {new_time * 1000:8.1f} ms   "
+              f"per-patient: {old_count} statements {old_time * 1000:8.1f} ms")
+
+    if len(counts) != 1:
+        print(f"statement count grows with the number of patients: {sorted(counts)}")
+        return 1
+    print("OK: statement count is independent of the number of patients")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
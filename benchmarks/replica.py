@@ -0,0 +1,123 @@
+"""Clinicians' inserts while the registry is read in full: primary against snapshot.
+
+    python -m benchmarks.replica [n_patients] [seconds] [writers] [readers]
+
+Fills a temporary database with synthetic patients, then for each routing
+lets writer threads record encounters (record_encounter, one commit each)
+while reader threads run the criteria search and stream the full export:
+
+- primary: the readers use the primary's engine, as before replica.py;
+- snapshot: the readers use ``Replica.current()``, refreshed every two
+  seconds with the backup API while the writers run.
+
+Reports writes/s with p50/p99 commit latency, reads/s, the size the WAL
+grew to (long readers on the primary keep checkpoints from resetting it),
+and for the snapshot the refreshes, their duration, the oldest snapshot a
+reader used and the reads that fell back to the primary.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from cardiology.db import get_engine, session_scope
+from cardiology.encounters import record_encounter
+from cardiology.export import iter_chunks
+from cardiology.queries import search_patients
+from cardiology.replica import Replica
+from benchmarks.api_load import percentile
+from benchmarks.synthetic import populate
+
+REFRESH_AFTER = 2.0
+MAX_STALENESS = 10.0
+
+ENCOUNTER = {
+    "patient": {"first_name": "Νέος", "last_name": "Ασθενής", "age": 64, "medical_history": ""},
+    "history": {"gender": "Male", "hypertension": True, "smoking": False, "diabetes": "Type 2",
+                "hereditary": False, "BMI": 27.5, "atrial_fibrillation": False},
+    "lesion": {"LAD": True, "LCX": False, "RCA": True},
+    "vessel": {"num_vessels": 2, "angioplasty": True, "imaging": "OCT"},
+    "pci": {"balloon": True, "IVL": False, "ROTA": False},
+}
+
+
+def run(url, path, seconds, writers, readers, replica=None):
+    primary = get_engine(url)
+    with primary.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")  # each run starts with an empty WAL
+    latencies, reads, ages = [], [0], []
+    lock = threading.Lock()
+    stop = threading.Event()
+    wal_peak = [0]
+
+    def writer():
+        while not stop.is_set():
+            start = time.perf_counter()
+            with session_scope(url) as db:
+                record_encounter(db, **ENCOUNTER)
+                db.commit()
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    def reader(n):
+        while not stop.is_set():
+            engine = replica.current() if replica else None
+            if engine is not None:
+                ages.append(replica.age())
+            engine = engine or primary
+            if n % 2:
+                sum(len(chunk) for chunk in iter_chunks(engine))
+            else:
+                with Session(bind=engine) as db:
+                    search_patients(db, {"hypertension": True, "LAD": True})
+            with lock:
+                reads[0] += 1
+
+    def watch_wal():
+        while not stop.is_set():
+            try:
+                wal_peak[0] = max(wal_peak[0], os.path.getsize(path + "-wal"))
+            except OSError:
+                pass
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads.append(threading.Thread(target=watch_wal))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, reads[0], ages, wal_peak[0]
+
+
+def main(n_patients=100000, seconds=20, writers=2, readers=2):
+    path = os.path.join(tempfile.mkdtemp(), "replica.db")
+    url = f"sqlite:///{path}"
+    populate(get_engine(url), n_patients)
+    print(f"{n_patients} patients, {writers} writer / {readers} reader threads, {seconds}s per routing")
+
+    replica = Replica(url, refresh_after=REFRESH_AFTER, max_staleness=MAX_STALENESS)
+    for name, routed in (("primary", None), ("snapshot", replica)):
+        if routed:
+            routed.refresh()  # the first snapshot, before the clock starts
+        latencies, reads, ages, wal = run(url, path, seconds, writers, readers, routed)
+        print(f"{name:>9}: {len(latencies) / seconds:7.1f} writes/s  p50 {percentile(latencies, 50) * 1000:6.2f} ms  "
+              f"p99 {percentile(latencies, 99) * 1000:7.2f} ms  {reads / seconds:5.2f} reads/s  "
+              f"WAL up to {wal / 2**20:6.1f} MiB")
+        if routed:
+            s = routed.stats()
+            print(f"{'':>9}  {s['refreshes']} refreshes (last {s['last_refresh_s']}s), "
+                  f"oldest snapshot read {max(ages, default=0):.1f}s, {s['fallbacks']} reads on the primary, "
+                  f"{s['failures']} failed refreshes")
+    replica.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
@@ -0,0 +1,108 @@
+"""Risk score: loading and scoring the whole registry, ranking, filtering and upkeep.
+
+    python -m benchmarks.risk [n_patients] [encounters]
+
+Bulk-imports a synthetic registry into a temporary database, then times:
+
+- build: risk_index.rebuild, split into the packed query (SQLite) and the
+  NumPy scoring of the packed inputs;
+- the same scores computed per patient in Python (score_row over the
+  summary rows, rows already fetched), for comparison;
+- ranked (the risk-sorted full-data view), its first page, and the
+  min-score filter over the largest cohort of the search page;
+- upkeep: ``encounters`` new patients recorded through ORM sessions, then
+  the incremental re-scoring before the next lookup.
+
+Finally every score is checked against score_row (RiskIndex.verify) and
+against a fresh build.
+"""
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from cardiology.bitmap import bitmap_index
+from cardiology.db import get_engine, session_scope
+from cardiology.encounters import record_encounter
+from cardiology.models import PatientSummary
+from cardiology.risk import RiskIndex, count_at_least, packed_sql, ranked_page, risk_index, score_packed, score_row
+from benchmarks.replica import ENCOUNTER
+from benchmarks.synthetic import populate
+
+
+def best(fn, rounds=5):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(n_patients=1000000, encounters=50):
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'risk.db')}"
+    engine = get_engine(url)
+    start = time.perf_counter()
+    populate(engine, n_patients)
+    print(f"{n_patients} patients (import {time.perf_counter() - start:.0f}s)")
+
+    seconds, _ = best(lambda: risk_index.rebuild(engine), rounds=3)
+    print(f"build: {seconds:.2f}s, {risk_index.stats()}")
+
+    raw = engine.raw_connection()
+    try:
+        start = time.perf_counter()
+        rows = raw.driver_connection.execute(packed_sql()).fetchall()
+        query = time.perf_counter() - start
+        start = time.perf_counter()
+        packed = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64, count=2 * len(rows))[1::2]
+        to_array = time.perf_counter() - start
+    finally:
+        raw.close()
+    scoring, _ = best(lambda: score_packed(packed))
+    print(f"  packed query {query:.2f}s, to array {to_array * 1000:.0f} ms, "
+          f"NumPy scoring {scoring * 1000:.1f} ms")
+
+    with Session(bind=engine) as db:
+        summaries = db.execute(select(PatientSummary)).scalars().all()
+        start = time.perf_counter()
+        [score_row(r) for r in summaries]
+        per_patient = time.perf_counter() - start
+        del summaries
+        print(f"per-patient Python scoring: {per_patient:.2f}s ({per_patient / scoring:.0f}x the NumPy scoring)")
+
+        risk_index._ranked = None
+        sorting, _ = best(lambda: (setattr(risk_index, "_ranked", None), risk_index.ranked(engine)))
+        page, _ = best(lambda: ranked_page(db, engine, 0, 51))
+        print(f"ranked: sort {sorting * 1000:.0f} ms, first page of the risk-sorted view {page * 1000:.1f} ms")
+
+    cohort = bitmap_index.patient_ids(engine, {})
+    filtering, matching = best(lambda: count_at_least(engine, cohort, 15))
+    print(f"min-score filter over {len(cohort)} patients: {filtering * 1000:.1f} ms ({matching} score 15 or more)")
+
+    for _ in range(encounters):
+        with session_scope(url) as db:
+            record_encounter(db, **ENCOUNTER)
+            db.commit()
+    pending = risk_index.stats()["pending"]
+    start = time.perf_counter()
+    risk_index.sync(engine)
+    print(f"incremental refresh of {pending} patients: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    differing = risk_index.verify(engine)
+    fresh = RiskIndex()
+    fresh.rebuild(engine)
+    same = np.array_equal(fresh.scores, risk_index.scores)
+    print(f"verify ({time.perf_counter() - start:.0f}s): {len(differing)} scores differ from score_row, "
+          f"identical to a fresh build: {same}")
+    return 0 if not differing and same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
@@ -0,0 +1,91 @@
+"""Compare the SQL criteria search with the old in-Python filtering.
+
+    python -m benchmarks.search [n_patients]
+
+Runs random criteria combinations against both implementations, checks
+that they return the same rows and reports the time each one takes.
+"""
+import random
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from cardiology.migrations import init_db
+from cardiology.models import Patient, MedicalHistory, Lesion, Vessel, PCI
+from cardiology.queries import SEARCH_FLAGS, search_patients, yes_no
+from benchmarks.synthetic import seed
+
+
+def legacy_search(db, c):
+    results = []
+    for p in db.query(Patient).all():
+        h = db.query(MedicalHistory).filter_by(patient_id=p.patient_id).first()
+        l = db.query(Lesion).filter_by(patient_id=p.patient_id).first()
+        v = db.query(Vessel).filter_by(patient_id=p.patient_id).first()
+        pci = db.query(PCI).filter_by(patient_id=p.patient_id).first()
+        rows = {"h": h, "l": l, "v": v, "pci": pci}
+        owner = {"hypertension": "h", "smoking": "h", "atrial_fibrillation": "h", "LAD": "l", "LCX": "l",
+                 "RCA": "l", "balloon": "pci", "IVL": "pci", "ROTA": "pci", "angioplasty": "v"}
+        match = not (c.get("age") and p.age != c["age"])
+        if c.get("gender") and (not h or h.gender != c["gender"]):
+            match = False
+        if c.get("diabetes") and (not h or h.diabetes != c["diabetes"]):
+            match = False
+        if c.get("imaging") and (not v or v.imaging != c["imaging"]):
+            match = False
+        if c.get("min_vessels") and (not v or v.num_vessels < c["min_vessels"]):
+            match = False
+        for name, table in owner.items():
+            if c.get(name) and (not rows[table] or not getattr(rows[table], name)):
+                match = False
+        if match:
+            results.append({
+                "ID": p.patient_id, "Όνομα": p.first_name, "Επώνυμο": p.last_name, "Ηλικία": p.age,
+                "Φύλο": h.gender if h else "", "Διαβήτης": h.diabetes if h else "",
+                "Αρ. Αγγείων": v.num_vessels if v else "", "Balloon": yes_no(pci and pci.balloon),
+            })
+    return results
+
+
+def random_criteria(rng):
+    criteria = {name: True for name in rng.sample(sorted(SEARCH_FLAGS), rng.randint(0, 3))}
+    if rng.random() < 0.3:
+        criteria["gender"] = rng.choice(["Male", "Female"])
+    if rng.random() < 0.3:
+        criteria["diabetes"] = rng.choice(["Type 1", "Type 2"])
+    if rng.random() < 0.2:
+        criteria["imaging"] = rng.choice(["NONE", "OCT", "IVUS"])
+    if rng.random() < 0.2:
+        criteria["min_vessels"] = rng.randint(1, 3)
+    if rng.random() < 0.1:
+        criteria["age"] = rng.randint(30, 95)
+    return criteria
+
+
+def main(n_patients=2000, rounds=20):
+    engine = create_engine("sqlite://")
+    init_db(engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, n_patients)
+    rng = random.Random(1)
+    sql_time = legacy_time = 0.0
+    for _ in range(rounds):
+        criteria = random_criteria(rng)
+        start = time.perf_counter()
+        rows = search_patients(db, criteria)
+        sql_time += time.perf_counter() - start
+        start = time.perf_counter()
+        expected = legacy_search(db, criteria)
+        legacy_time += time.perf_counter() - start
+        if rows != expected:
+            print(f"mismatch for {criteria}: {len(rows)} vs {len(expected)} rows")
+            return 1
+    print(f"{rounds} searches over {n_patients} patients: "
+          f"SQL {sql_time / rounds * 1000:.1f} ms/search, Python {legacy_time / rounds * 1000:.1f} ms/search")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
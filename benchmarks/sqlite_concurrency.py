@@ -0,0 +1,86 @@
+"""Concurrent reader/writer stress test for the SQLite pragma profiles.
+
+    python -m benchmarks.sqlite_concurrency [n_patients] [seconds] [writers] [readers]
+
+For each profile in PRAGMA_PROFILES, seeds a fresh database file, then lets
+writer threads insert patients (with their medical history) while reader
+threads run the criteria search, and reports throughput and lock errors.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from cardiology.db import PRAGMA_PROFILES, make_engine
+from cardiology.migrations import init_db
+from cardiology.models import Patient, MedicalHistory
+from cardiology.queries import search_patients
+from benchmarks.synthetic import seed
+
+
+def run_profile(profile, n_patients, seconds, writers, readers):
+    path = os.path.join(tempfile.mkdtemp(), "stress.db")
+    engine = make_engine(f"sqlite:///{path}", profile)
+    init_db(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        seed(db, n_patients)
+
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer():
+        while not stop.is_set():
+            try:
+                with Session() as db:
+                    patient = Patient(first_name="Stress", last_name="Test", age=60, medical_history="")
+                    db.add(patient)
+                    db.flush()
+                    db.add(MedicalHistory(patient_id=patient.patient_id, gender="Male", hypertension=True,
+                                          smoking=False, diabetes="None", hereditary=False, BMI=25.0,
+                                          atrial_fibrillation=False))
+                    db.commit()
+                bump("writes")
+            except OperationalError:
+                bump("locked")
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with Session() as db:
+                    search_patients(db, {"hypertension": True, "LAD": True})
+                bump("reads")
+            except OperationalError:
+                bump("locked")
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    return {key: value / seconds for key, value in counts.items()}
+
+
+def main(n_patients=5000, seconds=10, writers=4, readers=4):
+    print(f"{n_patients} patients, {writers} writer / {readers} reader threads, {seconds}s per profile")
+    for profile in PRAGMA_PROFILES:
+        r = run_profile(profile, n_patients, seconds, writers, readers)
+        print(f"{profile:>10}: {r['writes']:8.1f} writes/s {r['reads']:8.1f} reads/s "
+              f"{r['locked']:6.1f} 'database is locked' errors/s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,96 @@
+"""Statistics counters: dashboard load time, trigger overhead and drift.
+
+    python -m benchmarks.stats [n_patients]
+
+Bulk-imports the same synthetic registry with and without the counter
+triggers, times the dashboard (counter rows only) against a full recount,
+then applies random inserts and deletes through ORM sessions, including
+second rows and deleted first rows, and checks the counters against a
+recount.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+from cardiology import stats
+from cardiology.bulk_import import import_rows, read_file
+from cardiology.db import get_engine, session_scope
+from cardiology.models import Base, Patient, MedicalHistory, Lesion, Vessel, PCI
+from cardiology.queries import RELATED_MODELS
+from benchmarks import bulk_import
+
+
+def import_time(engine, csv_path):
+    return import_rows(engine, read_file(csv_path))["seconds"]
+
+
+def main(n_patients=100000):
+    tmp = tempfile.mkdtemp()
+    csv_path = os.path.join(tmp, "registry.csv")
+    bulk_import.write_csv(csv_path, n_patients)
+
+    plain = create_engine(f"sqlite:///{os.path.join(tmp, 'plain.db')}")
+    Base.metadata.create_all(plain)  # no migrations: no triggers
+    url = f"sqlite:///{os.path.join(tmp, 'stats.db')}"
+    engine = get_engine(url)
+    without, with_triggers = import_time(plain, csv_path), import_time(engine, csv_path)
+    print(f"bulk import of {n_patients}: {without:.1f}s without triggers, {with_triggers:.1f}s with "
+          f"({n_patients / without:.0f} vs {n_patients / with_triggers:.0f} patients/s)")
+
+    with session_scope(url) as db:
+        start = time.perf_counter()
+        for _ in range(20):
+            stats.load(db)
+        dashboard = (time.perf_counter() - start) / 20
+    with engine.connect() as conn:
+        start = time.perf_counter()
+        conn.exec_driver_sql(stats._recount_sql()).fetchall()
+        recount = time.perf_counter() - start
+    print(f"dashboard load {dashboard * 1000:.2f} ms (counters) vs full recount {recount * 1000:.0f} ms")
+
+    rng = random.Random(3)
+    with session_scope(url) as db:
+        start = time.perf_counter()
+        for i in range(500):
+            op = rng.random()
+            pid = rng.randint(1, n_patients)
+            if op < 0.3:
+                p = Patient(first_name="Νέος", last_name="Ασθενής", age=rng.randint(30, 95), medical_history="")
+                db.add(p)
+                db.flush()
+                db.add(MedicalHistory(patient_id=p.patient_id, gender="Male", diabetes=rng.choice(["Type 1", "Type 2"]),
+                                      BMI=rng.uniform(18, 40), hypertension=True, smoking=False, hereditary=False,
+                                      atrial_fibrillation=rng.random() < 0.5))
+                db.add(Vessel(patient_id=p.patient_id, num_vessels=2, angioplasty=True, imaging="IVUS"))
+            elif op < 0.5:
+                # Later rows are ignored until the first one is deleted.
+                db.add(Lesion(patient_id=pid, LAD=False, LCX=True, RCA=True))
+                db.add(PCI(patient_id=pid, balloon=False, IVL=True, ROTA=True))
+            elif op < 0.7:
+                for model in (Lesion, PCI):
+                    first = db.query(model).filter_by(patient_id=pid).order_by(model.__mapper__.primary_key[0]).first()
+                    if first:
+                        db.delete(first)
+            else:
+                patient = db.get(Patient, pid)
+                if patient:
+                    for model in RELATED_MODELS:
+                        db.query(model).filter_by(patient_id=pid).delete()
+                    db.delete(patient)
+            db.commit()
+        writes = time.perf_counter() - start
+
+    with engine.connect() as conn:
+        drift = stats.verify(conn)
+    print(f"500 random write transactions in {writes:.2f}s; counters drifted: {len(drift)}")
+    for row in drift[:10]:
+        print("  ", row)
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
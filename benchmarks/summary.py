@@ -0,0 +1,144 @@
+"""patient_summary: reads against the per-table joins, and trigger upkeep.
+
+    python -m benchmarks.summary [n_patients] [rounds]
+
+Bulk-imports a synthetic registry into a temporary database, then times
+the per-patient pages (one query per related table vs one summary row), a
+full-data page and a search (summary vs the correlated joins), applies
+random inserts, second rows, first-row deletes and patient deletes through
+ORM sessions and checks the summary against the five tables.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from cardiology import summary
+from cardiology.bulk_import import import_rows, read_file
+from cardiology.db import get_engine, session_scope
+from cardiology.models import Patient, PatientSummary, MedicalHistory, Lesion, Vessel, PCI
+from cardiology.queries import (
+    FULL_DATA_SELECT, RELATED_MODELS, SEARCH_EQUALS, SEARCH_FLAGS, SEARCH_SELECT, full_data_page_query,
+    joined_select, search_query,
+)
+from benchmarks import bulk_import
+from benchmarks.search import random_criteria
+
+PAGE_SIZE = 50
+# The five-table column behind each patient_summary column.
+SOURCE = {c.name: c for c in summary.SOURCE_COLUMNS}
+
+
+def joined(columns):
+    return joined_select(*(SOURCE[c.key] for c in columns)).order_by(Patient.patient_id)
+
+
+def joined_search(criteria):
+    """search_query(criteria) as it was before patient_summary."""
+    stmt = joined(SEARCH_SELECT)
+    for name, column in SEARCH_EQUALS.items():
+        if criteria.get(name):
+            stmt = stmt.where(SOURCE[column.key] == criteria[name])
+    for name, column in SEARCH_FLAGS.items():
+        if criteria.get(name):
+            stmt = stmt.where(SOURCE[column.key])
+    if criteria.get("min_vessels"):
+        stmt = stmt.where(Vessel.num_vessels >= criteria["min_vessels"])
+    return stmt
+
+
+def timed(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    return (time.perf_counter() - start) / rounds, result
+
+
+def main(n_patients=100000, rounds=200):
+    tmp = tempfile.mkdtemp()
+    url = f"sqlite:///{os.path.join(tmp, 'summary.db')}"
+    csv_path = os.path.join(tmp, "registry.csv")
+    bulk_import.write_csv(csv_path, n_patients)
+    engine = get_engine(url)
+    report = import_rows(engine, read_file(csv_path))
+    print(f"bulk import of {n_patients}: {report['seconds']:.1f}s ({n_patients / report['seconds']:.0f} patients/s)")
+
+    rng = random.Random(4)
+    with session_scope(url) as db:
+        ids = [rng.randint(1, n_patients) for _ in range(rounds)]
+        it = iter(ids)
+        per_table, _ = timed(lambda: (lambda pid: [db.query(m).filter_by(patient_id=pid).first()
+                                                   for m in RELATED_MODELS])(next(it)), rounds)
+        it = iter(ids)
+        one_row, _ = timed(lambda: db.get(PatientSummary, next(it)), rounds)
+    print(f"per-patient page: {per_table * 1e6:.0f} µs (4 table queries) vs {one_row * 1e6:.0f} µs (summary row)")
+
+    def legacy_page():
+        return joined(FULL_DATA_SELECT).where(Patient.patient_id > n_patients // 2).limit(PAGE_SIZE)
+
+    criteria = [random_criteria(rng) for _ in range(20)]
+    with engine.connect() as conn:
+        conn.execute(legacy_page()).all()  # warm the page cache
+        joins, expected = timed(lambda: conn.execute(legacy_page()).all(), 20)
+        table, rows = timed(lambda: conn.execute(full_data_page_query(n_patients // 2, PAGE_SIZE)).all(), 20)
+        same_page = [tuple(r) for r in rows] == [tuple(r) for r in expected]
+        print(f"full-data page: {joins * 1000:.2f} ms (joins) vs {table * 1000:.2f} ms (summary), same rows: {same_page}")
+
+        mismatches = 0
+        legacy_time = summary_time = 0.0
+        for c in criteria:
+            legacy = joined_search(c)
+            start = time.perf_counter()
+            expected = [r.patient_id for r in conn.execute(legacy)]
+            legacy_time += time.perf_counter() - start
+            start = time.perf_counter()
+            got = [r.patient_id for r in conn.execute(search_query(c))]
+            summary_time += time.perf_counter() - start
+            mismatches += got != expected
+        print(f"search: {legacy_time / len(criteria) * 1000:.1f} ms (joins) vs "
+              f"{summary_time / len(criteria) * 1000:.1f} ms (summary), mismatches: {mismatches}")
+
+    with session_scope(url) as db:
+        start = time.perf_counter()
+        for _ in range(500):
+            op = rng.random()
+            pid = rng.randint(1, n_patients)
+            if op < 0.3:
+                p = Patient(first_name="Νέος", last_name="Ασθενής", age=rng.randint(30, 95), medical_history="")
+                db.add(p)
+                db.flush()
+                db.add(MedicalHistory(patient_id=p.patient_id, gender="Male", diabetes="Type 2", BMI=rng.uniform(18, 40),
+                                      hypertension=True, smoking=False, hereditary=False, atrial_fibrillation=True))
+                db.add(Vessel(patient_id=p.patient_id, num_vessels=2, angioplasty=True, imaging="IVUS"))
+            elif op < 0.5:
+                # Later rows are ignored until the first one is deleted.
+                db.add(Lesion(patient_id=pid, LAD=False, LCX=True, RCA=True))
+                db.add(PCI(patient_id=pid, balloon=False, IVL=True, ROTA=True))
+            elif op < 0.6:
+                patient = db.get(Patient, pid)
+                if patient:
+                    patient.age = rng.randint(30, 95)
+                    patient.last_name = "Αλλαγμένο"
+            elif op < 0.8:
+                for model in (Lesion, PCI):
+                    first = db.query(model).filter_by(patient_id=pid).order_by(model.__mapper__.primary_key[0]).first()
+                    if first:
+                        db.delete(first)
+            else:
+                patient = db.get(Patient, pid)
+                if patient:
+                    for model in RELATED_MODELS:
+                        db.query(model).filter_by(patient_id=pid).delete()
+                    db.delete(patient)
+            db.commit()
+        writes = time.perf_counter() - start
+
+    with engine.connect() as conn:
+        differing = summary.verify(conn)
+    print(f"500 random write transactions in {writes:.2f}s; summary rows differing: {differing}")
+    return 1 if differing or not same_page or mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
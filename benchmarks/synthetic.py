@@ -0,0 +1,147 @@
+"""Seedable synthetic registry data for the benchmark scripts.
+
+``seed(db, n)`` adds a few patients through an ORM session.  ``registry_rows``
+generates any number of realistic patients (age-dependent risk factors,
+num_vessels equal to the number of diseased vessels, PCI only after
+angioplasty, free-text histories) in the bulk-import row format, so
+``populate`` fills a database through the set-based importer:
+
+    python -m benchmarks.synthetic 100000 [--seed 0] [--database sqlite:///./database.db]
+"""
+import random
+
+from cardiology.bulk_import import import_rows
+from cardiology.models import Patient, MedicalHistory, Lesion, Vessel, PCI
+
+FIRST_NAMES = ["Γιώργος", "Μαρία", "Νίκος", "Ελένη", "Δημήτρης", "Αικατερίνη", "Κώστας", "Σοφία"]
+LAST_NAMES = ["Παπαδόπουλος", "Ιωάννου", "Νικολάου", "Γεωργίου", "Οικονόμου", "Δημητρίου"]
+MORE_FIRST_NAMES = FIRST_NAMES + [
+    "Ιωάννης", "Βασίλειος", "Αθανάσιος", "Χρήστος", "Παναγιώτης", "Ευάγγελος", "Σπύρος", "Αντώνης",
+    "Άννα", "Δέσποινα", "Ευτυχία", "Χαρίκλεια", "Βασιλική", "Γεωργία", "Ζωή", "Ειρήνη",
+]
+MORE_LAST_NAMES = LAST_NAMES + [
+    "Παπανικολάου", "Κωνσταντίνου", "Αθανασίου", "Βασιλείου", "Χριστοδούλου", "Μακρής", "Καραγιάννης",
+    "Σταυρόπουλος", "Αλεξίου", "Ζαχαρίου", "Μιχαηλίδης", "Πετρόπουλος", "Λαμπράκης", "Τσιμπούκης",
+]
+HISTORY_NOTES = [
+    "Σταθερή στηθάγχη", "Ασταθής στηθάγχη", "Έμφραγμα μυοκαρδίου", "Καρδιακή ανεπάρκεια",
+    "Χρόνια νεφρική νόσος", "ΧΑΠ", "Δυσλιπιδαιμία", "Αγγειακό εγκεφαλικό επεισόδιο",
+    "Περιφερική αρτηριοπάθεια", "Προηγούμενη αορτοστεφανιαία παράκαμψη", "Υποθυρεοειδισμός",
+]
+
+
+def _yes_no(flag):
+    return "ΝΑΙ" if flag else "ΟΧΙ"
+
+
+def registry_rows(n_patients, seed=0):
+    """Yield ``(line_number, row)`` pairs for ``import_rows``, reproducibly for a given seed."""
+    rng = random.Random(seed)
+    empty = dict.fromkeys(("Φύλο", "Διαβήτης", "BMI", "Αρ. Αγγείων", "Απεικόνιση"), "")
+    for line in range(2, n_patients + 2):
+        age = min(max(round(rng.gauss(66, 11)), 30), 95)
+        older = (age - 30) / 65  # 0 at 30, 1 at 95
+        notes = rng.sample(HISTORY_NOTES, rng.choice((0, 0, 1, 1, 2)))
+        row = {
+            **empty,
+            "Όνομα": rng.choice(MORE_FIRST_NAMES),
+            "Επώνυμο": rng.choice(MORE_LAST_NAMES),
+            "Ηλικία": str(age),
+            "Ιστορικό": ", ".join(notes),
+        }
+        if rng.random() < 0.92:
+            row.update({
+                "Φύλο": "Male" if rng.random() < 0.68 else "Female",
+                "Υπέρταση": _yes_no(rng.random() < 0.35 + 0.4 * older),
+                "Κάπνισμα": _yes_no(rng.random() < 0.45 - 0.25 * older),
+                "Διαβήτης": rng.choices(["None", "Type 2", "Type 1"], [70, 26, 4])[0],
+                "Κληρονομικότητα": _yes_no(rng.random() < 0.25),
+                "BMI": f"{min(max(rng.gauss(27.8, 4.4), 16.0), 48.0):.1f}",
+                "Κολπική Μαρμαρυγή": _yes_no(rng.random() < 0.02 + 0.15 * older),
+            })
+        if rng.random() < 0.85:
+            lesions = [rng.random() < p for p in (0.62, 0.36, 0.45)]
+            row.update(zip(("LAD", "LCX", "RCA"), map(_yes_no, lesions)))
+            angioplasty = any(lesions) and rng.random() < 0.7
+            row.update({
+                "Αρ. Αγγείων": str(sum(lesions)),
+                "Αγγειοπλαστική": _yes_no(angioplasty),
+                "Απεικόνιση": rng.choices(["NONE", "IVUS", "OCT"], [60, 25, 15])[0],
+            })
+            if angioplasty:
+                row.update({
+                    "Balloon": _yes_no(rng.random() < 0.75),
+                    "IVL": _yes_no(rng.random() < 0.08),
+                    "ROTA": _yes_no(rng.random() < 0.04),
+                })
+        yield line, row
+
+
+def populate(engine, n_patients, seed=0, progress=None):
+    """Bulk-import ``n_patients`` synthetic patients; returns the import report."""
+    return import_rows(engine, registry_rows(n_patients, seed), progress=progress)
+
+
+def seed(db, n_patients, seed=0):
+    """Add ``n_patients`` patients, most of them with one row in every related table."""
+    rng = random.Random(seed)
+    patients = [
+        Patient(
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            age=rng.randint(30, 95),
+            medical_history="",
+        )
+        for _ in range(n_patients)
+    ]
+    db.add_all(patients)
+    db.flush()
+    for p in patients:
+        if rng.random() < 0.9:
+            db.add(MedicalHistory(
+                patient_id=p.patient_id,
+                gender=rng.choice(["Male", "Female"]),
+                hypertension=rng.random() < 0.5,
+                smoking=rng.random() < 0.3,
+                diabetes=rng.choice(["None", "Type 1", "Type 2"]),
+                hereditary=rng.random() < 0.2,
+                BMI=round(rng.uniform(18, 40), 1),
+                atrial_fibrillation=rng.random() < 0.1,
+            ))
+        if rng.random() < 0.8:
+            db.add(Lesion(patient_id=p.patient_id, LAD=rng.random() < 0.5,
+                          LCX=rng.random() < 0.3, RCA=rng.random() < 0.4))
+        if rng.random() < 0.8:
+            db.add(Vessel(patient_id=p.patient_id, num_vessels=rng.randint(0, 3),
+                          angioplasty=rng.random() < 0.6, imaging=rng.choice(["NONE", "OCT", "IVUS"])))
+        if rng.random() < 0.7:
+            db.add(PCI(patient_id=p.patient_id, balloon=rng.random() < 0.6,
+                       IVL=rng.random() < 0.1, ROTA=rng.random() < 0.05))
+    db.commit()
+    return patients
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    from cardiology.db import DATABASE_URL, get_engine
+
+    parser = argparse.ArgumentParser(description="Συνθετικοί ασθενείς για μετρήσεις απόδοσης")
+    parser.add_argument("patients", type=int, help="number of patients to add (e.g. 1000 to 1000000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", default=DATABASE_URL)
+    args = parser.parse_args(argv)
+
+    def progress(imported, rejected):
+        print(f"\r{imported}/{args.patients}", end="", file=sys.stderr, flush=True)
+
+    report = populate(get_engine(args.database), args.patients, args.seed, progress)
+    print(file=sys.stderr)
+    print(f"{report['imported']} patients added to {args.database} in {report['seconds']:.1f}s "
+          f"({report['imported'] / report['seconds']:,.0f}/s)")
+    return 1 if report["rejected"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+"""Latest record per patient and the patient timeline, with millions of rows.
+
+    python -m benchmarks.timeline [n_patients] [pci_per_patient] [repeats]
+
+Fills a temporary database with synthetic patients (benchmarks.synthetic)
+and then adds ``pci_per_patient`` times as many PCI rows as patients to the
+patients that have one, recorded at random times over ten years and
+inserted in random order.  Times:
+
+- every patient's latest PCI: ``latest_query`` against ranking all rows
+  with ``row_number() OVER (PARTITION BY patient_id ...)``, and checks that
+  both pick the same rows;
+- one page of "Τελευταία εγγραφή ανά ασθενή" against a ``.first()``-style
+  lookup per patient of the page;
+- the timeline of random patients.
+
+The extra rows come after their patient's first row, so patient_summary and
+the statistics counters stay valid; both are verified at the end.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+from cardiology import stats, summary
+from cardiology.db import get_engine, session_scope
+from cardiology.models import PCI, Patient
+from cardiology.queries import latest_page, latest_query, patient_timeline
+from benchmarks.api_load import percentile
+from benchmarks.synthetic import populate
+
+PAGE_SIZE = 50
+
+
+def add_procedures(engine, n_patients, per_patient, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2015, 1, 1)
+    with engine.begin() as conn, stats.suspended(conn):
+        # Only patients that already have a PCI row, so their first row stays the same.
+        patients = conn.scalars(select(PCI.patient_id).distinct()).all()
+        rows = [
+            (rng.choice(patients), rng.random() < 0.6, rng.random() < 0.1, rng.random() < 0.05,
+             (start + timedelta(minutes=rng.randrange(10 * 365 * 24 * 60))).isoformat(" "))
+            for _ in range(n_patients * per_patient)
+        ]
+        conn.exec_driver_sql("INSERT INTO pci (patient_id, balloon, IVL, ROTA, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                             rows)
+    return len(rows)
+
+
+def window_latest():
+    ranked = select(
+        PCI,
+        func.row_number().over(partition_by=PCI.patient_id, order_by=(PCI.recorded_at.desc(), PCI.pci_id.desc()))
+        .label("position"),
+    ).subquery()
+    latest = aliased(PCI, ranked)
+    return select(latest.pci_id).where(ranked.c.position == 1).order_by(latest.patient_id)
+
+
+def lookup_page(db, after_id, limit):
+    # The old way: the page's patients, then one query per patient.
+    rows = []
+    for patient in db.scalars(select(Patient).where(Patient.patient_id > after_id).order_by(Patient.patient_id)
+                              .limit(limit)):
+        pci = db.scalars(select(PCI).where(PCI.patient_id == patient.patient_id)
+                         .order_by(PCI.recorded_at.desc(), PCI.pci_id.desc()).limit(1)).first()
+        if pci is not None:
+            rows.append(pci)
+    return rows
+
+
+def timed(run, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main(n_patients=200000, per_patient=10, repeats=50):
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'timeline.db')}"
+    engine = get_engine(url)
+    populate(engine, n_patients)
+    start = time.perf_counter()
+    added = add_procedures(engine, n_patients, per_patient)
+    with engine.connect() as conn:
+        total = conn.scalar(select(func.count()).select_from(PCI))
+    print(f"{n_patients} patients, {total} PCI rows ({added} added in {time.perf_counter() - start:.1f}s)")
+
+    rng = random.Random(1)
+    with session_scope(url) as db:
+        start = time.perf_counter()
+        ours = [r.pci_id for r in db.scalars(latest_query(PCI))]
+        indexed = time.perf_counter() - start
+        start = time.perf_counter()
+        window = db.scalars(window_latest()).all()
+        ranked = time.perf_counter() - start
+        print(f"latest PCI of every patient ({len(ours)} rows): latest_query {indexed:.2f}s, "
+              f"row_number() window {ranked:.2f}s, same rows: {ours == window}")
+
+        pages = [rng.randint(0, n_patients - PAGE_SIZE) for _ in range(repeats)]
+        page = timed(lambda: latest_page(db, PCI, pages.pop(), PAGE_SIZE + 1), repeats)
+        pages = [rng.randint(0, n_patients - PAGE_SIZE) for _ in range(repeats)]
+        lookups = timed(lambda: lookup_page(db, pages.pop(), PAGE_SIZE + 1), repeats)
+        print(f"page of {PAGE_SIZE} patients: latest_page p50 {percentile(page, 50) * 1000:.2f} ms "
+              f"(p99 {percentile(page, 99) * 1000:.2f}), lookup per patient p50 {percentile(lookups, 50) * 1000:.2f} ms")
+
+        patients = [rng.randint(1, n_patients) for _ in range(repeats)]
+        timeline = timed(lambda: patient_timeline(db, patients.pop()), repeats)
+        print(f"patient timeline: p50 {percentile(timeline, 50) * 1000:.2f} ms, "
+              f"p99 {percentile(timeline, 99) * 1000:.2f} ms")
+
+    with engine.connect() as conn:
+        drift, differing = stats.verify(conn), summary.verify(conn)
+    print(f"counter drift {len(drift)}, summary rows differing {len(differing)}")
+    return 0 if ours == window and not drift and not differing else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
@@ -0,0 +1,68 @@
+"""Payload size and client decode time: JSON vs the Arrow wire format.
+
+    python -m benchmarks.wire_format [n_patients]
+
+Calls /all_data/ (one page of MAX_PAGE_SIZE rows) and /search_patients/ (a
+broad search) in-process on a seeded temporary database, in both formats.
+Both formats carry the same rows; the JSON decode time is ``json.loads``,
+the Arrow decode time is ``decode_arrow`` to a DataFrame.  Gzip sizes are
+what the API's GZipMiddleware sends for JSON.
+"""
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n_patients=20000):
+    tmp = tempfile.mkdtemp()
+    # cardiology.db reads the URL at import time, so set it before importing anything.
+    os.environ["CARDIOLOGY_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'wire.db')}"
+    from fastapi.testclient import TestClient
+
+    from benchmarks import bulk_import
+    from cardiology.api import app
+    from cardiology.bulk_import import import_rows, read_file
+    from cardiology.db import DATABASE_URL, get_engine
+    from cardiology.queries import MAX_PAGE_SIZE
+    from cardiology.wire import decode_arrow
+
+    csv_path = os.path.join(tmp, "registry.csv")
+    bulk_import.write_csv(csv_path, n_patients)
+    import_rows(get_engine(DATABASE_URL), read_file(csv_path))
+    cases = [
+        ("/all_data/", {"limit": MAX_PAGE_SIZE}),
+        ("/search_patients/", {"LAD": True}),
+    ]
+    with TestClient(app) as client:
+        identity = {"Accept-Encoding": "identity"}
+        for path, params in cases:
+            as_json = client.get(path, params=params, headers=identity).content
+            as_arrow = client.get(path, params=dict(params, format="arrow"), headers=identity).content
+            json_rows = json.loads(as_json)
+            table = decode_arrow(as_arrow)
+            assert len(table) == len(json_rows)
+            assert table["ID"].tolist() == [r["ID"] for r in json_rows]
+
+            json_time = best_of(lambda: json.loads(as_json))
+            arrow_time = best_of(lambda: decode_arrow(as_arrow))
+            print(f"{path} ({len(json_rows)} rows)")
+            print(f"  json   {len(as_json) / 1024:9.1f} KiB  gzip {len(gzip.compress(as_json)) / 1024:8.1f} KiB  "
+                  f"decode {json_time * 1000:7.2f} ms")
+            print(f"  arrow  {len(as_arrow) / 1024:9.1f} KiB  (zstd)               "
+                  f"decode {arrow_time * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1 @@
+"""Data-access layer shared by the Cardiology Streamlit apps."""
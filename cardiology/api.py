@@ -0,0 +1,352 @@
+"""Async HTTP backend for app_standalone_full.py.
+
+Implements the routes the standalone app calls on ``API_URL`` over the same
+models and queries as the direct-database app, using SQLAlchemy's asyncio
+engine on aiosqlite with a connection pool, so many Streamlit front-ends can
+share one backend process.
+
+    uvicorn cardiology.api:app --host 127.0.0.1 --port 8000
+"""
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from . import fulltext, stats
+from .db import DATABASE_URL, PRAGMA_PROFILE, PRAGMA_PROFILES, apply_pragmas, get_engine
+from .deletes import delete_patients, existing_ids, parse_ids
+from .encounters import missing_patient, record_encounter
+from .models import Patient, MedicalHistory, Lesion, Vessel, PCI
+from .queries import (
+    DEFAULT_PAGE_SIZE, FULL_DATA_COLUMNS, MAX_PAGE_SIZE, SEARCH_COLUMNS,
+    RELATED_MODELS, full_data_page_query, full_data_row, latest_page, patient_timeline,
+    patients_page_query,
+)
+from .replica import get_replica
+from .risk import RISK_COLUMN, ranked_page, risk_index, search_at_least, with_scores
+from .wire import ARROW_MEDIA_TYPE, encode_arrow
+
+POOL_SIZE = 10
+
+
+def async_url(url):
+    return url.replace("sqlite://", "sqlite+aiosqlite://", 1) if url.startswith("sqlite://") else url
+
+
+engine = create_async_engine(async_url(DATABASE_URL), pool_size=POOL_SIZE, max_overflow=2 * POOL_SIZE)
+apply_pragmas(engine.sync_engine, PRAGMA_PROFILES[PRAGMA_PROFILE])
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    get_engine(DATABASE_URL)  # create tables / run migrations once, synchronously
+    yield
+    await engine.dispose()
+    for sessionmaker in _snapshot_sessions.values():
+        await sessionmaker.kw["bind"].dispose()
+    get_replica(DATABASE_URL).close()  # uvicorn exits on the signal, skipping atexit
+
+
+app = FastAPI(title="Cardiology API", lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Full data and search read the snapshot (see replica.py) when it is fresh
+# enough: one async engine per snapshot, disposed when the next one arrives.
+_snapshot_sessions = {}
+
+
+async def get_read_db():
+    snapshot = get_replica(DATABASE_URL).current()
+    if snapshot is None:
+        sessionmaker = AsyncSessionLocal
+    elif snapshot in _snapshot_sessions:
+        sessionmaker = _snapshot_sessions[snapshot]
+    else:
+        old = [_snapshot_sessions.pop(key) for key in list(_snapshot_sessions)]
+        read_engine = create_async_engine(snapshot.url.set(drivername="sqlite+aiosqlite"),
+                                          pool_size=POOL_SIZE, max_overflow=2 * POOL_SIZE)
+        apply_pragmas(read_engine.sync_engine, get_replica(DATABASE_URL).pragmas)
+        sessionmaker = _snapshot_sessions[snapshot] = async_sessionmaker(read_engine, expire_on_commit=False)
+        for replaced in old:
+            await replaced.kw["bind"].dispose()
+    async with sessionmaker() as db:
+        yield db
+
+
+def as_dict(obj):
+    if obj is None:
+        return {}
+    return {c.key: getattr(obj, c.key) for c in obj.__table__.columns}
+
+
+# === Request bodies ===
+class PatientIn(BaseModel):
+    first_name: str
+    last_name: str
+    age: int
+    medical_history: str = ""
+
+
+class MedicalHistoryData(BaseModel):
+    gender: str
+    hypertension: bool = False
+    smoking: bool = False
+    diabetes: str = "None"
+    hereditary: bool = False
+    BMI: float
+    atrial_fibrillation: bool = False
+
+
+class LesionData(BaseModel):
+    LAD: bool = False
+    LCX: bool = False
+    RCA: bool = False
+
+
+class VesselData(BaseModel):
+    num_vessels: int
+    angioplasty: bool = False
+    imaging: str = "NONE"
+
+
+class PCIData(BaseModel):
+    balloon: bool = False
+    IVL: bool = False
+    ROTA: bool = False
+
+
+class MedicalHistoryIn(MedicalHistoryData):
+    patient_id: int
+
+
+class LesionIn(LesionData):
+    patient_id: int
+
+
+class VesselIn(VesselData):
+    patient_id: int
+
+
+class PCIIn(PCIData):
+    patient_id: int
+
+
+class EncounterIn(BaseModel):
+    # Either a new patient or the ID of an existing one; parts left out are skipped.
+    patient: PatientIn | None = None
+    patient_id: int | None = None
+    history: MedicalHistoryData | None = None
+    lesion: LesionData | None = None
+    vessel: VesselData | None = None
+    pci: PCIData | None = None
+
+
+def integrity_error(exc):
+    """HTTPException for a rejected write: 404 for an unknown patient, else 409."""
+    if missing_patient(exc):  # foreign_keys=ON rejects rows for a patient that does not exist
+        return HTTPException(status_code=404, detail="Patient not found")
+    return HTTPException(status_code=409, detail=str(exc.orig))
+
+
+async def _add(db, obj):
+    db.add(obj)
+    try:
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        raise integrity_error(exc) from None
+    return as_dict(obj)
+
+
+async def _first_for_patient(db, model, patient_id):
+    pk = model.__mapper__.primary_key[0]
+    row = await db.scalar(select(model).where(model.patient_id == patient_id).order_by(pk).limit(1))
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"No {model.__tablename__} for patient {patient_id}")
+    return as_dict(row)
+
+
+# === Patients ===
+@app.post("/patients/")
+async def create_patient(body: PatientIn, db=Depends(get_db)):
+    return await _add(db, Patient(**body.model_dump()))
+
+
+@app.get("/patients/")
+async def list_patients(after_id: int = 0, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        db=Depends(get_db)):
+    return [as_dict(p) for p in await db.scalars(patients_page_query(after_id, limit))]
+
+
+@app.get("/find_patients/")
+async def find_patients(q: str, offset: int = Query(0, ge=0),
+                        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db=Depends(get_db)):
+    return await db.run_sync(fulltext.find_patients, q, offset, limit)
+
+
+@app.delete("/patients/{patient_id}")
+async def delete_patient(patient_id: int, db=Depends(get_db)):
+    if not await db.run_sync(delete_patients, [patient_id]):
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Patient not found")
+    await db.commit()
+    return {"deleted": patient_id}
+
+
+@app.delete("/patients/")
+async def delete_patients_batch(ids: str = Query(..., description="IDs or ranges, e.g. 12,15,40-60"),
+                                db=Depends(get_db)):
+    try:
+        ranges = parse_ids(ids)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from None
+    deleted = await db.run_sync(lambda sync_db: delete_patients(sync_db, existing_ids(sync_db, ranges)))
+    await db.commit()
+    return {"deleted": deleted}
+
+
+@app.post("/encounters/")
+async def create_encounter(body: EncounterIn, db=Depends(get_db)):
+    if (body.patient is None) == (body.patient_id is None):
+        raise HTTPException(status_code=422, detail="Give either patient or patient_id")
+    try:
+        ids = await db.run_sync(record_encounter, **body.model_dump())
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        raise integrity_error(exc) from None
+    return ids
+
+
+# === Related tables ===
+@app.post("/medical_history/")
+async def create_medical_history(body: MedicalHistoryIn, db=Depends(get_db)):
+    return await _add(db, MedicalHistory(**body.model_dump()))
+
+
+@app.get("/medical_history/{patient_id}")
+async def get_medical_history(patient_id: int, db=Depends(get_db)):
+    return await _first_for_patient(db, MedicalHistory, patient_id)
+
+
+@app.post("/lesions/")
+async def create_lesion(body: LesionIn, db=Depends(get_db)):
+    return await _add(db, Lesion(**body.model_dump()))
+
+
+@app.get("/lesions/{patient_id}")
+async def get_lesion(patient_id: int, db=Depends(get_db)):
+    return await _first_for_patient(db, Lesion, patient_id)
+
+
+@app.post("/vessels/")
+async def create_vessel(body: VesselIn, db=Depends(get_db)):
+    return await _add(db, Vessel(**body.model_dump()))
+
+
+@app.get("/vessels/{patient_id}")
+async def get_vessel(patient_id: int, db=Depends(get_db)):
+    return await _first_for_patient(db, Vessel, patient_id)
+
+
+@app.post("/pci/")
+async def create_pci(body: PCIIn, db=Depends(get_db)):
+    return await _add(db, PCI(**body.model_dump()))
+
+
+@app.get("/pci/{patient_id}")
+async def get_pci(patient_id: int, db=Depends(get_db)):
+    return await _first_for_patient(db, PCI, patient_id)
+
+
+# === Timeline ===
+RECORD_TABLES = {model.__tablename__: model for model in RELATED_MODELS}
+
+
+@app.get("/timeline/{patient_id}")
+async def timeline(patient_id: int, db=Depends(get_db)):
+    return await db.run_sync(patient_timeline, patient_id)
+
+
+@app.get("/latest/{table}")
+async def latest(table: str, after_id: int = 0, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                 db=Depends(get_db)):
+    if table not in RECORD_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table {table}")
+    return await db.run_sync(latest_page, RECORD_TABLES[table], after_id, limit)
+
+
+# === Full data / search ===
+# format=arrow sends the on-screen columns as a compressed Arrow stream (see wire.py).
+WireFormat = Query("json", pattern="^(json|arrow)$")
+
+
+def arrow_response(rows, columns):
+    return Response(encode_arrow(rows, columns), media_type=ARROW_MEDIA_TYPE)
+
+
+# Risk scores (risk.py) are in memory, kept in step with the primary
+# through the sync engine; a stale index is reloaded on the thread pool,
+# not on the event loop.
+RiskSort = Query("id", pattern="^(id|risk)$")
+
+
+@app.get("/all_data/")
+async def all_data(after_id: int = 0, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                   format: str = WireFormat, sort: str = RiskSort, offset: int = Query(0, ge=0),
+                   db=Depends(get_read_db)):
+    """The full-data rows of patient_summary with their risk score, in either format.
+
+    sort=id pages by ``after_id``; sort=risk (highest score first) by ``offset``.
+    """
+    sync_engine = get_engine(DATABASE_URL)
+    await run_in_threadpool(risk_index.sync, sync_engine)
+    if sort == "risk":
+        rows = await db.run_sync(ranked_page, sync_engine, offset, limit)
+    else:
+        result = await db.execute(full_data_page_query(after_id, limit))
+        rows = with_scores(sync_engine, [full_data_row(r) for r in result])
+    if format == "arrow":
+        return arrow_response(rows, FULL_DATA_COLUMNS + (RISK_COLUMN,))
+    return rows
+
+
+@app.get("/search_patients/")
+async def search_patients(
+    age: int = 0, gender: str = "", diabetes: str = "", imaging: str = "",
+    hypertension: bool = False, smoking: bool = False, atrial_fibrillation: bool = False,
+    LAD: bool = False, LCX: bool = False, RCA: bool = False,
+    balloon: bool = False, IVL: bool = False, ROTA: bool = False,
+    angioplasty: bool = False, min_vessels: int = 0, min_risk: int = Query(0, ge=0),
+    format: str = WireFormat, db=Depends(get_read_db),
+):
+    criteria = {
+        "age": age, "gender": gender, "diabetes": diabetes, "imaging": imaging,
+        "hypertension": hypertension, "smoking": smoking, "atrial_fibrillation": atrial_fibrillation,
+        "LAD": LAD, "LCX": LCX, "RCA": RCA, "balloon": balloon, "IVL": IVL, "ROTA": ROTA,
+        "angioplasty": angioplasty, "min_vessels": min_vessels,
+    }
+    # With min_risk, only the rows of patients scoring that much are read (risk.search_at_least).
+    await run_in_threadpool(risk_index.sync, get_engine(DATABASE_URL))
+    rows = await db.run_sync(search_at_least, get_engine(DATABASE_URL), criteria, min_risk)
+    if format == "arrow":
+        return arrow_response(rows, SEARCH_COLUMNS + (RISK_COLUMN,))
+    return rows
+
+
+# === Statistics ===
+@app.get("/stats/")
+async def cohort_stats(db=Depends(get_db)):
+    return await db.run_sync(stats.load)
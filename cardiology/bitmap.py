@@ -0,0 +1,262 @@
+"""In-process bitmap index over the clinical flags, for instant cohort counts.
+
+There is one bitset per boolean flag (hypertension, smoking, hereditary,
+atrial_fibrillation, LAD, LCX, RCA, angioplasty, balloon, IVL, ROTA) and one
+per value of diabetes, gender, imaging, age and num_vessels; bit ``n`` is
+patient ``n``.  Bitsets are Python ints, so a criteria combination is a
+handful of big-int ANDs and its count an ``int.bit_count()``.
+
+As everywhere else a patient's clinical data is the *first* row of each
+related table (see queries.py), so ``patient_ids(engine, criteria)`` returns
+exactly the patients ``search_query(criteria)`` does.
+
+The index is built on first use.  Afterwards, every commit reports the
+patients it inserted, changed or deleted (db.COMMIT_HOOKS: ORM sessions
+and bulk-import batches), and only those patients are re-read before the
+next lookup.  A write that cannot be attributed to patients marks the whole
+index for a rebuild, and so does a commit from another process (the CLIs,
+the API server; see db.external_changes), checked before every lookup.
+The same tracking serves every index in PATIENT_INDEXES (risk.py adds its
+scores).
+
+    python -m cardiology.bitmap --verify
+"""
+import threading
+
+from .db import COMMIT_HOOKS, external_changes
+from .models import Patient, PatientSummary, MedicalHistory, Lesion, Vessel, PCI
+from .queries import SEARCH_CRITERIA, joined_select, search_query
+
+FLAGS = {
+    "hypertension": MedicalHistory.hypertension,
+    "smoking": MedicalHistory.smoking,
+    "hereditary": MedicalHistory.hereditary,
+    "atrial_fibrillation": MedicalHistory.atrial_fibrillation,
+    "LAD": Lesion.LAD,
+    "LCX": Lesion.LCX,
+    "RCA": Lesion.RCA,
+    "angioplasty": Vessel.angioplasty,
+    "balloon": PCI.balloon,
+    "IVL": PCI.IVL,
+    "ROTA": PCI.ROTA,
+}
+VALUES = {
+    "age": Patient.age,
+    "gender": MedicalHistory.gender,
+    "diabetes": MedicalHistory.diabetes,
+    "imaging": Vessel.imaging,
+    "num_vessels": Vessel.num_vessels,
+}
+INDEX_SELECT = (Patient.patient_id, *FLAGS.values(), *VALUES.values())
+REFRESH_CHUNK = 500
+REBUILD_THRESHOLD = 50_000  # more pending patients than this: rebuild instead
+
+
+def to_bits(ids):
+    """Iterable of patient IDs -> bitset int."""
+    import numpy as np  # deferred: only needed once a cohort is counted
+
+    ids = np.fromiter(ids, dtype=np.int64)
+    if not len(ids):
+        return 0
+    marks = np.zeros(int(ids.max()) + 1, dtype=bool)
+    marks[ids] = True
+    return int.from_bytes(np.packbits(marks, bitorder="little").tobytes(), "little")
+
+
+def from_bits(bits):
+    """Bitset int -> sorted numpy array of patient IDs."""
+    import numpy as np
+
+    raw = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little"))
+
+
+def _keys(row):
+    """The bitset keys one index row belongs to."""
+    keys = ["patients"]
+    for name in FLAGS:
+        if getattr(row, name):
+            keys.append(name)
+    for name in VALUES:
+        value = getattr(row, name)
+        if value is not None:
+            keys.append(f"{name}={value}")
+    return keys
+
+
+class BitmapIndex:
+    def __init__(self):
+        self.engine = None
+        self.bitsets = {}
+        self._pending = set()
+        self._stale = True
+        self._external = None  # external_changes() as of the last build
+        self._lock = threading.RLock()
+
+    # --- maintenance ---
+    def _collect(self, rows):
+        members = {}
+        for row in rows:
+            for key in _keys(row):
+                members.setdefault(key, []).append(row.patient_id)
+        return {key: to_bits(ids) for key, ids in members.items()}
+
+    def rebuild(self, engine):
+        with self._lock:
+            self._external = external_changes(engine)
+            with engine.connect() as conn:
+                self._pending.clear()
+                self.bitsets = self._collect(conn.execute(joined_select(*INDEX_SELECT)))
+            self.engine = engine
+            self._stale = False
+
+    def _refresh(self, patient_ids):
+        """Re-read ``patient_ids`` (deleted ones simply disappear)."""
+        ids = sorted(patient_ids)
+        clear = ~to_bits(ids)
+        for key in self.bitsets:
+            self.bitsets[key] &= clear
+        with self.engine.connect() as conn:
+            for start in range(0, len(ids), REFRESH_CHUNK):
+                chunk = ids[start:start + REFRESH_CHUNK]
+                stmt = joined_select(*INDEX_SELECT).where(Patient.patient_id.in_(chunk))
+                for key, bits in self._collect(conn.execute(stmt)).items():
+                    self.bitsets[key] = self.bitsets.get(key, 0) | bits
+
+    def invalidate(self, patient_ids=None):
+        """Schedule ``patient_ids`` for re-reading, or the whole index if None."""
+        with self._lock:
+            if patient_ids is None:
+                self._stale = True
+            else:
+                self._pending.update(patient_ids)
+
+    def sync(self, engine):
+        with self._lock:
+            if external_changes(engine) != self._external:
+                self._stale = True  # another process wrote: which patients is not known
+            if self._stale or engine is not self.engine or len(self._pending) > REBUILD_THRESHOLD:
+                self.rebuild(engine)
+            elif self._pending:
+                pending, self._pending = self._pending, set()
+                self._refresh(pending)
+
+    # --- lookups ---
+    def bits(self, criteria):
+        """Bitset of the patients matching ``criteria`` (same rules as search_conditions)."""
+        unknown = set(criteria) - set(SEARCH_CRITERIA) - set(FLAGS)
+        if unknown:
+            raise ValueError(f"Άγνωστα κριτήρια: {', '.join(sorted(unknown))}")
+        get = self.bitsets.get
+        result = get("patients", 0)
+        for name in ("age", "gender", "diabetes", "imaging"):
+            if criteria.get(name):
+                result &= get(f"{name}={criteria[name]}", 0)
+        for name in FLAGS:
+            if criteria.get(name):
+                result &= get(name, 0)
+        if criteria.get("min_vessels"):
+            prefix = "num_vessels="
+            vessels = 0
+            for key, bits in self.bitsets.items():
+                if key.startswith(prefix) and int(key[len(prefix):]) >= criteria["min_vessels"]:
+                    vessels |= bits
+            result &= vessels
+        return result
+
+    def count(self, engine, criteria):
+        with self._lock:
+            self.sync(engine)
+            return self.bits(criteria).bit_count()
+
+    def patient_ids(self, engine, criteria):
+        with self._lock:
+            self.sync(engine)
+            return from_bits(self.bits(criteria))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "bitsets": len(self.bitsets),
+                "patients": self.bitsets.get("patients", 0).bit_count(),
+                "bytes": sum((b.bit_length() + 7) // 8 for b in self.bitsets.values()),
+                "pending": len(self._pending),
+                "stale": self._stale,
+            }
+
+    # --- consistency check ---
+    def verify(self, engine, extra_criteria=()):
+        """Compare cohorts with the SQL search; returns the mismatching criteria."""
+        import numpy as np
+
+        checks = [{}]
+        checks += [{name: True} for name in FLAGS]
+        checks += [{name: value} for name, value in (
+            ("gender", "Male"), ("gender", "Female"),
+            ("diabetes", "None"), ("diabetes", "Type 1"), ("diabetes", "Type 2"),
+            ("imaging", "NONE"), ("imaging", "OCT"), ("imaging", "IVUS"),
+            ("min_vessels", 1), ("min_vessels", 3),
+        )]
+        checks += list(extra_criteria)
+        mismatches = []
+        with engine.connect() as conn:
+            for criteria in checks:
+                expected = self._sql_ids(conn, criteria)
+                if not np.array_equal(self.patient_ids(engine, criteria), expected):
+                    mismatches.append(criteria)
+        return mismatches
+
+    @staticmethod
+    def _sql_ids(conn, criteria):
+        import numpy as np
+
+        sql_criteria = {k: v for k, v in criteria.items() if k != "hereditary"}
+        stmt = search_query(sql_criteria)
+        if criteria.get("hereditary"):
+            stmt = stmt.where(PatientSummary.hereditary)
+        return np.array([r.patient_id for r in conn.execute(stmt)], dtype=np.int64)
+
+
+bitmap_index = BitmapIndex()
+# In-process indexes over patients, kept in step by the commit hook below.
+PATIENT_INDEXES = [bitmap_index]
+
+
+def invalidate_patients(patient_ids=None):
+    """Schedule ``patient_ids`` (None: all patients) for re-reading in every index."""
+    ids = None if patient_ids is None else set(patient_ids)
+    for index in PATIENT_INDEXES:
+        index.invalidate(ids)
+
+
+# Every commit of this process that wrote (sessions, bulk-import batches).
+COMMIT_HOOKS.append(invalidate_patients)
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    from .db import DATABASE_URL, get_engine
+
+    parser = argparse.ArgumentParser(description="Έλεγχος συνέπειας του bitmap index με την SQL αναζήτηση")
+    parser.add_argument("--database", default=DATABASE_URL)
+    parser.add_argument("--verify", action="store_true", help="compare every single criterion with SQL")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(args.database)
+    start = time.perf_counter()
+    bitmap_index.rebuild(engine)
+    print(f"built in {time.perf_counter() - start:.2f}s: {bitmap_index.stats()}")
+    if args.verify:
+        mismatches = bitmap_index.verify(engine)
+        for criteria in mismatches:
+            print(f"MISMATCH {criteria}")
+        print("OK" if not mismatches else f"{len(mismatches)} mismatches")
+        return 1 if mismatches else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
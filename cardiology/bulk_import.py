@@ -0,0 +1,313 @@
+"""Bulk import of the wide full-data table from CSV or Excel.
+
+The file has the same columns as "Προβολή Όλων των Ασθενών (Πλήρη Δεδομένα)"
+(ID is optional).  Rows are validated, then written to patients,
+medical_history, lesions, vessels and pci with one executemany per table per
+batch, each batch in its own transaction.
+
+    python -m cardiology.bulk_import registry.csv [--database URL] [--rejects rejects.csv]
+"""
+import csv
+import io
+import time
+from contextlib import nullcontext
+from operator import itemgetter
+
+from sqlalchemy import func, select
+
+from . import fulltext, stats, summary
+from .db import committed, external_changes
+from .models import Patient, MedicalHistory, Lesion, Vessel, PCI, utcnow
+from .queries import FULL_DATA_COLUMNS
+
+DEFAULT_BATCH_SIZE = 20000
+REQUIRED_COLUMNS = ("Όνομα", "Επώνυμο", "Ηλικία")
+
+GENDERS = {"", "Male", "Female"}
+DIABETES = {"", "None", "Type 1", "Type 2"}
+IMAGING = {"", "NONE", "OCT", "IVUS"}
+FLAGS = {"ΝΑΙ": True, "NAI": True, "YES": True, "TRUE": True, "1": True,
+         "ΟΧΙ": False, "OXI": False, "NO": False, "FALSE": False, "0": False, "": False}
+
+# Column order of the tuples handed to executemany (patient_id comes first).
+TABLE_COLUMNS = {
+    Patient: ("patient_id", "first_name", "last_name", "age", "medical_history"),
+    MedicalHistory: ("patient_id", "gender", "hypertension", "smoking", "diabetes", "hereditary", "BMI",
+                     "atrial_fibrillation"),
+    Lesion: ("patient_id", "LAD", "LCX", "RCA"),
+    Vessel: ("patient_id", "num_vessels", "angioplasty", "imaging"),
+    PCI: ("patient_id", "balloon", "IVL", "ROTA"),
+}
+
+# patient_id and the indexed text (fulltext.COLUMNS) of a patients tuple.
+_search_fields = itemgetter(*(TABLE_COLUMNS[Patient].index(c) for c in ("patient_id", *fulltext.COLUMNS)))
+
+
+class RowError(ValueError):
+    pass
+
+
+def _flag(row, column):
+    value = row.get(column, "")
+    flag = FLAGS.get(value)
+    if flag is None:
+        flag = FLAGS.get(value.strip().upper())
+        if flag is None:
+            raise RowError(f"μη έγκυρη τιμή '{value}' στη στήλη '{column}' (ΝΑΙ/ΟΧΙ)")
+    return flag
+
+
+def _number(row, column, cast, low, high):
+    value = row.get(column, "").strip()
+    if not value:
+        return None
+    try:
+        number = cast(value)
+    except ValueError:
+        raise RowError(f"μη έγκυρη τιμή '{value}' στη στήλη '{column}'") from None
+    if not low <= number <= high:
+        raise RowError(f"η τιμή {value} στη στήλη '{column}' είναι εκτός ορίων {low}-{high}")
+    return number
+
+
+def _choice(row, column, allowed):
+    value = row.get(column, "").strip()
+    if value not in allowed:
+        raise RowError(f"μη έγκυρη τιμή '{value}' στη στήλη '{column}'")
+    return value
+
+
+def parse_row(row):
+    """Validate one row (column label -> text) and split it per table.
+
+    Returns ``(patient, history, lesion, vessel, pci)`` value tuples in
+    TABLE_COLUMNS order without patient_id; a related tuple is None when the
+    row has no data for that table.
+    """
+    first_name = row.get("Όνομα", "").strip()
+    last_name = row.get("Επώνυμο", "").strip()
+    if not first_name or not last_name:
+        raise RowError("λείπει το όνομα ή το επώνυμο")
+    age = _number(row, "Ηλικία", int, 1, 120)
+    if age is None:
+        raise RowError("λείπει η ηλικία")
+    patient = (first_name, last_name, age, row.get("Ιστορικό", ""))
+
+    history = (
+        _choice(row, "Φύλο", GENDERS),
+        _flag(row, "Υπέρταση"),
+        _flag(row, "Κάπνισμα"),
+        _choice(row, "Διαβήτης", DIABETES),
+        _flag(row, "Κληρονομικότητα"),
+        _number(row, "BMI", float, 10.0, 50.0),
+        _flag(row, "Κολπική Μαρμαρυγή"),
+    )
+    if not any(history):
+        history = None
+
+    lesion = (_flag(row, "LAD"), _flag(row, "LCX"), _flag(row, "RCA"))
+    if not any(lesion):
+        lesion = None
+
+    vessel = (
+        _number(row, "Αρ. Αγγείων", int, 0, 10),
+        _flag(row, "Αγγειοπλαστική"),
+        _choice(row, "Απεικόνιση", IMAGING),
+    )
+    if vessel[0] is None and not any(vessel):
+        vessel = None
+
+    pci = (_flag(row, "Balloon"), _flag(row, "IVL"), _flag(row, "ROTA"))
+    if not any(pci):
+        pci = None
+
+    return patient, history, lesion, vessel, pci
+
+
+# === Readers ===
+def _check_header(header):
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"Λείπουν οι στήλες: {', '.join(missing)}")
+    unknown = [c for c in header if c not in FULL_DATA_COLUMNS]
+    if unknown:
+        raise ValueError(f"Άγνωστες στήλες: {', '.join(unknown)}")
+
+
+def read_csv(stream):
+    """Yield ``(line_number, row)`` from a text stream, streaming."""
+    reader = csv.reader(stream)
+    header = [h.strip() for h in next(reader, [])]
+    _check_header(header)
+    for line, values in enumerate(reader, start=2):
+        if values:
+            yield line, dict(zip(header, values))
+
+
+def read_excel(source):
+    """Yield ``(line_number, row)`` from the first sheet of an .xlsx file."""
+    import pandas as pd  # optional: only needed for Excel files
+
+    frame = pd.read_excel(source, dtype=str, keep_default_na=False)
+    header = [str(h).strip() for h in frame.columns]
+    _check_header(header)
+    for line, values in enumerate(frame.itertuples(index=False, name=None), start=2):
+        yield line, dict(zip(header, values))
+
+
+def read_file(path_or_buffer, name=None):
+    """Pick the reader from the file name (.csv, .xlsx/.xls)."""
+    name = (name or str(path_or_buffer)).lower()
+    if name.endswith((".xlsx", ".xls")):
+        if isinstance(path_or_buffer, (bytes, bytearray)):
+            path_or_buffer = io.BytesIO(path_or_buffer)
+        return read_excel(path_or_buffer)
+    if isinstance(path_or_buffer, (bytes, bytearray)):
+        return read_csv(io.StringIO(path_or_buffer.decode("utf-8-sig")))
+    if hasattr(path_or_buffer, "read"):
+        return read_csv(io.TextIOWrapper(path_or_buffer, encoding="utf-8-sig", newline=""))
+    return _read_csv_path(path_or_buffer)
+
+
+def _read_csv_path(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        yield from read_csv(f)
+
+
+# === Import ===
+def _existing_ids(conn, ids):
+    found = set()
+    ids = list(ids)
+    for i in range(0, len(ids), 30000):
+        found.update(conn.scalars(select(Patient.patient_id).where(Patient.patient_id.in_(ids[i:i + 30000]))))
+    return found
+
+
+def _insert_sql(model):
+    # Plain DBAPI executemany with positional tuples: SQLAlchemy's per-row
+    # parameter processing would otherwise cost more than the inserts.
+    columns = TABLE_COLUMNS[model] + (("recorded_at",) if model is not Patient else ())
+    names = ", ".join(f'"{c}"' for c in columns)
+    return f"INSERT INTO {model.__tablename__} ({names}) VALUES ({', '.join('?' * len(columns))})"
+
+
+BATCH_IDS = "SELECT patient_id FROM temp.import_batch"
+
+
+def _stage_batch(conn, patient_ids):
+    conn.exec_driver_sql("CREATE TEMP TABLE IF NOT EXISTS import_batch (patient_id INTEGER PRIMARY KEY)")
+    conn.exec_driver_sql("DELETE FROM temp.import_batch")
+    conn.exec_driver_sql("INSERT INTO temp.import_batch (patient_id) VALUES (?)", [(pid,) for pid in patient_ids])
+
+
+def _write_batch(engine, batch):
+    """Insert one batch of parsed rows in a single transaction."""
+    external_changes(engine)  # other processes' commits until now are still theirs (db.py)
+    with engine.begin() as conn:
+        explicit = [pid for pid, _ in batch if pid is not None]
+        taken = _existing_ids(conn, explicit) if explicit else set()
+        next_id = (conn.scalar(select(func.max(Patient.patient_id))) or 0) + 1
+
+        tables = {model: [] for model in TABLE_COLUMNS}
+        rejected = []
+        # The file has no dates: its records count as recorded at import time.
+        recorded_at = utcnow().isoformat(" ")
+        for pid, (line, parts) in batch:
+            if pid is None:
+                pid = next_id
+                next_id += 1
+            elif pid in taken:
+                rejected.append((line, f"το ID {pid} υπάρχει ήδη"))
+                continue
+            taken.add(pid)
+            next_id = max(next_id, pid + 1)
+            for model, values in zip(tables, parts):
+                if values is not None:
+                    tables[model].append((pid, *values) if model is Patient else (pid, *values, recorded_at))
+        # The statistics, summary and search triggers are switched off for the
+        # batch; its counters, summary rows and index entries are added
+        # afterwards, set-based.
+        derived = stats.installed(conn)
+        with stats.suspended(conn) if derived else nullcontext():
+            for model, values in tables.items():
+                if values:
+                    conn.exec_driver_sql(_insert_sql(model), values)
+        if derived:
+            _stage_batch(conn, [values[0] for values in tables[Patient]])
+            summary.add_patients(conn, BATCH_IDS)
+            stats.add_patients(conn, BATCH_IDS)  # from the summary rows just added
+            fulltext.add_rows(conn, map(_search_fields, tables[Patient]))
+    committed(engine, [values[0] for values in tables[Patient]])
+    return len(tables[Patient]), rejected
+
+
+def import_rows(engine, rows, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Validate and insert ``(line_number, row)`` pairs.
+
+    ``progress(imported, rejected)`` is called after every batch.  Returns a
+    report dict with the number of imported patients, the rejected
+    ``(line_number, reason)`` pairs and the elapsed time.
+    """
+    start = time.perf_counter()
+    imported = 0
+    rejected = []
+    batch = []
+
+    def flush():
+        nonlocal imported
+        done, bad = _write_batch(engine, batch)
+        imported += done
+        rejected.extend(bad)
+        batch.clear()
+        if progress:
+            progress(imported, len(rejected))
+
+    for line, row in rows:
+        try:
+            pid = _number(row, "ID", int, 1, 2**63 - 1) if row.get("ID") else None
+            batch.append((pid, (line, parse_row(row))))
+        except RowError as exc:
+            rejected.append((line, str(exc)))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    rejected.sort()
+    return {"imported": imported, "rejected": rejected, "seconds": time.perf_counter() - start}
+
+
+def write_rejects(rejected, stream):
+    writer = csv.writer(stream)
+    writer.writerow(["Γραμμή", "Αιτία"])
+    writer.writerows(rejected)
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    from .db import DATABASE_URL, get_engine
+
+    parser = argparse.ArgumentParser(description="Μαζική εισαγωγή ασθενών από CSV/Excel")
+    parser.add_argument("file")
+    parser.add_argument("--database", default=DATABASE_URL)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--rejects", help="write rejected rows (line, reason) to this CSV file")
+    args = parser.parse_args(argv)
+
+    def progress(imported, rejected):
+        print(f"\r{imported} imported, {rejected} rejected", end="", file=sys.stderr, flush=True)
+
+    report = import_rows(get_engine(args.database), read_file(args.file), args.batch_size, progress)
+    print(file=sys.stderr)
+    rate = report["imported"] / report["seconds"] if report["seconds"] else 0
+    print(f"{report['imported']} patients imported in {report['seconds']:.1f}s ({rate:,.0f} rows/s), "
+          f"{len(report['rejected'])} rejected")
+    if args.rejects and report["rejected"]:
+        with open(args.rejects, "w", encoding="utf-8", newline="") as f:
+            write_rejects(report["rejected"], f)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
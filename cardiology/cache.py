@@ -0,0 +1,126 @@
+"""Read-through cache for the list, full-data and search pages (and the search box).
+
+Results are keyed on the query name, its parameters and a data version
+counter.  Every lookup first compares db.local_writes (committed ORM
+sessions that inserted, updated or deleted rows, and bulk-import batches)
+and db.external_changes (commits from the CLIs, the API server) with the
+values it last saw and bumps the counter if either moved, so cached
+results are served from memory until something is written and never
+after.  Results read from the snapshot (replica.py) are dropped again when
+a newer snapshot replaces it.
+"""
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from . import fulltext, queries
+from .db import external_changes, local_writes
+from .risk import search_at_least
+
+
+class ResultCache:
+    """Bounded LRU of query results with hit/miss counters.
+
+    Bounded both by number of entries and by total rows held (a result's
+    weight is its ``len()``), whichever is reached first.
+    """
+
+    def __init__(self, max_entries=256, max_rows=200_000):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.version = 0
+        self.writes = 0    # local_writes() as of the last lookup
+        self.external = 0  # external_changes() as of the last lookup
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, name, params, loader):
+        writes, external = local_writes(), external_changes()
+        if (writes, external) != (self.writes, self.external):
+            self.writes, self.external = writes, external
+            self.bump()
+        key = (name, _freeze(params), self.version)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = loader()
+        weight = len(value) if hasattr(value, "__len__") else 1
+        if weight > self.max_rows:
+            return value
+        with self._lock:
+            # A write may have happened while loading: keep the result only
+            # if it was read at the current version.
+            if key[2] == self.version and key not in self._entries:
+                self._entries[key] = value
+                self._rows += weight
+                self._evict()
+        return value
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._rows > self.max_rows):
+            _, value = self._entries.popitem(last=False)
+            self._rows -= len(value) if hasattr(value, "__len__") else 1
+            self.evictions += 1
+
+    def bump(self):
+        """Invalidate everything cached so far."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._rows = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "version": self.version,
+                "writes": self.writes,
+                "entries": len(self._entries),
+                "rows": self._rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+result_cache = ResultCache()
+
+
+def cached_query(fn):
+    """Wrap ``fn(db, *args)`` so its result is cached on ``(fn name, args)``."""
+    @wraps(fn)
+    def wrapper(db, *args, **kwargs):
+        return result_cache.get_or_load(fn.__name__, (args, kwargs), lambda: fn(db, *args, **kwargs))
+
+    wrapper.uncached = fn
+    return wrapper
+
+
+# Cached versions of the read paths behind the pages.
+list_patients_page = cached_query(queries.list_patients_page)
+full_data_page = cached_query(queries.full_data_page)
+find_patients = cached_query(fulltext.find_patients)
+latest_page = cached_query(queries.latest_page)
+
+
+def search_patients(db, engine, criteria, min_score=0, progress=None):
+    """risk.search_at_least, cached on the criteria and the minimum score.
+
+    ``progress`` is left out of the key and only called when the search runs.
+    """
+    return result_cache.get_or_load("search_patients", (criteria, min_score),
+                                    lambda: search_at_least(db, engine, criteria, min_score, progress=progress))
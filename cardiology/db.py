@@ -0,0 +1,255 @@
+"""Process-wide engine and per-rerun sessions.
+
+Streamlit re-executes the app script on every widget interaction, but
+imported modules stay loaded, so the engine (and its connection pool) built
+here is shared by every rerun and every browser session of the process.
+
+Other processes write to the same file too (the CLIs, the API server).
+``external_changes`` tells the in-process caches and indexes when they did:
+one connection per database file, outside the pool, reads ``PRAGMA
+data_version``, which changes whenever any other connection commits.
+Commits made through this process's sessions are absorbed right after
+they happen (``committed``, which also tells the caches), so the count is
+of commits from elsewhere.  A commit from elsewhere that lands between one of
+ours and its absorption is taken for ours.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BindParameter
+
+from .metrics import instrument
+from .migrations import init_db
+
+DATABASE_URL = os.environ.get("CARDIOLOGY_DATABASE_URL", "sqlite:///./database.db")
+
+# PRAGMAs run on every new SQLite connection.  "concurrent" lets readers and
+# writers work side by side (WAL) and makes writers wait for a lock instead
+# of failing with "database is locked"; "legacy" keeps SQLite's defaults.
+# auto_vacuum only takes effect on a new, empty file, so it comes first.
+# Every profile enforces foreign keys: writes rely on them to reject rows
+# for a patient that does not exist (see encounters.py).
+PRAGMA_PROFILES = {
+    "concurrent": {
+        "auto_vacuum": "INCREMENTAL",     # deletes give space back (deletes.reclaim_space)
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,             # ms
+        "mmap_size": 256 * 1024 * 1024,   # bytes
+        "cache_size": -64 * 1024,         # negative = KiB
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    },
+    "legacy": {
+        "foreign_keys": "ON",
+    },
+}
+PRAGMA_PROFILE = os.environ.get("CARDIOLOGY_SQLITE_PROFILE", "concurrent")
+
+
+def apply_pragmas(engine, pragmas):
+    """Register a connect hook that runs ``PRAGMA name = value`` for each entry."""
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            # auto_vacuum only matters on an empty file, and setting it on any
+            # other counts as a write to the others' PRAGMA data_version.
+            if name == "auto_vacuum":
+                cursor.execute("PRAGMA page_count")
+                if cursor.fetchone()[0]:
+                    continue
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def make_engine(url=DATABASE_URL, profile=PRAGMA_PROFILE):
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    apply_pragmas(engine, PRAGMA_PROFILES[profile])
+    instrument(engine)
+    return engine
+
+
+@lru_cache(maxsize=None)
+def get_engine(url=DATABASE_URL, profile=PRAGMA_PROFILE):
+    """One engine per database URL; tables are created/migrated on first use."""
+    engine = make_engine(url, profile)
+    init_db(engine)
+    path = database_file(engine)
+    if path is not None and path not in _watchers:
+        _watchers[path] = ChangeWatcher(engine)
+    return engine
+
+
+# === Commits from other processes ===
+class ChangeWatcher:
+    """Counts commits to one database file made outside this process."""
+
+    def __init__(self, engine):
+        raw = engine.raw_connection()
+        self._conn = raw.driver_connection
+        raw.detach()  # its own connection for good, never used for queries
+        self._lock = threading.Lock()
+        self._last = self._read()
+        self.external = 0
+
+    def _read(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def poll(self):
+        with self._lock:
+            version = self._read()
+            if version != self._last:
+                self._last = version
+                self.external += 1
+            return self.external
+
+    def absorb(self):
+        """Take the commits seen so far as this process's own."""
+        with self._lock:
+            self._last = self._read()
+
+
+_watchers = {}  # database file -> ChangeWatcher
+
+
+def database_file(engine):
+    """The SQLite file behind ``engine`` (sync or async), or None."""
+    url = make_url(engine.url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:") or url.query.get("uri"):
+        return None
+    return os.path.realpath(url.database)
+
+
+def external_changes(engine=None):
+    """A counter that grows when another process commits to ``engine``'s database (any, if None).
+
+    Callers keep the value they last saw and compare.
+    """
+    if engine is None:
+        return sum(watcher.poll() for watcher in list(_watchers.values()))
+    watcher = _watchers.get(database_file(engine))
+    return watcher.poll() if watcher else 0
+
+
+# === This process's writes ===
+# One set of Session listeners works out what each session wrote.  When a
+# commit that wrote lands, the counter behind local_writes goes up and every
+# function in COMMIT_HOOKS is called with the patient IDs it touched (None:
+# not known, e.g. a bulk UPDATE without a patient_id condition).  The result
+# cache and the snapshot read the counter, the patient indexes
+# (bitmap.PATIENT_INDEXES) subscribe to the hook.
+COMMIT_HOOKS = []
+_writes = 0
+_writes_lock = threading.Lock()
+
+
+def local_writes():
+    """How many commits that wrote this process has made (sessions and bulk-import batches)."""
+    return _writes
+
+
+def committed(engine, patient_ids=None):
+    """Report a commit through ``engine`` that wrote ``patient_ids`` (None: not known).
+
+    Sessions report theirs; other writers call it after their commit, having
+    called ``external_changes(engine)`` before the transaction so that
+    commits from elsewhere until then are still counted as such.
+    """
+    global _writes
+    watcher = _watchers.get(database_file(engine))
+    if watcher:
+        watcher.absorb()
+    with _writes_lock:
+        _writes += 1
+    ids = None if patient_ids is None else set(patient_ids)
+    for hook in COMMIT_HOOKS:
+        hook(ids)
+
+
+def _written(session):
+    return session.info.setdefault("written_patients", set())
+
+
+def statement_patient_ids(statement):
+    """Patient IDs named by ``patient_id == X`` / ``patient_id IN (...)`` in a bulk
+    UPDATE/DELETE's WHERE clause, or None if it names none."""
+    ids = set()
+    where = statement.whereclause
+    for node in visitors.iterate(where) if where is not None else ():
+        if getattr(getattr(node, "left", None), "key", None) != "patient_id":
+            continue
+        if not isinstance(node.right, BindParameter):
+            continue
+        if node.operator is operators.eq:
+            ids.add(node.right.effective_value)
+        elif node.operator is operators.in_op:
+            ids.update(node.right.effective_value)
+    return ids or None
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed(session, flush_context):
+    written = _written(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        patient_id = getattr(obj, "patient_id", None)
+        if patient_id is not None:
+            written.add(patient_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        ids = None
+        if not orm_execute_state.is_insert:
+            ids = statement_patient_ids(orm_execute_state.statement)
+        if ids is None:
+            orm_execute_state.session.info["written_unknown"] = True
+        _written(orm_execute_state.session).update(ids or ())
+
+
+# What other processes committed before ours is counted first.
+@event.listens_for(Session, "before_commit")
+def _poll_before_commit(session):
+    external_changes(session.get_bind())
+
+
+@event.listens_for(Session, "after_commit")
+def _report_commit(session):
+    unknown = session.info.pop("written_unknown", False)
+    written = session.info.pop("written_patients", None)
+    if unknown or written is not None:
+        committed(session.get_bind(), None if unknown else written)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_writes(session):
+    session.info.pop("written_unknown", None)
+    session.info.pop("written_patients", None)
+
+
+@lru_cache(maxsize=None)
+def get_sessionmaker(url=DATABASE_URL):
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine(url))
+
+
+@contextmanager
+def session_scope(url=DATABASE_URL):
+    """A session for one script run: rolled back on error, always closed."""
+    db = get_sessionmaker(url)()
+    try:
+        yield db
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
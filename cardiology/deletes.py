@@ -0,0 +1,171 @@
+"""Deleting patients together with their records, and reclaiming the space.
+
+``delete_patients`` removes the related rows and the patients with one
+``DELETE ... WHERE patient_id IN (...)`` per table (per 30000 IDs) inside the
+caller's transaction.  For every other writer, e.g. a plain
+``db.delete(patient)``, a ``BEFORE DELETE`` trigger on patients does the
+same: SQLite cannot add ON DELETE CASCADE to existing tables without
+rebuilding them, and the trigger gives the same result.
+
+Databases from before the trigger may hold orphan rows (related rows whose
+patient is gone) that every scan and join still pays for; ``delete_orphans``
+removes them once.  New databases use ``auto_vacuum = INCREMENTAL`` (see
+db.PRAGMA_PROFILES) and every delete hands the freed pages back to the file
+system; ``enable_incremental_vacuum`` converts an existing file with one
+full VACUUM.
+
+    python -m cardiology.deletes 12 40-60      # delete these patients
+    python -m cardiology.deletes --orphans     # count and remove orphan rows
+    python -m cardiology.deletes --vacuum      # switch to incremental auto_vacuum
+"""
+from sqlalchemy import delete, exists, func, or_, select, text
+
+from . import stats
+from .models import Patient
+from .queries import RELATED_MODELS
+
+CHUNK = 30000  # IDs per statement, below SQLite's 32766 bound-parameter limit
+INCREMENTAL = 2  # PRAGMA auto_vacuum value
+
+
+def trigger_sql():
+    deletes = " ".join(
+        f"DELETE FROM {model.__tablename__} WHERE patient_id = OLD.patient_id;" for model in RELATED_MODELS
+    )
+    return f"CREATE TRIGGER IF NOT EXISTS cascade_patients_delete BEFORE DELETE ON patients BEGIN {deletes} END"
+
+
+def install(conn):
+    """Create the cascade trigger (schema migration step)."""
+    conn.exec_driver_sql(trigger_sql())
+
+
+def parse_ids(spec):
+    """``"3, 7-9 12"`` -> ``[(3, 3), (7, 9), (12, 12)]``; raises ValueError."""
+    ranges = []
+    for part in spec.replace(",", " ").split():
+        first, dash, last = part.partition("-")
+        try:
+            first = int(first)
+            last = int(last) if dash else first
+        except ValueError:
+            raise ValueError(f"μη έγκυρο ID '{part}'") from None
+        if first < 1 or last < first:
+            raise ValueError(f"μη έγκυρο διάστημα '{part}'")
+        ranges.append((first, last))
+    return ranges
+
+
+def existing_ids(db, ranges):
+    """IDs of the patients that exist in the ``(first, last)`` ranges."""
+    ids = set()
+    for start in range(0, len(ranges), 100):
+        chunk = ranges[start:start + 100]
+        condition = or_(*(Patient.patient_id.between(first, last) for first, last in chunk))
+        ids.update(db.scalars(select(Patient.patient_id).where(condition)))
+    return sorted(ids)
+
+
+def reclaim_space(db):
+    """Release the free pages to the file system (a no-op without incremental auto_vacuum)."""
+    if db.execute(text("PRAGMA auto_vacuum")).scalar() != INCREMENTAL:
+        return
+    free = db.execute(text("PRAGMA freelist_count")).scalar()
+    # Python's sqlite3 steps the pragma once per execute, and each step
+    # frees one page: loop on the raw cursor, it costs microseconds a page.
+    cursor = db.connection().connection.cursor()
+    try:
+        for _ in range(free):
+            cursor.execute("PRAGMA incremental_vacuum")
+    finally:
+        cursor.close()
+
+
+def delete_patients(db, patient_ids):
+    """Delete patients and all their records in ``db``'s transaction; returns how many patients.
+
+    The caller commits.  Statements name their IDs, so the bitmap index and
+    the result cache see which patients changed.
+    """
+    patient_ids = sorted(set(patient_ids))
+    deleted = 0
+    for start in range(0, len(patient_ids), CHUNK):
+        chunk = patient_ids[start:start + CHUNK]
+        for model in RELATED_MODELS:
+            db.execute(delete(model).where(model.patient_id.in_(chunk)))
+        deleted += db.execute(delete(Patient).where(Patient.patient_id.in_(chunk))).rowcount
+    reclaim_space(db)
+    return deleted
+
+
+def _orphaned(model):
+    return ~exists().where(Patient.patient_id == model.patient_id)
+
+
+def orphan_counts(db):
+    return {
+        model.__tablename__: db.scalar(select(func.count()).select_from(model).where(_orphaned(model)))
+        for model in RELATED_MODELS
+    }
+
+
+def delete_orphans(db):
+    """Remove related rows without a patient; returns the count per table.
+
+    The statistics triggers cannot place an orphan row in its age bucket
+    any more, so they are suspended and the counters recounted instead.
+    """
+    conn = db.connection()
+    with stats.suspended(conn):
+        counts = {
+            model.__tablename__: db.execute(delete(model).where(_orphaned(model))).rowcount
+            for model in RELATED_MODELS
+        }
+    stats.rebuild(conn)
+    reclaim_space(db)
+    return counts
+
+
+def enable_incremental_vacuum(engine):
+    """Switch an existing database to incremental auto_vacuum.
+
+    Takes one full VACUUM, which rewrites the file and locks it meanwhile;
+    returns the file's page count before and after.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        before = conn.exec_driver_sql("PRAGMA page_count").scalar()
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+        return before, conn.exec_driver_sql("PRAGMA page_count").scalar()
+
+
+def main(argv=None):
+    import argparse
+
+    from .db import DATABASE_URL, get_engine, session_scope
+
+    parser = argparse.ArgumentParser(description="Διαγραφή ασθενών και καθαρισμός της βάσης")
+    parser.add_argument("ids", nargs="*", help="patient IDs or ranges, e.g. 12 40-60")
+    parser.add_argument("--database", default=DATABASE_URL)
+    parser.add_argument("--orphans", action="store_true", help="remove related rows without a patient")
+    parser.add_argument("--vacuum", action="store_true", help="switch to incremental auto_vacuum (full VACUUM)")
+    args = parser.parse_args(argv)
+    if not (args.ids or args.orphans or args.vacuum):
+        parser.error("nothing to do")
+
+    with session_scope(args.database) as db:
+        if args.ids:
+            ids = existing_ids(db, parse_ids(" ".join(args.ids)))
+            print(f"{delete_patients(db, ids)} patients deleted")
+        if args.orphans:
+            print(f"orphan rows before: {orphan_counts(db)}")
+            print(f"deleted: {delete_orphans(db)}")
+        db.commit()
+    if args.vacuum:
+        before, after = enable_incremental_vacuum(get_engine(args.database))
+        print(f"auto_vacuum = INCREMENTAL; {before} -> {after} pages")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,60 @@
+"""Writing clinical records: one related row, or a whole encounter at once.
+
+An encounter is what one catheterisation produces: the patient (new, or an
+existing ID) with a medical history, lesion, vessel and PCI row.
+``record_encounter`` adds them all to the caller's session and flushes once,
+so the caller's commit writes the five rows in one transaction or none of
+them.
+
+Neither function looks the patient up first: a row for a patient that does
+not exist is rejected by the foreign key (``foreign_keys = ON`` in every
+PRAGMA profile, see db.py) and surfaces as an IntegrityError that
+``missing_patient`` recognises.  Other constraint violations are not a
+missing patient and are left to the caller.
+"""
+from sqlalchemy.exc import IntegrityError
+
+from .models import Patient, MedicalHistory, Lesion, Vessel, PCI
+
+# Keyword of each related table in record_encounter and in POST /encounters/.
+ENCOUNTER_PARTS = {"history": MedicalHistory, "lesion": Lesion, "vessel": Vessel, "pci": PCI}
+
+
+def missing_patient(exc):
+    """True if the IntegrityError ``exc`` is the foreign key rejecting an unknown patient."""
+    return "FOREIGN KEY constraint failed" in str(exc.orig)
+
+
+def add_record(db, record):
+    """Add and commit one related row; False (rolled back) if its patient does not exist."""
+    db.add(record)
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        if not missing_patient(exc):
+            raise
+        return False
+    return True
+
+
+def record_encounter(db, patient_id=None, patient=None, **parts):
+    """Add an encounter to ``db`` with a single flush; returns the new rows' IDs.
+
+    ``patient`` is a dict of Patient columns for a new patient, ``patient_id``
+    the ID of an existing one.  ``parts`` are dicts of columns keyed as in
+    ENCOUNTER_PARTS; missing or None parts are skipped.  The caller commits
+    (or rolls back on IntegrityError).
+    """
+    if (patient is None) == (patient_id is None):
+        raise ValueError("give either patient or patient_id")
+    owner = {"patient": Patient(**patient)} if patient is not None else {"patient_id": patient_id}
+    rows = {name: ENCOUNTER_PARTS[name](**values, **owner) for name, values in parts.items() if values is not None}
+    if patient is not None:
+        db.add(owner["patient"])
+    db.add_all(rows.values())
+    db.flush()
+    ids = {"patient_id": owner["patient"].patient_id if patient is not None else patient_id}
+    for name, row in rows.items():
+        ids[f"{name}_id"] = getattr(row, row.__mapper__.primary_key[0].key)
+    return ids
@@ -0,0 +1,153 @@
+"""Streaming export of the joined full-data rows to CSV or Parquet.
+
+Rows are read with ``yield_per`` (a server-side cursor, fetched chunk by
+chunk) and every chunk is written out before the next one is fetched, so
+memory stays flat however many patients there are.
+
+    python -m cardiology.export patients.parquet [--columns ID Ηλικία BMI] [--filter LAD=1 --filter gender=Male]
+"""
+import csv
+import io
+
+from .queries import FULL_DATA_COLUMNS, SEARCH_CRITERIA, full_data_query, full_data_row, search_conditions
+from .risk import RISK_COLUMN
+
+CHUNK_SIZE = 10000
+FORMATS = ("csv", "parquet")
+
+# Typed Parquet columns; everything else is written as text.  Missing values
+# ("" in the on-screen table) become nulls.
+PARQUET_TYPES = {"ID": "int64", "Ηλικία": "int64", "BMI": "float64", "Αρ. Αγγείων": "int64", RISK_COLUMN: "int64"}
+
+
+def export_query(criteria=None):
+    return full_data_query().where(*search_conditions(criteria or {}))
+
+
+def iter_chunks(engine, criteria=None, columns=FULL_DATA_COLUMNS, chunk_size=CHUNK_SIZE, progress=None):
+    """Yield lists of value tuples (in ``columns`` order), ``chunk_size`` rows at a time.
+
+    ``progress(rows)`` is called with the rows read so far before every chunk.
+    """
+    count = 0
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=chunk_size).execute(export_query(criteria))
+        for partition in result.partitions():
+            rows = [full_data_row(r) for r in partition]
+            count += len(rows)
+            if progress:
+                progress(count)
+            yield [tuple(row[c] for c in columns) for row in rows]
+
+
+def write_csv(chunks, columns, stream):
+    writer = csv.writer(stream)
+    writer.writerow(columns)
+    count = 0
+    for chunk in chunks:
+        writer.writerows(chunk)
+        count += len(chunk)
+    return count
+
+
+def arrow_schema(columns):
+    import pyarrow as pa  # optional: only needed for Parquet / Arrow
+
+    return pa.schema([(c, pa.type_for_alias(PARQUET_TYPES.get(c, "string"))) for c in columns])
+
+
+def arrow_table(chunk, columns, schema=None):
+    """Value tuples (in ``columns`` order) -> typed ``pyarrow.Table``."""
+    import pyarrow as pa
+
+    schema = schema or arrow_schema(columns)
+    arrays = []
+    for i, column in enumerate(columns):
+        values = [row[i] for row in chunk]
+        if column in PARQUET_TYPES:
+            values = [None if v == "" else v for v in values]
+        arrays.append(pa.array(values, type=schema.field(i).type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(chunks, columns, sink):
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(columns)
+    count = 0
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for chunk in chunks:
+            writer.write_table(arrow_table(chunk, columns, schema))
+            count += len(chunk)
+    return count
+
+
+def export(engine, destination, fmt="csv", criteria=None, columns=FULL_DATA_COLUMNS, chunk_size=CHUNK_SIZE,
+           progress=None):
+    """Write the (filtered) full-data rows to ``destination``: a path or a binary file.
+
+    Returns the number of rows written; ``progress`` as in iter_chunks.
+    """
+    unknown = [c for c in columns if c not in FULL_DATA_COLUMNS]
+    if unknown:
+        raise ValueError(f"Άγνωστες στήλες: {', '.join(unknown)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Άγνωστη μορφή '{fmt}' (csv ή parquet)")
+    columns = tuple(columns)
+    chunks = iter_chunks(engine, criteria, columns, chunk_size, progress)
+    if fmt == "parquet":
+        return write_parquet(chunks, columns, destination)
+    if hasattr(destination, "write"):
+        stream = io.TextIOWrapper(destination, encoding="utf-8-sig", newline="", write_through=True)
+        try:
+            return write_csv(chunks, columns, stream)
+        finally:
+            stream.detach()
+    with open(destination, "w", encoding="utf-8-sig", newline="") as stream:
+        return write_csv(chunks, columns, stream)
+
+
+def parse_criteria(pairs):
+    """``["LAD=1", "gender=Male", "min_vessels=2"]`` -> criteria dict for search_conditions."""
+    criteria = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        if name not in SEARCH_CRITERIA:
+            raise ValueError(f"Άγνωστο κριτήριο '{name}' ({', '.join(SEARCH_CRITERIA)})")
+        if name in ("age", "min_vessels"):
+            criteria[name] = int(value)
+        elif name in ("gender", "diabetes", "imaging"):
+            criteria[name] = value
+        else:
+            criteria[name] = value.strip().lower() in ("1", "true", "yes", "ναι")
+    return criteria
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    from .db import DATABASE_URL, get_engine
+
+    parser = argparse.ArgumentParser(description="Εξαγωγή πλήρων δεδομένων ασθενών σε CSV/Parquet")
+    parser.add_argument("output", help="file name; the format follows the extension (.csv/.parquet)")
+    parser.add_argument("--database", default=DATABASE_URL)
+    parser.add_argument("--columns", nargs="+", default=list(FULL_DATA_COLUMNS))
+    parser.add_argument("--filter", action="append", default=[], metavar="NAME=VALUE",
+                        help=f"search criterion, repeatable: {', '.join(SEARCH_CRITERIA)}")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = "parquet" if args.output.lower().endswith(".parquet") else "csv"
+    try:
+        criteria = parse_criteria(args.filter)
+        count = export(get_engine(args.database), args.output, fmt, criteria, args.columns, args.chunk_size)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    print(f"{count} rows written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,216 @@
+"""Full-text search over patients' names and medical history (SQLite FTS5).
+
+``patient_search`` indexes first_name, last_name and medical_history of
+every patient under the patient's ID (the FTS rowid).  FTS5's unicode61
+tokenizer folds case, but its ``remove_diacritics`` leaves the Greek tonos
+and dialytika in place, so "Γιώργος" would not match "γιωργος".  The text is
+therefore folded before it is indexed, in SQL by the triggers, and the
+search terms in Python by ``fold``, with the same table of letters.
+
+The table is contentless: the names and notes stay in patients only, and a
+row is removed by handing FTS5 the folded values it was indexed with (the
+patient's old row, in the triggers).  Triggers keep it in step with every
+insert, change and delete of a patient; the bulk import suspends them with
+the other triggers (see stats.suspended) and adds its batch with one
+executemany (``add_rows``).
+
+Every search term matches as a prefix ("παπαδ" finds Παπαδόπουλος) and all
+terms must match.  Results are ordered by bm25, with the names weighted
+above the history notes, when there are at most RANKED_MATCHES of them:
+bm25 is computed for every match before the first page can be returned
+(about 2 µs each), which a query such as "στηθάγχη" matching a tenth of the
+registry would turn into a 100 ms sort.  Broader queries list the newest
+patients first, which FTS5 reads straight from its index.
+
+    python -m cardiology.fulltext "γιωργ παπαδ"   # search from the command line
+    python -m cardiology.fulltext --verify        # compare the index with patients
+    python -m cardiology.fulltext --rebuild       # rebuild it from scratch
+"""
+import re
+
+from sqlalchemy import column, func, select, table, text
+
+from .models import Patient
+from .queries import DEFAULT_PAGE_SIZE
+from .stats import ACTIVE
+
+TABLE = "patient_search"
+COLUMNS = ("first_name", "last_name", "medical_history")
+# bm25 weights, in COLUMNS order.
+WEIGHTS = (10.0, 10.0, 1.0)
+RANKED_MATCHES = 2000
+
+# Accented Greek letters and their plain forms.  unicode61 folds the case
+# itself, so both cases are listed only to strip the accents.
+ACCENTED = "άέήίϊΐόύϋΰώΆΈΉΊΪΌΎΫΏ"
+PLAIN = "αεηιιιουυυωΑΕΗΙΙΟΥΥΩ"
+_FOLD = str.maketrans(ACCENTED, PLAIN)
+
+search_table = table(TABLE, column("rowid"), column("rank"))
+
+
+def fold(value):
+    """``value`` without Greek accents, as it is indexed."""
+    return value.translate(_FOLD)
+
+
+def fold_sql(expr):
+    """SQL expression folding ``expr`` like ``fold``."""
+    for accented, plain in zip(ACCENTED, PLAIN):
+        expr = f"replace({expr}, '{accented}', '{plain}')"
+    return expr
+
+
+def _values(r):
+    return ", ".join(fold_sql(f"{r}.{name}") for name in COLUMNS)
+
+
+def _remove(r):
+    # Contentless table: a row is deleted with the values it was indexed with.
+    return (
+        f"INSERT INTO {TABLE} ({TABLE}, rowid, {', '.join(COLUMNS)}) "
+        f"VALUES ('delete', {r}.patient_id, {_values(r)})"
+    )
+
+
+def _add(r):
+    return f"INSERT INTO {TABLE} (rowid, {', '.join(COLUMNS)}) VALUES ({r}.patient_id, {_values(r)})"
+
+
+def trigger_sql():
+    """CREATE statements for the FTS5 table and the triggers that keep it in step with patients."""
+    weights = ", ".join(map(str, WEIGHTS))
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5({', '.join(COLUMNS)}, content='', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"INSERT INTO {TABLE} ({TABLE}, rank) VALUES ('rank', 'bm25({weights})')",
+        f"CREATE TRIGGER IF NOT EXISTS search_patients_insert AFTER INSERT ON patients WHEN {ACTIVE} BEGIN "
+        f"{_add('NEW')}; END",
+        f"CREATE TRIGGER IF NOT EXISTS search_patients_update AFTER UPDATE OF patient_id, {', '.join(COLUMNS)} "
+        f"ON patients WHEN {ACTIVE} BEGIN {_remove('OLD')}; {_add('NEW')}; END",
+        f"CREATE TRIGGER IF NOT EXISTS search_patients_delete AFTER DELETE ON patients WHEN {ACTIVE} BEGIN "
+        f"{_remove('OLD')}; END",
+    ]
+
+
+def install(conn):
+    """Create the table and triggers and index every patient (schema migration step)."""
+    for sql in trigger_sql():
+        conn.exec_driver_sql(sql)
+    rebuild(conn)
+
+
+def rebuild(conn):
+    conn.exec_driver_sql(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('delete-all')")
+    add_patients(conn)
+
+
+def add_patients(conn, patients=None):
+    """Index patients; ``patients`` is a SQL subquery of their IDs (default: all of them)."""
+    where = f" WHERE p.patient_id IN ({patients})" if patients else ""
+    conn.exec_driver_sql(
+        f"INSERT INTO {TABLE} (rowid, {', '.join(COLUMNS)}) "
+        f"SELECT p.patient_id, {_values('p')} FROM patients p{where}"
+    )
+
+
+def add_rows(conn, rows):
+    """Index ``(patient_id, first_name, last_name, medical_history)`` tuples.
+
+    The text is folded here with ``fold``: for a large batch, several times
+    faster than fold_sql's nested replace() calls.
+    """
+    conn.exec_driver_sql(
+        f"INSERT INTO {TABLE} (rowid, {', '.join(COLUMNS)}) VALUES (?, {', '.join('?' * len(COLUMNS))})",
+        [(pid, *(fold(v) if v else v for v in values)) for pid, *values in rows],
+    )
+
+
+def verify(conn, limit=20):
+    """IDs of up to ``limit`` patients missing from the index, or indexed but gone.
+
+    A contentless table cannot return the indexed text, so only the IDs are
+    compared; changed names are caught by rebuilding.
+    """
+    differing = set()
+    patients, indexed = "SELECT patient_id FROM patients", f"SELECT rowid FROM {TABLE}"
+    for left, right in ((patients, indexed), (indexed, patients)):
+        differing.update(conn.exec_driver_sql(f"{left} EXCEPT {right} LIMIT {limit}").scalars())
+    return sorted(differing)[:limit]
+
+
+def match_expression(query):
+    """FTS5 query for what was typed: every word, folded, as a quoted prefix; None if no words."""
+    terms = re.findall(r"\w+", fold(query))
+    return " ".join(f'"{term}"*' for term in terms) or None
+
+
+def _matching(match):
+    return text(f"{TABLE} MATCH :match").bindparams(match=match)
+
+
+def ranked(db, match):
+    """Whether ``match`` is narrow enough to be ordered by rank (counts at most RANKED_MATCHES + 1 rows)."""
+    matches = select(search_table.c.rowid).where(_matching(match)).limit(RANKED_MATCHES + 1).subquery()
+    return db.scalar(select(func.count()).select_from(matches)) <= RANKED_MATCHES
+
+
+def find_query(match, offset=0, limit=DEFAULT_PAGE_SIZE, by_rank=True):
+    """Patients matching the FTS5 expression ``match``: best-ranked or newest first."""
+    order = (search_table.c.rank, Patient.patient_id) if by_rank else (search_table.c.rowid.desc(),)
+    return (
+        select(Patient.patient_id, Patient.first_name, Patient.last_name, Patient.age, Patient.medical_history)
+        .select_from(search_table)
+        .join(Patient, Patient.patient_id == search_table.c.rowid)
+        .where(_matching(match))
+        .order_by(*order)
+        .offset(offset)
+        .limit(limit)
+    )
+
+
+def find_row(r):
+    return {"ID": r.patient_id, "Όνομα": r.first_name, "Επώνυμο": r.last_name, "Ηλικία": r.age,
+            "Ιστορικό": r.medical_history}
+
+
+def find_patients(db, query, offset=0, limit=DEFAULT_PAGE_SIZE):
+    """One page of the patients matching what was typed in the search box."""
+    match = match_expression(query)
+    if match is None:
+        return []
+    return [find_row(r) for r in db.execute(find_query(match, offset, limit, ranked(db, match)))]
+
+
+def main(argv=None):
+    import argparse
+
+    from .db import DATABASE_URL, get_engine
+
+    parser = argparse.ArgumentParser(description="Αναζήτηση κειμένου στους ασθενείς")
+    parser.add_argument("query", nargs="?", help="words to search for (prefixes, accents optional)")
+    parser.add_argument("--database", default=DATABASE_URL)
+    parser.add_argument("--limit", type=int, default=DEFAULT_PAGE_SIZE)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--verify", action="store_true", help="compare the index with the patients table")
+    group.add_argument("--rebuild", action="store_true", help="rebuild the index from the patients table")
+    args = parser.parse_args(argv)
+    if not (args.query or args.verify or args.rebuild):
+        parser.error("nothing to do")
+
+    with get_engine(args.database).begin() as conn:
+        if args.rebuild:
+            rebuild(conn)
+            print(f"{TABLE} rebuilt")
+            return 0
+        if args.verify:
+            differing = verify(conn)
+            print("OK" if not differing else f"{TABLE} differs for patients {differing}; run with --rebuild")
+            return 1 if differing else 0
+        for r in find_patients(conn, args.query, 0, args.limit):
+            print(*r.values(), sep="\t")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
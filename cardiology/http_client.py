@@ -0,0 +1,116 @@
+"""Pooled HTTP client for app_standalone_full.py.
+
+One ``requests.Session`` per API URL is shared by every Streamlit session in
+the process, so calls reuse keep-alive connections instead of opening a new
+TCP connection each time.  Every call has a timeout, idempotent GETs are
+retried with exponential backoff on connection errors and 502/503/504, and
+gzip-compressed responses (the API compresses anything over 1 KB) are
+decoded transparently.  Latency is recorded per endpoint for the sidebar.
+"""
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 30
+POOL_SIZE = 10
+GET_RETRIES = 3
+BACKOFF_FACTOR = 0.3
+LATENCY_WINDOW = 1000  # samples kept per endpoint
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_name(method, path):
+    """``("GET", "/lesions/42")`` -> ``"GET /lesions/{id}"`` so latencies group per route."""
+    return f"{method} {_ID_SEGMENT.sub('/{id}', path)}"
+
+
+class ApiClient:
+    def __init__(self, base_url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), pool_size=POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(
+            total=GET_RETRIES,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = "gzip"
+        self._latencies = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, path, timeout=None, **kwargs):
+        """Send a request; raises ``requests.RequestException`` if the server cannot be reached."""
+        name = endpoint_name(method, path)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=timeout or self.timeout, **kwargs)
+        except requests.RequestException:
+            self._record(name, time.perf_counter() - start, error=True)
+            raise
+        self._record(name, time.perf_counter() - start, error=response.status_code >= 500)
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def get_table(self, path, params=None, **kwargs):
+        """GET a table route in the Arrow wire format (see wire.py).
+
+        The payload is already zstd-compressed, so gzip is not requested.
+        Servers that do not know ``format=arrow`` answer with JSON; use
+        ``is_arrow(response)`` to tell which one came back.
+        """
+        params = dict(params or {}, format="arrow")
+        headers = dict(kwargs.pop("headers", None) or {}, **{"Accept-Encoding": "identity"})
+        return self.request("GET", path, params=params, headers=headers, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def _record(self, name, seconds, error):
+        with self._lock:
+            self._latencies.setdefault(name, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+            if error:
+                self._errors[name] = self._errors.get(name, 0) + 1
+
+    def latency_stats(self):
+        """One row per endpoint: calls, errors and p50/p99/max in ms over the recent window."""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._latencies.items()}
+            errors = dict(self._errors)
+        rows = []
+        for name, values in sorted(samples.items()):
+            rows.append({
+                "endpoint": name,
+                "calls": len(values),
+                "errors": errors.get(name, 0),
+                "p50 ms": round(values[len(values) // 2] * 1000, 1),
+                "p99 ms": round(values[min(len(values) - 1, int(len(values) * 0.99))] * 1000, 1),
+                "max ms": round(values[-1] * 1000, 1),
+            })
+        return rows
+
+    def close(self):
+        self.session.close()
+
+
+@lru_cache(maxsize=None)
+def get_api_client(base_url):
+    return ApiClient(base_url)
@@ -0,0 +1,219 @@
+"""Background jobs for the heavy pages: searches and exports off the script thread.
+
+A job runs a function in the process-wide thread pool, so the page that
+started it keeps responding.  The page shows the job's progress, and a
+rerun (any widget, or leaving the page and coming back) finds the same job
+again instead of abandoning it.  A job is addressed by its owner (the
+browser session) and a slot name (e.g. "search").  Starting a new job in
+a slot cancels the one already there.  The finished job, and with it its
+result, stays in the slot until it is replaced or FINISHED_TTL passes.
+
+The function is called as ``fn(*args, progress=report)``: the same
+``progress(done)`` callback that import_rows, export and search_patients
+take.  ``report`` raises JobCancelled once the job is cancelled, so the
+function stops at its next chunk and its ``with`` blocks close their
+connections.
+
+Limits: MAX_WORKERS jobs run at once in the process (the others queue),
+and one owner may have at most MAX_PER_OWNER jobs queued or running.
+
+A result with a ``close()`` method (an export's temporary file, see
+ui.ExportFile) is closed when its job leaves the runner: replaced,
+forgotten, expired, or at exit.  Results should stay small: they are kept
+per session and slot for up to FINISHED_TTL.
+
+No database imports here: the standalone app runs its API calls as jobs too.
+"""
+import atexit
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+MAX_WORKERS = int(os.environ.get("CARDIOLOGY_JOB_WORKERS", 4))
+MAX_PER_OWNER = int(os.environ.get("CARDIOLOGY_JOBS_PER_SESSION", 2))
+FINISHED_TTL = 30 * 60  # seconds
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by its progress callback once the job is cancelled."""
+
+
+class JobLimitError(RuntimeError):
+    """The owner already has MAX_PER_OWNER jobs queued or running."""
+
+
+@dataclass
+class Job:
+    id: int
+    owner: str
+    slot: str
+    key: object              # what the job computes (e.g. the criteria), to match it with the page
+    total: int = None        # expected units of work, if known
+    done: int = 0
+    status: str = QUEUED
+    result: object = None
+    error: str = None
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: float = None
+    finished_at: float = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    @property
+    def fraction(self):
+        """Share of the work done (0-1), or None if the total is unknown."""
+        if self.status == DONE:
+            return 1.0
+        if not self.total:
+            return None
+        return min(self.done / self.total, 1.0)
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def report(self, done):
+        """Progress callback handed to the job's function."""
+        self.done = done
+        if self._cancel.is_set():
+            raise JobCancelled
+
+
+class JobRunner:
+    """Thread pool plus the jobs of every owner and slot."""
+
+    def __init__(self, max_workers=MAX_WORKERS, per_owner=MAX_PER_OWNER, finished_ttl=FINISHED_TTL):
+        self.max_workers = max_workers
+        self.per_owner = per_owner
+        self.finished_ttl = finished_ttl
+        self.completed = self.failed = self.cancelled = self.refused = 0
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="cardiology-job")
+        self._jobs = {}            # (owner, slot) -> Job
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, owner, slot, key, fn, *args, total=None):
+        """Start ``fn(*args, progress=...)`` in ``slot``, cancelling the slot's previous job.
+
+        An identical job (same key) still queued or running is returned
+        instead of starting another.  Raises JobLimitError when the owner
+        has too many jobs in progress.
+        """
+        with self._lock:
+            self._expire()
+            previous = self._jobs.get((owner, slot))
+            if previous and not previous.finished and previous.key == key:
+                return previous
+            active = sum(1 for (o, s), job in self._jobs.items()
+                         if o == owner and s != slot and not job.finished)
+            if active >= self.per_owner:
+                self.refused += 1
+                raise JobLimitError(f"Ήδη εκτελούνται {active} εργασίες· περιμένετε ή ακυρώστε μία.")
+            if previous:
+                self._drop(previous)
+            job = self._jobs[(owner, slot)] = Job(next(self._ids), owner, slot, key, total)
+        self._pool.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        if job._cancel.is_set():  # cancelled while queued
+            self._finish(job, CANCELLED)
+            return
+        job.status, job.started_at = RUNNING, time.monotonic()
+        try:
+            job.result = fn(*args, progress=job.report)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as exc:
+            job.error = str(exc) or type(exc).__name__
+            self._finish(job, FAILED)
+        else:
+            self._finish(job, DONE)
+
+    def _finish(self, job, status):
+        job.status, job.finished_at = status, time.monotonic()
+        with self._lock:
+            if status == DONE:
+                self.completed += 1
+            elif status == FAILED:
+                self.failed += 1
+            else:
+                self.cancelled += 1
+            if self._jobs.get((job.owner, job.slot)) is not job:
+                _release(job)  # dropped while it ran: nobody will fetch the result
+
+    def get(self, owner, slot):
+        """The slot's job (running or finished), or None."""
+        with self._lock:
+            self._expire()
+            return self._jobs.get((owner, slot))
+
+    def cancel(self, owner, slot):
+        """Ask the slot's job to stop; it does at its next progress report."""
+        job = self.get(owner, slot)
+        if job and not job.finished:
+            job._cancel.set()
+
+    def forget(self, owner, slot):
+        with self._lock:
+            job = self._jobs.pop((owner, slot), None)
+            if job:
+                self._drop(job)
+
+    def close(self):
+        """Cancel every job and release the finished ones' results."""
+        with self._lock:
+            jobs, self._jobs = list(self._jobs.values()), {}
+            for job in jobs:
+                self._drop(job)
+
+    def _drop(self, job):
+        # Called with the lock held, once the job is out of (or replaced in) _jobs.
+        if job.finished:
+            _release(job)
+        else:
+            job._cancel.set()  # _finish releases the result
+
+    def _expire(self):
+        now = time.monotonic()
+        for slot, job in list(self._jobs.items()):
+            if job.finished and now - job.finished_at > self.finished_ttl:
+                del self._jobs[slot]
+                _release(job)
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            return {
+                "workers": self.max_workers,
+                "per_session": self.per_owner,
+                "queued": statuses.count(QUEUED),
+                "running": statuses.count(RUNNING),
+                "kept": sum(status in FINISHED for status in statuses),
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "refused": self.refused,
+            }
+
+
+def _release(job):
+    close = getattr(job.result, "close", None)
+    job.result = None
+    if close:
+        close()
+
+
+# One runner per process, shared by every Streamlit session (like the result cache).
+job_runner = JobRunner()
+atexit.register(job_runner.close)
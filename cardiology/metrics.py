@@ -0,0 +1,181 @@
+"""SQL statistics per Streamlit page rerun, and their Prometheus export.
+
+Engine events time every statement; on SQLite a cursor subclass also counts
+the rows fetched.  Both are added to the rerun in progress, which the app
+opens with ``page_run(page)`` around its page code (statements outside a
+rerun are not recorded).  Finished reruns are folded into per-page totals
+for the sidebar debug panel and, if ``CARDIOLOGY_METRICS_FILE`` is set,
+rewritten to that file in Prometheus text format after every rerun, for
+node_exporter's textfile collector.  Useful alerts: a page's
+``cardiology_page_last_statements`` growing with the data (N+1 queries), or
+``cardiology_page_statement_seconds_max`` of the search page.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import event
+
+METRICS_FILE = os.environ.get("CARDIOLOGY_METRICS_FILE")
+
+_current = ContextVar("page_run", default=None)
+
+
+@dataclass
+class PageRun:
+    page: str
+    statements: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    slowest: str = ""
+
+
+# === Engine hooks ===
+class _CountingCursor(sqlite3.Cursor):
+    def _count(self, rows):
+        run = _current.get()
+        if run is not None:
+            run.rows += len(rows)
+        return rows
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self._count((row,))
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        return self._count(super().fetchmany(*args, **kwargs))
+
+    def fetchall(self):
+        return self._count(super().fetchall())
+
+
+class _CountingConnection(sqlite3.Connection):
+    def cursor(self, factory=_CountingCursor):
+        return super().cursor(factory)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_start"].pop()
+    run = _current.get()
+    if run is not None:
+        run.statements += 1
+        run.seconds += elapsed
+        if elapsed > run.max_seconds:
+            run.max_seconds, run.slowest = elapsed, statement
+
+
+def _failed_execute(exception_context):
+    started = exception_context.connection.info.get("metrics_start") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument(engine):
+    """Time the engine's statements (and count rows on SQLite); call before its first connection."""
+    if event.contains(engine, "before_cursor_execute", _before_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+    event.listen(engine, "handle_error", _failed_execute)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "do_connect")
+        def _counting_connection(dialect, connection_record, cargs, cparams):
+            cparams.setdefault("factory", _CountingConnection)
+
+
+# === Per-page totals ===
+class PageMetrics:
+    def __init__(self):
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def record(self, run):
+        with self._lock:
+            page = self._pages.setdefault(run.page, {
+                "reruns": 0, "statements": 0, "seconds": 0.0, "rows": 0,
+                "max_statements": 0, "statement_seconds_max": 0.0,
+            })
+            page["reruns"] += 1
+            page["statements"] += run.statements
+            page["seconds"] += run.seconds
+            page["rows"] += run.rows
+            page["max_statements"] = max(page["max_statements"], run.statements)
+            page["statement_seconds_max"] = max(page["statement_seconds_max"], run.max_seconds)
+            page["last"] = asdict(run)
+
+    def snapshot(self):
+        """One row per page, for the debug panel."""
+        with self._lock:
+            return [
+                {
+                    "Σελίδα": name,
+                    "Εκτελέσεις": p["reruns"],
+                    "Ερωτήματα/εκτέλεση": round(p["statements"] / p["reruns"], 1),
+                    "Μέγ. ερωτήματα": p["max_statements"],
+                    "Χρόνος SQL (ms)": round(p["seconds"] * 1000, 1),
+                    "Μέγ. ερώτημα (ms)": round(p["statement_seconds_max"] * 1000, 1),
+                    "Γραμμές": p["rows"],
+                }
+                for name, p in sorted(self._pages.items())
+            ]
+
+    def prometheus(self):
+        """All pages in Prometheus text exposition format."""
+        metrics = [
+            ("page_reruns_total", "counter", "Streamlit reruns of the page", lambda p: p["reruns"]),
+            ("page_statements_total", "counter", "SQL statements executed", lambda p: p["statements"]),
+            ("page_sql_seconds_total", "counter", "time spent executing SQL", lambda p: p["seconds"]),
+            ("page_rows_total", "counter", "rows fetched", lambda p: p["rows"]),
+            ("page_last_statements", "gauge", "SQL statements of the last rerun",
+             lambda p: p["last"]["statements"]),
+            ("page_last_sql_seconds", "gauge", "SQL time of the last rerun", lambda p: p["last"]["seconds"]),
+            ("page_max_statements", "gauge", "most SQL statements in one rerun", lambda p: p["max_statements"]),
+            ("page_statement_seconds_max", "gauge", "slowest single statement",
+             lambda p: p["statement_seconds_max"]),
+        ]
+        with self._lock:
+            lines = []
+            for name, kind, text, value in metrics:
+                lines += [f"# HELP cardiology_{name} {text}", f"# TYPE cardiology_{name} {kind}"]
+                for page, p in sorted(self._pages.items()):
+                    lines.append(f'cardiology_{name}{{page="{_escape(page)}"}} {value(p)}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        # Written next to the target and renamed, so a scrape never sees half a file.
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+page_metrics = PageMetrics()
+
+
+@contextmanager
+def page_run(page):
+    """Record the SQL issued by one rerun of ``page``; yields its PageRun."""
+    run = PageRun(page)
+    token = _current.set(run)
+    try:
+        yield run
+    finally:
+        _current.reset(token)
+        page_metrics.record(run)
+        if METRICS_FILE:
+            page_metrics.write(METRICS_FILE)
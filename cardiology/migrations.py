@@ -0,0 +1,113 @@
+"""Schema versioning for database.db files that already exist.
+
+``Base.metadata.create_all`` only creates missing tables; it never touches
+tables (or their indexes) that are already there.  Each step below upgrades
+an existing database by one version, and the version reached is stored in
+SQLite's ``PRAGMA user_version``.
+"""
+from sqlalchemy import inspect
+
+from . import deletes, fulltext, stats, summary
+from .models import Base, CohortStat, PatientSummary
+from .queries import RELATED_MODELS
+
+
+def _add_indexes(conn):
+    # Foreign-key and flag indexes declared on the models (schema v1).  Indexes
+    # on columns that a later step adds are left to that step.
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            if all(c.name in existing for c in index.columns):
+                index.create(conn, checkfirst=True)
+
+
+def _add_cohort_stats(conn):
+    # Running counters for the "Στατιστικά" page and the triggers that keep them (schema v2).
+    CohortStat.__table__.create(conn, checkfirst=True)
+    stats.install(conn)
+
+
+def _add_patient_summary(conn):
+    # Denormalized one-row-per-patient table and its triggers (schema v3).
+    PatientSummary.__table__.create(conn, checkfirst=True)
+    summary.install(conn)
+
+
+def _add_delete_cascade(conn):
+    # Deleting a patient deletes its related rows, whoever deletes it (schema v4).
+    deletes.install(conn)
+
+
+def _add_patient_search(conn):
+    # FTS5 index over names and medical history, kept by triggers (schema v5).
+    fulltext.install(conn)
+
+
+def _add_recorded_at(conn):
+    # When each related row was recorded, indexed per patient (schema v6).
+    # Rows from before have no time and sort before every recorded one.
+    for model in RELATED_MODELS:
+        columns = {c["name"] for c in inspect(conn).get_columns(model.__tablename__)}
+        if "recorded_at" not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE {model.__tablename__} ADD COLUMN recorded_at DATETIME")
+    _add_indexes(conn)
+
+
+def _add_age_trigger(conn):
+    # Age changes move the age_by_diabetes counters too; recount the drift so far (schema v7).
+    stats.install(conn)
+
+
+# MIGRATIONS[n] upgrades a database from version n to n + 1.
+MIGRATIONS = [
+    _add_indexes,
+    _add_cohort_stats,
+    _add_patient_summary,
+    _add_delete_cascade,
+    _add_patient_search,
+    _add_recorded_at,
+    _add_age_trigger,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn):
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(engine):
+    """Apply every pending migration; returns the list of versions applied."""
+    applied = []
+    with engine.begin() as conn:
+        version = schema_version(conn)
+        for step in MIGRATIONS[version:]:
+            step(conn)
+            version += 1
+            applied.append(version)
+        if applied:
+            conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+    return applied
+
+
+def init_db(engine):
+    """Create missing tables and bring existing ones up to SCHEMA_VERSION.
+
+    A database that is already current is left alone: one PRAGMA read
+    instead of create_all's per-table checks and the migration transaction.
+    """
+    with engine.connect() as conn:
+        if schema_version(conn) >= SCHEMA_VERSION:
+            return []
+    Base.metadata.create_all(bind=engine)
+    return migrate(engine)
+
+
+if __name__ == "__main__":
+    import sys
+    from sqlalchemy import create_engine
+
+    url = sys.argv[1] if len(sys.argv) > 1 else "sqlite:///./database.db"
+    applied = init_db(create_engine(url))
+    print(f"applied migrations: {applied}" if applied else f"already at schema version {SCHEMA_VERSION}")
@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey, Index
+from sqlalchemy.orm import declarative_base, relationship
+
+Base = declarative_base()
+
+
+def utcnow():
+    # Naive UTC, as SQLite stores it; set in Python so the value is known after the INSERT.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# === MODELS ===
+class Patient(Base):
+    __tablename__ = "patients"
+    patient_id = Column(Integer, primary_key=True, index=True)
+    first_name = Column(String)
+    last_name = Column(String)
+    age = Column(Integer)
+    medical_history = Column(String)
+
+class MedicalHistory(Base):
+    __tablename__ = "medical_history"
+    history_id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.patient_id"), index=True)
+    gender = Column(String)
+    hypertension = Column(Boolean)
+    smoking = Column(Boolean)
+    diabetes = Column(String)
+    hereditary = Column(Boolean)
+    BMI = Column(Float)
+    atrial_fibrillation = Column(Boolean)
+    recorded_at = Column(DateTime, default=utcnow)
+    __table_args__ = (
+        Index("ix_medical_history_flags", "hypertension", "smoking", "atrial_fibrillation"),
+        Index("ix_medical_history_patient_recorded", "patient_id", "recorded_at"),
+    )
+    # Many-to-one only: lets one flush insert a new patient and its rows (encounters.py).
+    patient = relationship(Patient)
+
+class Lesion(Base):
+    __tablename__ = "lesions"
+    lesion_id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.patient_id"), index=True)
+    LAD = Column(Boolean)
+    LCX = Column(Boolean)
+    RCA = Column(Boolean)
+    recorded_at = Column(DateTime, default=utcnow)
+    __table_args__ = (
+        Index("ix_lesions_flags", "LAD", "LCX", "RCA"),
+        Index("ix_lesions_patient_recorded", "patient_id", "recorded_at"),
+    )
+    patient = relationship(Patient)
+
+class Vessel(Base):
+    __tablename__ = "vessels"
+    vessel_id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.patient_id"), index=True)
+    num_vessels = Column(Integer)
+    angioplasty = Column(Boolean)
+    imaging = Column(String)
+    recorded_at = Column(DateTime, default=utcnow)
+    __table_args__ = (
+        Index("ix_vessels_flags", "angioplasty", "imaging"),
+        Index("ix_vessels_patient_recorded", "patient_id", "recorded_at"),
+    )
+    patient = relationship(Patient)
+
+class PCI(Base):
+    __tablename__ = "pci"
+    pci_id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.patient_id"), index=True)
+    balloon = Column(Boolean)
+    IVL = Column(Boolean)
+    ROTA = Column(Boolean)
+    recorded_at = Column(DateTime, default=utcnow)
+    __table_args__ = (
+        Index("ix_pci_flags", "balloon", "IVL", "ROTA"),
+        Index("ix_pci_patient_recorded", "patient_id", "recorded_at"),
+    )
+    patient = relationship(Patient)
+
+class CohortStat(Base):
+    # Running counters behind the "Στατιστικά" page, kept up to date by the
+    # triggers in stats.py: n rows and the sum of one value per (metric, bucket).
+    __tablename__ = "cohort_stats"
+    metric = Column(String, primary_key=True)
+    bucket = Column(String, primary_key=True)
+    n = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0.0)
+
+class PatientSummary(Base):
+    # One wide row per patient: the patient and the first row of each related
+    # table, kept in step by the triggers in summary.py.
+    __tablename__ = "patient_summary"
+    patient_id = Column(Integer, primary_key=True)
+    first_name = Column(String)
+    last_name = Column(String)
+    age = Column(Integer)
+    medical_history = Column(String)
+    history_id = Column(Integer)
+    gender = Column(String)
+    hypertension = Column(Boolean)
+    smoking = Column(Boolean)
+    diabetes = Column(String)
+    hereditary = Column(Boolean)
+    BMI = Column(Float)
+    atrial_fibrillation = Column(Boolean)
+    lesion_id = Column(Integer)
+    LAD = Column(Boolean)
+    LCX = Column(Boolean)
+    RCA = Column(Boolean)
+    vessel_id = Column(Integer)
+    num_vessels = Column(Integer)
+    angioplasty = Column(Boolean)
+    imaging = Column(String)
+    pci_id = Column(Integer)
+    balloon = Column(Boolean)
+    IVL = Column(Boolean)
+    ROTA = Column(Boolean)
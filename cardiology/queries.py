@@ -0,0 +1,315 @@
+"""Set-based read queries behind the Streamlit pages.
+
+Every patient row is joined to the *first* row (lowest primary key) of each
+related table, which is what the old per-patient ``filter_by(...).first()``
+lookups returned, so the pages keep showing exactly the same data.  The
+full-data and search pages read that join pre-computed, one row per patient,
+from ``patient_summary`` (see summary.py).  A patient's other rows are on the
+timeline (all rows by recorded_at) and in ``latest_query`` (the latest row).
+"""
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+from .models import Patient, PatientSummary as Summary, MedicalHistory, Lesion, Vessel, PCI
+
+RELATED_MODELS = (MedicalHistory, Lesion, Vessel, PCI)
+
+FULL_DATA_COLUMNS = (
+    "ID", "Όνομα", "Επώνυμο", "Ηλικία", "Ιστορικό",
+    "Φύλο", "Υπέρταση", "Κάπνισμα", "Διαβήτης", "Κληρονομικότητα",
+    "Κολπική Μαρμαρυγή", "BMI", "LAD", "LCX", "RCA",
+    "Αρ. Αγγείων", "Αγγειοπλαστική", "Απεικόνιση", "Balloon", "IVL", "ROTA",
+)
+
+
+def yes_no(value):
+    return "ΝΑΙ" if value else "ΟΧΙ"
+
+
+def _primary_key(model):
+    return model.__mapper__.primary_key[0]
+
+
+def joined_select(*columns):
+    """SELECT ``columns`` FROM patients LEFT JOIN the first row of each related table."""
+    stmt = select(*columns).select_from(Patient)
+    for model in RELATED_MODELS:
+        pk = _primary_key(model)
+        first = aliased(model)
+        first_id = (
+            select(func.min(getattr(first, pk.key)))
+            .where(first.patient_id == Patient.patient_id)
+            .correlate(Patient)
+            .scalar_subquery()
+        )
+        stmt = stmt.outerjoin(model, pk == first_id)
+    return stmt
+
+
+# === Πλήρη Δεδομένα ===
+FULL_DATA_SELECT = (
+    Summary.patient_id, Summary.first_name, Summary.last_name, Summary.age, Summary.medical_history,
+    Summary.history_id, Summary.gender, Summary.hypertension,
+    Summary.smoking, Summary.diabetes, Summary.hereditary,
+    Summary.atrial_fibrillation, Summary.BMI,
+    Summary.LAD, Summary.LCX, Summary.RCA,
+    Summary.vessel_id, Summary.num_vessels, Summary.angioplasty, Summary.imaging,
+    Summary.balloon, Summary.IVL, Summary.ROTA,
+)
+
+
+def full_data_query():
+    return select(*FULL_DATA_SELECT).order_by(Summary.patient_id)
+
+
+def full_data_row(r):
+    has_h = r.history_id is not None
+    has_v = r.vessel_id is not None
+    return {
+        "ID": r.patient_id,
+        "Όνομα": r.first_name,
+        "Επώνυμο": r.last_name,
+        "Ηλικία": r.age,
+        "Ιστορικό": r.medical_history,
+        "Φύλο": r.gender if has_h else "",
+        "Υπέρταση": yes_no(r.hypertension),
+        "Κάπνισμα": yes_no(r.smoking),
+        "Διαβήτης": r.diabetes if has_h else "",
+        "Κληρονομικότητα": yes_no(r.hereditary),
+        "Κολπική Μαρμαρυγή": yes_no(r.atrial_fibrillation),
+        "BMI": r.BMI if has_h else "",
+        "LAD": yes_no(r.LAD),
+        "LCX": yes_no(r.LCX),
+        "RCA": yes_no(r.RCA),
+        "Αρ. Αγγείων": r.num_vessels if has_v else "",
+        "Αγγειοπλαστική": yes_no(r.angioplasty),
+        "Απεικόνιση": r.imaging if has_v else "",
+        "Balloon": yes_no(r.balloon),
+        "IVL": yes_no(r.IVL),
+        "ROTA": yes_no(r.ROTA),
+    }
+
+
+def load_full_data(db):
+    """All patients with their clinical data, in a single query."""
+    return [full_data_row(r) for r in db.execute(full_data_query())]
+
+
+# === Αναζήτηση με Κριτήρια ===
+# Criteria names are the query parameters app_standalone_full.py sends to
+# /search_patients/; empty, zero or False values mean "any".
+SEARCH_EQUALS = {
+    "age": Summary.age,
+    "gender": Summary.gender,
+    "diabetes": Summary.diabetes,
+    "imaging": Summary.imaging,
+}
+SEARCH_FLAGS = {
+    name: getattr(Summary, name)
+    for name in ("hypertension", "smoking", "atrial_fibrillation", "LAD", "LCX", "RCA",
+                 "balloon", "IVL", "ROTA", "angioplasty")
+}
+SEARCH_CRITERIA = (*SEARCH_EQUALS, *SEARCH_FLAGS, "min_vessels")
+
+SEARCH_SELECT = (
+    Summary.patient_id, Summary.first_name, Summary.last_name, Summary.age,
+    Summary.history_id, Summary.gender, Summary.diabetes,
+    Summary.vessel_id, Summary.num_vessels, Summary.balloon,
+)
+
+
+def search_conditions(criteria):
+    """Translate the selected criteria into a list of SQL WHERE clauses."""
+    conditions = []
+    for name, column in SEARCH_EQUALS.items():
+        if criteria.get(name):
+            conditions.append(column == criteria[name])
+    for name, column in SEARCH_FLAGS.items():
+        if criteria.get(name):
+            conditions.append(column)
+    if criteria.get("min_vessels"):
+        conditions.append(Summary.num_vessels >= criteria["min_vessels"])
+    return conditions
+
+
+def search_query(criteria):
+    return select(*SEARCH_SELECT).where(*search_conditions(criteria)).order_by(Summary.patient_id)
+
+
+SEARCH_COLUMNS = ("ID", "Όνομα", "Επώνυμο", "Ηλικία", "Φύλο", "Διαβήτης", "Αρ. Αγγείων", "Balloon")
+
+
+def search_row(r):
+    return {
+        "ID": r.patient_id,
+        "Όνομα": r.first_name,
+        "Επώνυμο": r.last_name,
+        "Ηλικία": r.age,
+        "Φύλο": r.gender if r.history_id is not None else "",
+        "Διαβήτης": r.diabetes if r.history_id is not None else "",
+        "Αρ. Αγγείων": r.num_vessels if r.vessel_id is not None else "",
+        "Balloon": yes_no(r.balloon),
+    }
+
+
+SEARCH_CHUNK_SIZE = 5000
+
+
+def search_patients(db, criteria, progress=None):
+    """Patients matching every selected criterion, filtered by the database.
+
+    With ``progress``, the rows are read SEARCH_CHUNK_SIZE at a time and
+    ``progress(rows)`` is called after each chunk (see jobs.py).
+    """
+    if progress is None:
+        return [search_row(r) for r in db.execute(search_query(criteria))]
+    rows = []
+    result = db.execute(search_query(criteria), execution_options={"yield_per": SEARCH_CHUNK_SIZE})
+    for partition in result.partitions():
+        rows.extend(search_row(r) for r in partition)
+        progress(len(rows))
+    return rows
+
+
+# === Σελιδοποίηση (keyset) ===
+# Pages are addressed by the last patient_id already shown, so every page is
+# one indexed range scan (patient_id > after_id ... LIMIT n) however deep it is.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+
+def patients_page_query(after_id=0, limit=DEFAULT_PAGE_SIZE):
+    return (
+        select(Patient)
+        .where(Patient.patient_id > after_id)
+        .order_by(Patient.patient_id)
+        .limit(limit)
+    )
+
+
+def list_patients_page(db, after_id=0, limit=DEFAULT_PAGE_SIZE):
+    return [
+        {"ID": p.patient_id, "Όνομα": p.first_name, "Επώνυμο": p.last_name, "Ηλικία": p.age}
+        for p in db.scalars(patients_page_query(after_id, limit))
+    ]
+
+
+def full_data_page_query(after_id=0, limit=DEFAULT_PAGE_SIZE):
+    return full_data_query().where(Summary.patient_id > after_id).limit(limit)
+
+
+def full_data_page(db, after_id=0, limit=DEFAULT_PAGE_SIZE):
+    return [full_data_row(r) for r in db.execute(full_data_page_query(after_id, limit))]
+
+
+# === Χρονολόγιο ===
+# Every related row carries recorded_at; rows from before the column have
+# none and count as older than any recorded row.  The registry pages above
+# keep showing each patient's first row, the timeline shows them all.
+RECORD_KINDS = {MedicalHistory: "Ιατρικό Ιστορικό", Lesion: "Βλάβες", Vessel: "Αγγεία", PCI: "PCI"}
+DETAIL_FLAGS = {
+    MedicalHistory: {"hypertension": "Υπέρταση", "smoking": "Κάπνισμα", "hereditary": "Κληρονομικότητα",
+                     "atrial_fibrillation": "Κολπική Μαρμαρυγή"},
+    Lesion: {"LAD": "LAD", "LCX": "LCX", "RCA": "RCA"},
+    Vessel: {"angioplasty": "Αγγειοπλαστική"},
+    PCI: {"balloon": "Balloon", "IVL": "IVL", "ROTA": "ROTA"},
+}
+
+
+def record_details(record):
+    """One-line description of a related row, e.g. "Male, Υπέρταση, Διαβήτης Type 2, BMI 27.5"."""
+    parts = []
+    if isinstance(record, MedicalHistory) and record.gender:
+        parts.append(record.gender)
+    if isinstance(record, Vessel) and record.num_vessels is not None:
+        parts.append(f"{record.num_vessels} αγγεία")
+    parts += [label for name, label in DETAIL_FLAGS[type(record)].items() if getattr(record, name)]
+    if isinstance(record, MedicalHistory):
+        if record.diabetes and record.diabetes != "None":
+            parts.append(f"Διαβήτης {record.diabetes}")
+        if record.BMI is not None:
+            parts.append(f"BMI {record.BMI}")
+    if isinstance(record, Vessel) and record.imaging and record.imaging != "NONE":
+        parts.append(record.imaging)
+    return ", ".join(parts) or "—"
+
+
+def recorded(record):
+    return record.recorded_at.strftime("%Y-%m-%d %H:%M") if record.recorded_at else "—"
+
+
+def timeline_query(model, patient_id):
+    return (
+        select(model)
+        .where(model.patient_id == patient_id)
+        .order_by(model.recorded_at, _primary_key(model))
+    )
+
+
+def patient_timeline(db, patient_id):
+    """All the patient's records of the four tables, oldest first (one indexed range per table)."""
+    records = [r for model in RELATED_MODELS for r in db.scalars(timeline_query(model, patient_id))]
+    records.sort(key=lambda r: r.recorded_at or datetime.min)  # stable: ties keep table and ID order
+    return [
+        {"Ημερομηνία": recorded(r), "Εγγραφή": RECORD_KINDS[type(r)],
+         "ID": getattr(r, _primary_key(type(r)).key), "Στοιχεία": record_details(r)}
+        for r in records
+    ]
+
+
+def latest_id(model):
+    """Correlated subquery: the primary key of the patient's latest ``model`` row.
+
+    One backward step in the covering (patient_id, recorded_at) index.
+    """
+    latest = aliased(model)
+    pk = getattr(latest, _primary_key(model).key)
+    return (
+        select(pk)
+        .where(latest.patient_id == Patient.patient_id)
+        .order_by(latest.recorded_at.desc(), pk.desc())
+        .limit(1)
+        .correlate(Patient)
+        .scalar_subquery()
+    )
+
+
+def latest_query(model):
+    """Every patient's latest ``model`` row, in patient order (patients without one are left out).
+
+    Set-based: one statement over patients with an index lookup each, about
+    5x faster than ranking all rows with ``row_number() OVER (PARTITION BY
+    patient_id ...)``, which sorts the whole table (benchmarks/timeline.py).
+    """
+    return (
+        select(model)
+        .select_from(Patient)
+        .join(model, _primary_key(model) == latest_id(model))
+        .order_by(Patient.patient_id)
+    )
+
+
+def latest_page_query(model, after_id=0, limit=DEFAULT_PAGE_SIZE):
+    """``latest_query`` for the next ``limit`` patients after ``after_id``, with each one's row count."""
+    records = (
+        select(func.count())
+        .select_from(model)
+        .where(model.patient_id == Patient.patient_id)
+        .correlate(Patient)
+        .scalar_subquery()
+    )
+    return (
+        latest_query(model)
+        .add_columns(records.label("records"))
+        .where(Patient.patient_id > after_id)
+        .limit(limit)
+    )
+
+
+def latest_page(db, model, after_id=0, limit=DEFAULT_PAGE_SIZE):
+    return [
+        {"ID": r.patient_id, "Ημερομηνία": recorded(r), "Εγγραφές": records, "Στοιχεία": record_details(r)}
+        for r, records in db.execute(latest_page_query(model, after_id, limit))
+    ]
@@ -0,0 +1,292 @@
+"""Read/write routing: long reads on a snapshot of the database.
+
+The full-data view, the criteria search and the exports read the whole
+registry.  ``read_engine`` and ``read_session`` route them to a read-only
+snapshot of the primary database, so they do not share its connections
+with the clinicians' inserts.  Writes, and everything else, keep using
+``db.get_engine`` / ``db.session_scope``.
+
+The snapshot is a copy made with SQLite's online backup API.  The copy is
+one step: in WAL mode it holds only a read transaction on the primary, so
+writers carry on.  A step-wise copy would start over after every write.
+Each refresh writes a new file and swaps the engine.  The file before the
+previous one is deleted then.
+
+Staleness bounds, in seconds:
+
+- REFRESH_AFTER: a read that finds the snapshot older than this starts a
+  refresh in the background and still reads the current snapshot.  If
+  nothing was committed since the copy (this process's writes, and
+  db.external_changes for other processes), no copy is made: the snapshot
+  is simply as fresh as the primary again;
+- MAX_STALENESS: a snapshot older than this is not read at all, and reads
+  fall back to the primary until the refresh is done.  0 disables the
+  snapshot.
+
+Reads also fall back to the primary before the first snapshot exists,
+after a failed refresh, and for databases that cannot be copied (not
+SQLite, or in memory).  Results cached from a snapshot (cache.py) are
+dropped when a newer one replaces it if anything was written in between.
+
+    python -m cardiology.replica    # time one refresh (the copy is removed on exit)
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from . import cache
+from .db import (
+    DATABASE_URL, PRAGMA_PROFILE, PRAGMA_PROFILES, apply_pragmas, external_changes, get_engine, local_writes,
+)
+from .metrics import instrument
+
+log = logging.getLogger(__name__)
+
+REFRESH_AFTER = float(os.environ.get("CARDIOLOGY_REPLICA_REFRESH_AFTER", 30))
+MAX_STALENESS = float(os.environ.get("CARDIOLOGY_REPLICA_MAX_STALENESS", 300))
+# Default: next to the primary, so the copy has the same owner and permissions.
+REPLICA_DIR = os.environ.get("CARDIOLOGY_REPLICA_DIR")
+
+# The primary's PRAGMAs that matter to a read-only connection.
+READ_PRAGMAS = ("mmap_size", "cache_size", "temp_store")
+
+
+def snapshot_path(url):
+    """The primary's file for a SQLite URL, or None if it cannot be copied."""
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:") or url.query.get("uri"):
+        return None
+    return Path(url.database).resolve()
+
+
+class Replica:
+    """The current snapshot of one primary database and its refreshes."""
+
+    def __init__(self, url=DATABASE_URL, refresh_after=REFRESH_AFTER,
+                 max_staleness=MAX_STALENESS, directory=REPLICA_DIR):
+        self.url = url
+        self.refresh_after = refresh_after
+        self.max_staleness = max_staleness
+        self.source = snapshot_path(url) if max_staleness > 0 else None
+        self.directory = Path(directory) if directory else self.source and self.source.parent
+        self.pragmas = {k: v for k, v in PRAGMA_PROFILES[PRAGMA_PROFILE].items() if k in READ_PRAGMAS}
+        self.engine = None        # engine of the current snapshot
+        self.path = None
+        self.taken_at = None      # time.monotonic() when its copy started
+        self.attempted_at = None  # same, for the last refresh, successful or not
+        self.generation = 0
+        self.refreshes = self.failures = self.fallbacks = self.unchanged = 0
+        self.last_error = None
+        self.last_seconds = None
+        self._written = None      # db.local_writes the current snapshot includes
+        self._external = None     # and db.external_changes
+        self._retired = []        # files of replaced snapshots not deleted yet
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    def age(self):
+        return None if self.taken_at is None else time.monotonic() - self.taken_at
+
+    def refresh(self):
+        """Take a new snapshot now; False if one is already being taken or the copy failed."""
+        if self.source is None or not self._refreshing.acquire(blocking=False):
+            return False
+        try:
+            return self._refresh()
+        finally:
+            self._refreshing.release()
+
+    def _refresh(self):
+        self.generation += 1
+        path = self.directory / f"{self.source.stem}.replica-{os.getpid()}-{self.generation}.db"
+        started, written = time.monotonic(), local_writes()
+        external = external_changes(get_engine(self.url))
+        self.attempted_at = started
+        try:
+            self._copy(path)
+        except Exception as exc:
+            self.failures += 1
+            self.last_error = repr(exc)
+            log.warning("replica refresh of %s failed: %r", self.source, exc)
+            _unlink(path)
+            return False
+        engine = self._engine(path)
+        with self._lock:
+            old_engine, old_path, old_written = self.engine, self.path, self._written
+            self.engine, self.path, self.taken_at, self._written = engine, path, started, written
+            self._external = external
+        if old_written is not None and old_written != written:
+            cache.result_cache.bump()  # cached results may come from the old snapshot
+        if old_engine is not None:
+            old_engine.dispose()
+            self._retired.append(old_path)
+        # The previous file stays one more round for a reader that took its engine just before the swap.
+        self._retired = [p for p in self._retired[:-1] if not _unlink(p)] + self._retired[-1:]
+        self._sweep()
+        self.refreshes += 1
+        self.last_error = None
+        self.last_seconds = time.monotonic() - started
+        return True
+
+    def _sweep(self):
+        # Snapshots left by processes that did not exit cleanly.  No process
+        # reads a snapshot older than max_staleness (see current).
+        cutoff = time.time() - self.max_staleness
+        for path in self.directory.glob(f"{self.source.stem}.replica-*.db"):
+            if not path.name.startswith(f"{self.source.stem}.replica-{os.getpid()}-"):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        _unlink(path)
+                except OSError:
+                    pass
+
+    def _copy(self, path):
+        primary = get_engine(self.url)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = sqlite3.connect(path)
+        try:
+            raw = primary.raw_connection()
+            try:
+                raw.driver_connection.backup(target)  # one step, see the module docstring
+            finally:
+                raw.close()
+            # No -wal/-shm files next to the snapshot: it is opened immutable.
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+
+    def _engine(self, path):
+        # immutable: SQLite takes no locks on the file and never checks it for changes.
+        engine = create_engine(f"sqlite:///{path.as_uri()}?mode=ro&immutable=1&uri=true",
+                               connect_args={"check_same_thread": False})
+        apply_pragmas(engine, self.pragmas)
+        instrument(engine)
+        return engine
+
+    def current(self):
+        """The snapshot's engine if it is fresh enough, else None (read the primary).
+
+        Starts a background refresh when the last one began more than
+        refresh_after seconds ago, so a failing copy is retried at that pace.
+        """
+        if self.source is None:
+            return None
+        with self._lock:
+            engine, path, age = self.engine, self.path, self.age()
+        if path is not None and not path.exists():
+            age = None  # removed by another process (see _sweep)
+        now = time.monotonic()
+        due = self.attempted_at is None or now - self.attempted_at > self.refresh_after
+        if due and not self._refreshing.locked():
+            if engine is not None and age is not None and not self._changed():
+                with self._lock:
+                    self.attempted_at = self.taken_at = now  # still identical to the primary
+                try:
+                    os.utime(path)  # not old to the other processes' _sweep either
+                except OSError:
+                    pass
+                self.unchanged += 1
+                age = 0.0
+            else:
+                threading.Thread(target=self.refresh, name="replica-refresh", daemon=True).start()
+        if age is None or age > self.max_staleness:
+            self.fallbacks += 1
+            return None
+        return engine
+
+    def _changed(self):
+        """Whether anything was committed to the primary since the current copy began."""
+        return (local_writes() != self._written
+                or external_changes(get_engine(self.url)) != self._external)
+
+    def close(self):
+        with self._lock:
+            engine, self.engine, self.taken_at = self.engine, None, None
+        if engine is not None:
+            engine.dispose()
+            self._retired.append(self.path)
+        self._retired = [p for p in self._retired if not _unlink(p)]
+
+    def stats(self):
+        age = self.age()
+        return {
+            "enabled": self.source is not None,
+            "snapshot": str(self.path) if self.path else None,
+            "age_s": round(age, 1) if age is not None else None,
+            "refresh_after_s": self.refresh_after,
+            "max_staleness_s": self.max_staleness,
+            "refreshes": self.refreshes,
+            "unchanged": self.unchanged,
+            "last_refresh_s": round(self.last_seconds, 3) if self.last_seconds is not None else None,
+            "failures": self.failures,
+            "fallbacks": self.fallbacks,
+            "last_error": self.last_error,
+        }
+
+
+def _unlink(path):
+    """Delete ``path`` if it exists; False if it is still in use (Windows keeps open files)."""
+    try:
+        path.unlink(missing_ok=True)
+    except OSError:
+        return False
+    return True
+
+
+def get_replica(url=DATABASE_URL):
+    """One replica per primary database URL and process."""
+    return _replica(url)
+
+
+@lru_cache(maxsize=None)
+def _replica(url):
+    replica = Replica(url)
+    import atexit
+    atexit.register(replica.close)
+    return replica
+
+
+def read_engine(url=DATABASE_URL):
+    """Engine for read-only work: the snapshot when fresh enough, else the primary."""
+    primary = get_engine(url)  # migrated here, not in the refresh thread
+    return get_replica(url).current() or primary
+
+
+@contextmanager
+def read_session(url=DATABASE_URL):
+    """A read-only session (see read_engine) for one script run; always closed."""
+    db = Session(bind=read_engine(url), autoflush=False)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Στιγμιότυπο της βάσης για αναγνώσεις")
+    parser.add_argument("--database", default=DATABASE_URL)
+    args = parser.parse_args(argv)
+
+    replica = get_replica(args.database)
+    if replica.source is None:
+        print(f"{args.database}: no snapshot (not a SQLite file, or CARDIOLOGY_REPLICA_MAX_STALENESS=0)")
+        return 1
+    ok = replica.refresh()
+    print(json.dumps(replica.stats(), indent=2))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
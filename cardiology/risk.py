@@ -0,0 +1,332 @@
+"""Cardiovascular risk score for every patient, computed with NumPy over the whole registry.
+
+The score adds up points from the patient's summary row (the first row of
+each related table, as everywhere else):
+
+- age: one point per AGE_STEP years over AGE_FROM, at most AGE_MAX_POINTS;
+- BMI: BMI_POINTS for overweight and obesity;
+- hypertension, smoking, hereditary, atrial fibrillation and diseased
+  LAD/LCX/RCA: FLAG_POINTS each;
+- diabetes: DIABETES_POINTS;
+- vessels: one point per vessel beyond the first, at most VESSEL_MAX_POINTS.
+
+Missing data scores no points.  The score ranks the registry for review;
+it is not a validated clinical risk model.
+
+The scores live in memory, one int8 per patient ID (-1: no such patient).
+SQLite packs each patient's inputs into one integer, so loading a million
+patients means a million pairs of integers rather than rows of eleven
+values.  The points then come from array arithmetic and lookup tables,
+with no Python loop per patient.  Writes reach the scores like the bitmap
+index (bitmap.PATIENT_INDEXES): only the patients a commit touched are
+re-read and re-scored before the next lookup, and a commit from another
+process (db.external_changes) reloads every score.
+
+    python -m cardiology.risk              # build and time it
+    python -m cardiology.risk --verify     # compare with a per-patient computation
+"""
+import itertools
+import threading
+
+from sqlalchemy import select
+
+from .bitmap import PATIENT_INDEXES
+from .db import external_changes
+from .models import PatientSummary
+from .queries import SEARCH_CHUNK_SIZE, full_data_query, full_data_row, search_patients, search_query, search_row
+
+RISK_COLUMN = "Κίνδυνος"
+
+AGE_FROM, AGE_STEP, AGE_MAX_POINTS = 40, 5, 8
+BMI_POINTS = ((25.0, 1), (30.0, 2))  # (from BMI, points), ascending
+FLAG_POINTS = {
+    "hypertension": 2,
+    "smoking": 2,
+    "hereditary": 1,
+    "atrial_fibrillation": 1,
+    "LAD": 2,
+    "LCX": 1,
+    "RCA": 1,
+}
+DIABETES_POINTS = {"Type 1": 2, "Type 2": 2}
+VESSEL_MAX_POINTS = 2
+MAX_SCORE = (AGE_MAX_POINTS + BMI_POINTS[-1][1] + sum(FLAG_POINTS.values()) + max(DIABETES_POINTS.values())
+             + VESSEL_MAX_POINTS)
+
+REFRESH_CHUNK = 500
+REBUILD_THRESHOLD = 50_000  # more pending patients than this: rebuild instead
+
+# Packed inputs, from the lowest bit: age (8 bits), one bit per flag,
+# diabetes (2 bits: 0 or its position in DIABETES_POINTS), vessels (4 bits),
+# then BMI in tenths.
+_FLAGS_SHIFT = 8
+_DIABETES_SHIFT = _FLAGS_SHIFT + len(FLAG_POINTS)
+_VESSELS_SHIFT = _DIABETES_SHIFT + 2
+_BMI_SHIFT = _VESSELS_SHIFT + 4
+
+
+def packed_sql(where=""):
+    """SELECT patient_id and the packed inputs from patient_summary."""
+    flags = " + ".join(f"(coalesce({name}, 0) << {bit})" for bit, name in enumerate(FLAG_POINTS))
+    diabetes = " ".join(f"WHEN '{value}' THEN {code}" for code, value in enumerate(DIABETES_POINTS, 1))
+    return (
+        f"SELECT patient_id, min(max(coalesce(age, 0), 0), 255)"
+        f" | (({flags}) << {_FLAGS_SHIFT})"
+        f" | (CASE diabetes {diabetes} ELSE 0 END << {_DIABETES_SHIFT})"
+        f" | (min(max(coalesce(num_vessels, 0), 0), 15) << {_VESSELS_SHIFT})"
+        f" | (CAST(round(max(coalesce(BMI, 0), 0) * 10) AS INTEGER) << {_BMI_SHIFT})"
+        f" FROM {PatientSummary.__tablename__}{where}"
+    )
+
+
+def _lookup_tables():
+    import numpy as np  # deferred like in bitmap.py: only needed once scores are used
+
+    flags = np.arange(1 << len(FLAG_POINTS))
+    flag_points = sum(((flags >> bit) & 1) * points for bit, points in enumerate(FLAG_POINTS.values()))
+    diabetes_points = [0, *DIABETES_POINTS.values()]
+    return flag_points.astype(np.int8), np.array(diabetes_points, dtype=np.int8)
+
+
+def score_packed(packed):
+    """int64 array of packed inputs -> int8 array of scores."""
+    import numpy as np
+
+    flag_points, diabetes_points = _lookup_tables()
+    age = packed & 0xFF
+    bmi10 = packed >> _BMI_SHIFT
+    score = np.clip((age - AGE_FROM) // AGE_STEP, 0, AGE_MAX_POINTS).astype(np.int8)
+    score += flag_points[(packed >> _FLAGS_SHIFT) & ((1 << len(FLAG_POINTS)) - 1)]
+    score += diabetes_points[(packed >> _DIABETES_SHIFT) & 0x3]
+    score += np.clip(((packed >> _VESSELS_SHIFT) & 0xF) - 1, 0, VESSEL_MAX_POINTS).astype(np.int8)
+    score += np.select([bmi10 >= round(bmi * 10) for bmi, _ in reversed(BMI_POINTS)],
+                       [points for _, points in reversed(BMI_POINTS)], 0).astype(np.int8)
+    return score
+
+
+def score_row(row):
+    """One patient's score, computed the plain way (for verify)."""
+    points = min(max(((row.age or 0) - AGE_FROM) // AGE_STEP, 0), AGE_MAX_POINTS)
+    bmi10 = int(max(row.BMI or 0, 0) * 10 + 0.5)  # rounded like SQLite's round()
+    points += next((p for bmi, p in reversed(BMI_POINTS) if bmi10 >= round(bmi * 10)), 0)
+    points += sum(p for name, p in FLAG_POINTS.items() if getattr(row, name))
+    points += DIABETES_POINTS.get(row.diabetes, 0)
+    points += min(max((row.num_vessels or 0) - 1, 0), VESSEL_MAX_POINTS)
+    return points
+
+
+def load(conn, patient_ids=None):
+    """(patient IDs, scores) as numpy arrays, for every patient or for ``patient_ids``."""
+    import numpy as np
+
+    where = ""
+    if patient_ids is not None:
+        where = f" WHERE patient_id IN ({', '.join(str(int(i)) for i in patient_ids)})"
+    # The DBAPI cursor's plain tuples: SQLAlchemy Row objects would take
+    # ten times longer to turn into an array than the query itself.
+    cursor = conn.connection.driver_connection.cursor()
+    try:
+        rows = cursor.execute(packed_sql(where)).fetchall()
+    finally:
+        cursor.close()
+    pairs = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64, count=2 * len(rows)).reshape(-1, 2)
+    return pairs[:, 0], score_packed(pairs[:, 1])
+
+
+class RiskIndex:
+    def __init__(self):
+        self.engine = None
+        self.scores = None
+        self._ranked = None
+        self._pending = set()
+        self._stale = True
+        self._external = None  # external_changes() as of the last build
+        self._lock = threading.RLock()
+
+    # --- maintenance ---
+    def rebuild(self, engine):
+        import numpy as np
+
+        with self._lock:
+            self._external = external_changes(engine)
+            with engine.connect() as conn:
+                self._pending.clear()
+                ids, scores = load(conn)
+            self.scores = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int8)
+            self.scores[ids] = scores
+            self.engine = engine
+            self._ranked = None
+            self._stale = False
+
+    def _refresh(self, patient_ids):
+        """Re-score ``patient_ids`` (deleted ones become -1)."""
+        import numpy as np
+
+        ids = np.fromiter(patient_ids, dtype=np.int64)
+        if ids.max() >= len(self.scores):
+            self.scores = np.concatenate([self.scores, np.full(int(ids.max()) + 1 - len(self.scores), -1, np.int8)])
+        self.scores[ids] = -1
+        with self.engine.connect() as conn:
+            for start in range(0, len(ids), REFRESH_CHUNK):
+                found, scores = load(conn, ids[start:start + REFRESH_CHUNK])
+                self.scores[found] = scores
+        self._ranked = None
+
+    def invalidate(self, patient_ids=None):
+        """Schedule ``patient_ids`` for re-scoring, or every patient if None."""
+        with self._lock:
+            if patient_ids is None:
+                self._stale = True
+            else:
+                self._pending.update(patient_ids)
+
+    def sync(self, engine):
+        with self._lock:
+            if external_changes(engine) != self._external:
+                self._stale = True  # another process wrote (see bitmap.BitmapIndex.sync)
+            if self._stale or engine is not self.engine or len(self._pending) > REBUILD_THRESHOLD:
+                self.rebuild(engine)
+            elif self._pending:
+                pending, self._pending = self._pending, set()
+                self._refresh(pending)
+
+    # --- lookups ---
+    def lookup(self, engine, patient_ids):
+        """Scores of ``patient_ids`` (an array or list), -1 for unknown IDs."""
+        import numpy as np
+
+        ids = np.asarray(patient_ids, dtype=np.int64)
+        with self._lock:
+            self.sync(engine)
+            scores = np.full(len(ids), -1, dtype=np.int8)
+            known = ids < len(self.scores)
+            scores[known] = self.scores[ids[known]]
+            return scores
+
+    def at_least(self, engine, min_score):
+        """IDs of the patients scoring ``min_score`` or more, ascending."""
+        import numpy as np
+
+        with self._lock:
+            self.sync(engine)
+            return np.flatnonzero(self.scores >= max(min_score, 0))
+
+    def ranked(self, engine):
+        """Every patient ID, highest score first (ties by ID); kept until the scores change."""
+        import numpy as np
+
+        with self._lock:
+            self.sync(engine)
+            if self._ranked is None:
+                ids = np.flatnonzero(self.scores >= 0)
+                # Stable sort on the negated int8 scores (radix sort): ties stay in ID order.
+                self._ranked = ids[np.argsort(-self.scores[ids], kind="stable")]
+            return self._ranked
+
+    def stats(self):
+        with self._lock:
+            scored = 0 if self.scores is None else int((self.scores >= 0).sum())
+            return {
+                "patients": scored,
+                "bytes": 0 if self.scores is None else self.scores.nbytes,
+                "pending": len(self._pending),
+                "stale": self._stale,
+            }
+
+    # --- consistency check ---
+    def verify(self, engine, limit=20):
+        """IDs of up to ``limit`` patients whose score differs from score_row."""
+        differing = []
+        with engine.connect() as conn:
+            rows = conn.execute(select(PatientSummary).execution_options(yield_per=10000))
+            for partition in rows.partitions():
+                ids = [r.patient_id for r in partition]
+                expected = [score_row(r) for r in partition]
+                for patient_id, score, want in zip(ids, self.lookup(engine, ids), expected):
+                    if score != want:
+                        differing.append(patient_id)
+                if len(differing) >= limit:
+                    break
+        return differing[:limit]
+
+
+risk_index = RiskIndex()
+PATIENT_INDEXES.append(risk_index)
+
+
+# === Στήλη «Κίνδυνος» στους πίνακες ===
+def with_scores(engine, rows):
+    """Copies of ``rows`` (dicts with "ID") with the RISK_COLUMN added."""
+    scores = risk_index.lookup(engine, [row["ID"] for row in rows])
+    return [{**row, RISK_COLUMN: int(score)} for row, score in zip(rows, scores)]
+
+
+def count_at_least(engine, patient_ids, min_score):
+    """How many of ``patient_ids`` score ``min_score`` or more."""
+    return int((risk_index.lookup(engine, patient_ids) >= min_score).sum())
+
+
+def search_at_least(db, engine, criteria, min_score=0, progress=None):
+    """search_patients rows with their score, for the patients scoring ``min_score`` or more.
+
+    With a minimum, the candidates come from the scores first and only their
+    rows are read, SEARCH_CHUNK_SIZE IDs at a time (``progress`` as in
+    search_patients).
+    """
+    if min_score <= 0:
+        return with_scores(engine, search_patients(db, criteria, progress=progress))
+    ids = risk_index.at_least(engine, min_score)
+    rows = []
+    for start in range(0, len(ids), SEARCH_CHUNK_SIZE):
+        chunk = ids[start:start + SEARCH_CHUNK_SIZE].tolist()
+        stmt = search_query(criteria).where(PatientSummary.patient_id.in_(chunk))
+        rows.extend(search_row(r) for r in db.execute(stmt))
+        if progress:
+            progress(len(rows))
+    return with_scores(engine, rows)
+
+
+def ranked_page(db, engine, offset=0, limit=50):
+    """Full-data rows ordered by score, highest first (see offset_pager).
+
+    The ranking is the primary's (``engine``); rows ``db`` does not have yet
+    (a snapshot older than the ranking, see replica.py) are read from the
+    primary, so every page is full.
+    """
+    ids = risk_index.ranked(engine)[offset:offset + limit].tolist()
+    if not ids:
+        return []
+    stmt = full_data_query().where(PatientSummary.patient_id.in_(ids))
+    rows = {r.patient_id: r for r in db.execute(stmt)}
+    missing = [i for i in ids if i not in rows]
+    if missing:
+        with engine.connect() as conn:
+            rows.update((r.patient_id, r) for r in conn.execute(
+                full_data_query().where(PatientSummary.patient_id.in_(missing))))
+    return with_scores(engine, [full_data_row(rows[i]) for i in ids if i in rows])
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    from .db import DATABASE_URL, get_engine
+
+    parser = argparse.ArgumentParser(description="Βαθμός κινδύνου για όλους τους ασθενείς")
+    parser.add_argument("--database", default=DATABASE_URL)
+    parser.add_argument("--verify", action="store_true", help="compare every score with a per-patient computation")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(args.database)
+    start = time.perf_counter()
+    risk_index.rebuild(engine)
+    print(f"built in {time.perf_counter() - start:.2f}s: {risk_index.stats()}")
+    if args.verify:
+        differing = risk_index.verify(engine)
+        print("OK" if not differing else f"scores differ for patients {differing}")
+        return 1 if differing else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,375 @@
+"""Cohort statistics kept as running counters in the ``cohort_stats`` table.
+
+Every patient contributes its own row and the *first* row (lowest primary
+key) of each related table, as on every other page.  SQLite triggers add a
+row's contributions when it becomes a patient's first row and subtract
+them when it stops being one (deleted, or an earlier row inserted), and
+an age update moves the patient's age_by_diabetes counter, so the
+counters follow every writer: both apps, the API and the bulk import.  The
+"Στατιστικά" page reads the few hundred counter rows and never scans the
+registry.
+
+Each contribution is ``(metric, bucket, n, total)``: the bucket the row
+counts in, how much it adds to the count (1, or 0/1 for a flag) and to the
+bucket's running sum (e.g. BMI, for averages).
+
+Per-row triggers would make the bulk import several times slower, so it
+suspends them for its own transaction (``cohort_stats_control``, which also
+switches off the patient_summary and patient_search triggers) and adds each
+batch's counters with one set-based statement instead, from the batch's
+patient_summary rows.
+
+    python -m cardiology.stats --verify     # compare counters with a recount
+    python -m cardiology.stats --rebuild    # recount from scratch (repairs drift)
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import select
+
+from .models import CohortStat, Patient, PatientSummary, MedicalHistory, Lesion, Vessel, PCI
+
+RISK_FACTORS = ("hypertension", "smoking", "hereditary", "atrial_fibrillation")
+LESION_SITES = ("LAD", "LCX", "RCA")
+PCI_TECHNIQUES = ("balloon", "IVL", "ROTA")
+
+# {r} is the row reference in the generated SQL: NEW, OLD or a table alias.
+AGE_BUCKET = "printf('%d-%d', ({age} / 10) * 10, ({age} / 10) * 10 + 9)"
+BMI_BUCKET = (
+    "CASE WHEN {bmi} IS NULL THEN '—' WHEN {bmi} < 18.5 THEN '<18.5' WHEN {bmi} < 25 THEN '18.5-24.9' "
+    "WHEN {bmi} < 30 THEN '25-29.9' WHEN {bmi} < 35 THEN '30-34.9' ELSE '≥35' END"
+)
+PATIENT_AGE = "(SELECT age FROM patients WHERE patient_id = {r}.patient_id)"
+
+
+def _flag(column):
+    return f"(COALESCE({{r}}.{column}, 0) != 0)"
+
+
+def _label(column):
+    return f"COALESCE({{r}}.{column}, '—')"
+
+
+CONTRIBUTIONS = {
+    Patient: [
+        ("patients", "'all'", "1", "COALESCE({r}.age, 0)"),
+        ("age", AGE_BUCKET.format(age="{r}.age"), "1", "COALESCE({r}.age, 0)"),
+    ],
+    MedicalHistory: [
+        ("medical_history", "'all'", "1", "COALESCE({r}.BMI, 0)"),
+        *[("risk_factor", f"'{name}'", _flag(name), "0") for name in RISK_FACTORS],
+        ("gender", _label("gender"), "1", "0"),
+        ("bmi_by_diabetes", f"{_label('diabetes')} || '|' || {BMI_BUCKET.format(bmi='{r}.BMI')}",
+         "1", "COALESCE({r}.BMI, 0)"),
+        ("age_by_diabetes", f"{_label('diabetes')} || '|' || {AGE_BUCKET.format(age=PATIENT_AGE)}",
+         "1", f"COALESCE({PATIENT_AGE}, 0)"),
+    ],
+    Lesion: [
+        ("lesions", "'all'", "1", "0"),
+        *[("lesion_site", f"'{name}'", _flag(name), "0") for name in LESION_SITES],
+        ("lesion_pattern",
+         "COALESCE(NULLIF(rtrim(" + " || ".join(
+             f"CASE WHEN {_flag(name)} THEN '{name}+' ELSE '' END" for name in LESION_SITES
+         ) + ", '+'), ''), 'καμία')", "1", "0"),
+    ],
+    Vessel: [
+        ("vessels", "'all'", "1", "COALESCE({r}.num_vessels, 0)"),
+        ("num_vessels", "COALESCE(CAST({r}.num_vessels AS TEXT), '—')", "1", "0"),
+        ("imaging", _label("imaging"), "1", "0"),
+        ("angioplasty", "'angioplasty'", _flag("angioplasty"), "0"),
+    ],
+    PCI: [
+        ("pci", "'all'", "1", "0"),
+        *[("pci_technique", f"'{name}'", _flag(name), "0") for name in PCI_TECHNIQUES],
+    ],
+}
+
+# Contributions of related rows that depend on the patient's age (PATIENT_AGE):
+# the patients table's own triggers move them when the age changes.
+AGE_METRICS = {MedicalHistory: ("age_by_diabetes",)}
+
+CONTROL_TABLE = "cohort_stats_control"
+ACTIVE = f"(SELECT suspended FROM {CONTROL_TABLE}) = 0"
+
+UPSERT = (
+    "INSERT INTO cohort_stats (metric, bucket, n, total) SELECT metric, bucket, n, total FROM ({rows}) WHERE true "
+    "ON CONFLICT (metric, bucket) DO UPDATE SET n = n + excluded.n, total = total + excluded.total"
+)
+
+
+def _rows_sql(model, r, sign, source="", metrics=None):
+    """UNION ALL of the contributions of row ``r`` (NEW/OLD, or alias ``x`` of ``source``),
+    or only those of ``metrics``."""
+    parts = []
+    for metric, bucket, n, total in CONTRIBUTIONS[model]:
+        if metrics is not None and metric not in metrics:
+            continue
+        parts.append(
+            f"SELECT '{metric}' AS metric, {bucket.format(r=r)} AS bucket, "
+            f"{sign} * {n.format(r=r)} AS n, {sign} * {total.format(r=r)} AS total{source}"
+        )
+    return " UNION ALL ".join(parts)
+
+
+def _first_row(model, r):
+    """SQL condition: ``r`` is (still) its patient's first row in ``model``."""
+    table, pk = model.__tablename__, model.__mapper__.primary_key[0].name
+    return f"NOT EXISTS (SELECT 1 FROM {table} WHERE patient_id = {r}.patient_id AND {pk} < {r}.{pk})"
+
+
+def trigger_sql(model):
+    """CREATE TRIGGER statements keeping ``cohort_stats`` in step with ``model``."""
+    table = model.__tablename__
+
+    def add(r):
+        return UPSERT.format(rows=_rows_sql(model, r, 1))
+
+    def sub(r):
+        return UPSERT.format(rows=_rows_sql(model, r, -1))
+
+    if model is Patient:
+        return [
+            f"CREATE TRIGGER IF NOT EXISTS stats_{table}_insert AFTER INSERT ON {table} "
+            f"WHEN {ACTIVE} BEGIN {add('NEW')}; END",
+            f"CREATE TRIGGER IF NOT EXISTS stats_{table}_delete AFTER DELETE ON {table} "
+            f"WHEN {ACTIVE} BEGIN {sub('OLD')}; END",
+            f"CREATE TRIGGER IF NOT EXISTS stats_{table}_update AFTER UPDATE ON {table} "
+            f"WHEN {ACTIVE} BEGIN {sub('OLD')}; {add('NEW')}; END",
+            # Counters of other tables that read the patient's age.
+            f"CREATE TRIGGER IF NOT EXISTS stats_{table}_age AFTER UPDATE OF age ON {table} "
+            f"WHEN {ACTIVE} AND OLD.age IS NOT NEW.age BEGIN "
+            + " ".join(f"{_age_sql(other, -1, 'OLD.age')}; {_age_sql(other, 1, 'NEW.age')};"
+                       for other in AGE_METRICS) + " END",
+        ]
+    pk = model.__mapper__.primary_key[0].name
+
+    def row(sign, where):
+        return UPSERT.format(rows=_rows_sql(model, "x", sign, f" FROM {table} x WHERE x.{pk} = ({where})"))
+
+    return [
+        # A new first row replaces the patient's previous first row, if any.
+        f"CREATE TRIGGER IF NOT EXISTS stats_{table}_insert AFTER INSERT ON {table} "
+        f"WHEN {ACTIVE} AND {_first_row(model, 'NEW')} BEGIN {add('NEW')}; "
+        f"{row(-1, f'SELECT min({pk}) FROM {table} WHERE patient_id = NEW.patient_id AND {pk} > NEW.{pk}')}; END",
+        # Deleting a first row promotes the patient's next row, if any.
+        f"CREATE TRIGGER IF NOT EXISTS stats_{table}_delete AFTER DELETE ON {table} "
+        f"WHEN {ACTIVE} AND {_first_row(model, 'OLD')} BEGIN {sub('OLD')}; "
+        f"{row(1, f'SELECT min({pk}) FROM {table} WHERE patient_id = OLD.patient_id')}; END",
+        f"CREATE TRIGGER IF NOT EXISTS stats_{table}_update AFTER UPDATE ON {table} "
+        f"WHEN {ACTIVE} AND {_first_row(model, 'OLD')} BEGIN {sub('OLD')}; {add('NEW')}; END",
+    ]
+
+
+def _age_sql(model, sign, age):
+    """Add (sign 1) or subtract (-1) the AGE_METRICS of the patient's first ``model`` row,
+    counted with ``age`` (OLD.age or NEW.age of the patients update)."""
+    table, pk = model.__tablename__, model.__mapper__.primary_key[0].name
+    rows = _rows_sql(model, "x", sign, f" FROM {table} x WHERE x.{pk} = "
+                     f"(SELECT min({pk}) FROM {table} WHERE patient_id = NEW.patient_id)", AGE_METRICS[model])
+    # The trigger runs after the update: patients already holds NEW.age.
+    return UPSERT.format(rows=rows.replace(PATIENT_AGE.format(r="x"), age))
+
+
+def _sums_sql(model, source, age=None):
+    """The contributions of ``model``'s rows in ``source`` (alias ``x``), summed per
+    (metric, bucket): a list of SELECTs to UNION ALL.
+
+    Each contribution is summed on its own, so only the few with a computed
+    bucket sort their rows; one GROUP BY over every contribution row was most
+    of the cost of a recount.  ``age`` replaces PATIENT_AGE when the rows
+    carry the patient's age themselves.
+    """
+    parts = []
+    for metric, bucket, n, total in CONTRIBUTIONS[model]:
+        bucket, n, total = (e.format(r="x") for e in (bucket, n, total))
+        if age:
+            bucket, total = (e.replace(PATIENT_AGE.format(r="x"), age) for e in (bucket, total))
+        sums = f"SELECT '{metric}' AS metric, {bucket} AS bucket, sum({n}) AS n, sum({total}) AS total{source}"
+        if bucket.startswith("'"):
+            # Without GROUP BY an aggregate returns one row, of NULLs, for no rows at all.
+            parts.append(f"SELECT * FROM ({sums}) WHERE n IS NOT NULL")
+        else:
+            parts.append(f"{sums} GROUP BY bucket")
+    return parts
+
+
+def _recount_sql(patients=None):
+    """Counters recomputed from the tables; ``patients`` is an optional SQL
+    subquery restricting the recount to some patient IDs."""
+    only = f" WHERE patient_id IN ({patients})" if patients else ""
+    ctes, parts = [], []
+    for model in CONTRIBUTIONS:
+        table = model.__tablename__
+        if model is Patient:
+            rows = f"SELECT * FROM {table}{only}"
+        else:
+            pk = model.__mapper__.primary_key[0].name
+            rows = f"SELECT * FROM {table} WHERE {pk} IN (SELECT min({pk}) FROM {table}{only} GROUP BY patient_id)"
+        # Each table's (first) rows are read once and shared by all its contributions.
+        ctes.append(f"first_{table} AS MATERIALIZED ({rows})")
+        parts += _sums_sql(model, f" FROM first_{table} x")
+    return f"WITH {', '.join(ctes)} {' UNION ALL '.join(parts)}"
+
+
+def install(conn):
+    """Create the triggers and fill the counters (schema migration step)."""
+    conn.exec_driver_sql(f"CREATE TABLE IF NOT EXISTS {CONTROL_TABLE} (suspended INTEGER NOT NULL)")
+    if conn.exec_driver_sql(f"SELECT count(*) FROM {CONTROL_TABLE}").scalar() == 0:
+        conn.exec_driver_sql(f"INSERT INTO {CONTROL_TABLE} (suspended) VALUES (0)")
+    for model in CONTRIBUTIONS:
+        for sql in trigger_sql(model):
+            conn.exec_driver_sql(sql)
+    rebuild(conn)
+
+
+def installed(conn):
+    return conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CONTROL_TABLE,)
+    ).first() is not None
+
+
+def rebuild(conn):
+    """Recount every counter from the tables."""
+    conn.exec_driver_sql("DELETE FROM cohort_stats")
+    conn.exec_driver_sql(f"INSERT INTO cohort_stats (metric, bucket, n, total) {_recount_sql()}")
+
+
+@contextmanager
+def suspended(conn):
+    """Switch the triggers off inside ``conn``'s transaction (other connections never see it)."""
+    conn.exec_driver_sql(f"UPDATE {CONTROL_TABLE} SET suspended = 1")
+    try:
+        yield
+    finally:
+        conn.exec_driver_sql(f"UPDATE {CONTROL_TABLE} SET suspended = 0")
+
+
+def add_patients(conn, patients):
+    """Add the counters of new patients (and their rows) in one statement;
+    ``patients`` is a SQL subquery of their IDs.
+
+    Their patient_summary rows (summary.add_patients) must be there already:
+    they hold each patient's first rows, one indexed read per patient.
+    """
+    parts = []
+    for model in CONTRIBUTIONS:
+        exists = "" if model is Patient else f" WHERE x.{model.__mapper__.primary_key[0].name} IS NOT NULL"
+        parts += _sums_sql(model, f" FROM new_patients x{exists}", age="x.age")
+    conn.exec_driver_sql(
+        f"WITH new_patients AS MATERIALIZED (SELECT * FROM {PatientSummary.__tablename__} "
+        f"WHERE patient_id IN ({patients})) " + UPSERT.format(rows=" UNION ALL ".join(parts))
+    )
+
+
+def verify(conn):
+    """Counters that differ from a recount, as ``(metric, bucket, stored, recounted)``."""
+    stored = {(m, b): (n, round(t, 6)) for m, b, n, t in conn.execute(select(
+        CohortStat.metric, CohortStat.bucket, CohortStat.n, CohortStat.total))}
+    recount = {(m, b): (n, round(t, 6)) for m, b, n, t in conn.exec_driver_sql(_recount_sql())}
+    keys = set(stored) | set(recount)
+    zero = (0, 0.0)
+    return sorted(
+        (*key, stored.get(key, zero), recount.get(key, zero))
+        for key in keys if stored.get(key, zero) != recount.get(key, zero)
+    )
+
+
+# === Dashboard ===
+def patient_count(db):
+    """Number of patients, from its counter row (one indexed lookup)."""
+    stmt = select(CohortStat.n).where(CohortStat.metric == "patients", CohortStat.bucket == "all")
+    return db.scalar(stmt) or 0
+
+
+def _pct(part, whole):
+    return round(100.0 * part / whole, 1) if whole else 0.0
+
+
+def load(db):
+    """Everything the "Στατιστικά" page shows, from the counter rows only."""
+    counters = {}
+    for s in db.execute(select(CohortStat)).scalars():
+        counters.setdefault(s.metric, {})[s.bucket] = (s.n, s.total)
+
+    def count(metric, bucket="all"):
+        return counters.get(metric, {}).get(bucket, (0, 0.0))[0]
+
+    def breakdown(metric):
+        return sorted((bucket, n, total) for bucket, (n, total) in counters.get(metric, {}).items() if n)
+
+    n_patients, n_history = count("patients"), count("medical_history")
+    n_lesions, n_vessels, n_pci = count("lesions"), count("vessels"), count("pci")
+
+    by_diabetes = {}
+    for metric, value_name in (("bmi_by_diabetes", "BMI"), ("age_by_diabetes", "Ηλικία")):
+        for bucket, n, total in breakdown(metric):
+            diabetes, _, band = bucket.partition("|")
+            entry = by_diabetes.setdefault(diabetes, {"BMI": [0, 0.0, {}], "Ηλικία": [0, 0.0, {}]})[value_name]
+            entry[0] += n
+            entry[1] += total
+            entry[2][band] = n
+
+    return {
+        "patients": n_patients,
+        "mean_age": round(counters.get("patients", {}).get("all", (0, 0.0))[1] / n_patients, 1) if n_patients else None,
+        "risk_factors": [
+            {"Παράγοντας": name, "Ασθενείς": count("risk_factor", name), "%": _pct(count("risk_factor", name), n_history)}
+            for name in RISK_FACTORS
+        ],
+        "lesion_sites": [
+            {"Αγγείο": name, "Ασθενείς": count("lesion_site", name), "%": _pct(count("lesion_site", name), n_lesions)}
+            for name in LESION_SITES
+        ],
+        "lesion_patterns": [
+            {"Συνδυασμός": bucket, "Ασθενείς": n, "%": _pct(n, n_lesions)} for bucket, n, _ in breakdown("lesion_pattern")
+        ],
+        "pci_techniques": [
+            {"Τεχνική": name, "Ασθενείς": count("pci_technique", name), "%": _pct(count("pci_technique", name), n_pci)}
+            for name in PCI_TECHNIQUES
+        ],
+        "imaging": [
+            {"Απεικόνιση": bucket, "Ασθενείς": n, "%": _pct(n, n_vessels)} for bucket, n, _ in breakdown("imaging")
+        ],
+        "angioplasty": _pct(count("angioplasty", "angioplasty"), n_vessels),
+        "gender": [{"Φύλο": bucket, "Ασθενείς": n} for bucket, n, _ in breakdown("gender")],
+        "age": [{"Ηλικία": bucket, "Ασθενείς": n} for bucket, n, _ in breakdown("age")],
+        "by_diabetes": [
+            {
+                "Διαβήτης": diabetes,
+                "Ασθενείς": values["BMI"][0],
+                "Μέσο BMI": round(values["BMI"][1] / values["BMI"][0], 1) if values["BMI"][0] else None,
+                "Μέση ηλικία": round(values["Ηλικία"][1] / values["Ηλικία"][0], 1) if values["Ηλικία"][0] else None,
+            }
+            for diabetes, values in sorted(by_diabetes.items())
+        ],
+        "bmi_by_diabetes": {d: v["BMI"][2] for d, v in sorted(by_diabetes.items())},
+        "age_by_diabetes": {d: v["Ηλικία"][2] for d, v in sorted(by_diabetes.items())},
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    from .db import DATABASE_URL, get_engine
+
+    parser = argparse.ArgumentParser(description="Μετρητές στατιστικών (cohort_stats)")
+    parser.add_argument("--database", default=DATABASE_URL)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--verify", action="store_true", help="compare the counters with a recount")
+    group.add_argument("--rebuild", action="store_true", help="recount every counter from the tables")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(args.database)
+    with engine.begin() as conn:
+        if args.rebuild:
+            rebuild(conn)
+            print("cohort_stats rebuilt")
+            return 0
+        drift = verify(conn)
+    for metric, bucket, stored, recounted in drift:
+        print(f"DRIFT {metric}/{bucket}: stored {stored}, recount {recounted}")
+    print("OK" if not drift else f"{len(drift)} counters drifted; run with --rebuild")
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
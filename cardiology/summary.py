@@ -0,0 +1,134 @@
+"""Denormalized ``patient_summary``: one wide row per patient.
+
+Each row holds the patient's own columns and the first row (lowest primary
+key) of medical_history, lesions, vessels and pci, i.e. exactly what
+``joined_select`` returns, so the full-data, search and per-patient pages
+read one indexed row instead of joining five tables.
+
+SQLite triggers keep it in step with every writer.  Inserting or deleting a
+patient inserts or deletes its summary row; inserting, changing or deleting
+a related row re-reads that table's first row for the patient when the
+change can affect it.  The bulk import suspends the triggers for its batch
+(see stats.suspended) and adds its patients with one INSERT ... SELECT.
+
+    python -m cardiology.summary --verify     # compare with the five tables
+    python -m cardiology.summary --rebuild    # rebuild from scratch
+"""
+from sqlalchemy import insert, select, text
+
+from .models import Patient, PatientSummary
+from .queries import RELATED_MODELS, joined_select
+from .stats import ACTIVE
+
+
+def _columns(model):
+    """The model's columns that appear in patient_summary (its primary key included)."""
+    return [c for c in model.__table__.columns
+            if (c.name != "patient_id" or model is Patient) and c.name != "recorded_at"]
+
+
+SOURCE_COLUMNS = [c for model in (Patient, *RELATED_MODELS) for c in _columns(model)]
+SUMMARY_COLUMNS = [PatientSummary.__table__.columns[c.name] for c in SOURCE_COLUMNS]
+
+
+def source_select():
+    """patient_summary's rows, computed from the five tables."""
+    return joined_select(*SOURCE_COLUMNS)
+
+
+def _refresh_sql(model, pid):
+    """UPDATE the ``model`` columns of patient ``pid`` from its current first row."""
+    table, pk = model.__tablename__, model.__mapper__.primary_key[0].name
+    names = ", ".join(c.name for c in _columns(model))
+    return (
+        f"UPDATE patient_summary SET ({names}) = "
+        f"(SELECT {names} FROM {table} WHERE patient_id = {pid} ORDER BY {pk} LIMIT 1) "
+        f"WHERE patient_id = {pid}"
+    )
+
+
+def _first_row(model, r):
+    table, pk = model.__tablename__, model.__mapper__.primary_key[0].name
+    return f"NOT EXISTS (SELECT 1 FROM {table} WHERE patient_id = {r}.patient_id AND {pk} < {r}.{pk})"
+
+
+def trigger_sql():
+    """CREATE TRIGGER statements keeping patient_summary in step with the five tables."""
+    names = [c.name for c in _columns(Patient)]
+    statements = [
+        f"CREATE TRIGGER IF NOT EXISTS summary_patients_insert AFTER INSERT ON patients WHEN {ACTIVE} BEGIN "
+        f"INSERT OR REPLACE INTO patient_summary ({', '.join(names)}) "
+        f"VALUES ({', '.join(f'NEW.{n}' for n in names)}); END",
+        f"CREATE TRIGGER IF NOT EXISTS summary_patients_update AFTER UPDATE ON patients WHEN {ACTIVE} BEGIN "
+        f"UPDATE patient_summary SET {', '.join(f'{n} = NEW.{n}' for n in names)} "
+        f"WHERE patient_id = OLD.patient_id; END",
+        f"CREATE TRIGGER IF NOT EXISTS summary_patients_delete AFTER DELETE ON patients WHEN {ACTIVE} BEGIN "
+        f"DELETE FROM patient_summary WHERE patient_id = OLD.patient_id; END",
+    ]
+    for model in RELATED_MODELS:
+        table = model.__tablename__
+        statements += [
+            # Only a patient's first row is shown, so later rows change nothing.
+            f"CREATE TRIGGER IF NOT EXISTS summary_{table}_insert AFTER INSERT ON {table} "
+            f"WHEN {ACTIVE} AND {_first_row(model, 'NEW')} BEGIN {_refresh_sql(model, 'NEW.patient_id')}; END",
+            f"CREATE TRIGGER IF NOT EXISTS summary_{table}_delete AFTER DELETE ON {table} "
+            f"WHEN {ACTIVE} AND {_first_row(model, 'OLD')} BEGIN {_refresh_sql(model, 'OLD.patient_id')}; END",
+            f"CREATE TRIGGER IF NOT EXISTS summary_{table}_update AFTER UPDATE ON {table} WHEN {ACTIVE} BEGIN "
+            f"{_refresh_sql(model, 'OLD.patient_id')}; {_refresh_sql(model, 'NEW.patient_id')}; END",
+        ]
+    return statements
+
+
+def install(conn):
+    """Create the triggers and fill the table (schema migration step)."""
+    for sql in trigger_sql():
+        conn.exec_driver_sql(sql)
+    rebuild(conn)
+
+
+def rebuild(conn):
+    conn.execute(PatientSummary.__table__.delete())
+    conn.execute(insert(PatientSummary).from_select(SUMMARY_COLUMNS, source_select()))
+
+
+def add_patients(conn, patients):
+    """Add summary rows for new patients; ``patients`` is a SQL subquery of their IDs."""
+    stmt = source_select().where(text(f"patients.patient_id IN ({patients})"))
+    conn.execute(insert(PatientSummary).prefix_with("OR REPLACE").from_select(SUMMARY_COLUMNS, stmt))
+
+
+def verify(conn, limit=20):
+    """IDs of up to ``limit`` patients whose summary row differs from the tables (or is missing/extra)."""
+    stored = select(*SUMMARY_COLUMNS)
+    computed = source_select()
+    differing = set()
+    for left, right in ((stored, computed), (computed, stored)):
+        diff = left.except_(right).subquery()
+        differing.update(conn.scalars(select(diff.c[0]).limit(limit)))
+    return sorted(differing)[:limit]
+
+
+def main(argv=None):
+    import argparse
+
+    from .db import DATABASE_URL, get_engine
+
+    parser = argparse.ArgumentParser(description="Πίνακας patient_summary")
+    parser.add_argument("--database", default=DATABASE_URL)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--verify", action="store_true", help="compare patient_summary with the five tables")
+    group.add_argument("--rebuild", action="store_true", help="rebuild patient_summary from the five tables")
+    args = parser.parse_args(argv)
+
+    with get_engine(args.database).begin() as conn:
+        if args.rebuild:
+            rebuild(conn)
+            print("patient_summary rebuilt")
+            return 0
+        differing = verify(conn)
+    print("OK" if not differing else f"patient_summary differs for patients {differing}; run with --rebuild")
+    return 1 if differing else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
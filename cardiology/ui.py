@@ -0,0 +1,309 @@
+"""Streamlit widgets shared by both apps."""
+import os
+import tempfile
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from .jobs import CANCELLED, FAILED, QUEUED, JobLimitError, job_runner
+
+PAGE_SIZES = (25, 50, 100, 500)
+JOB_POLL_SECONDS = 0.5
+# Streamlit holds a download in memory while it is served: larger exports
+# are left to the command line (python -m cardiology.export).
+MAX_DOWNLOAD_BYTES = int(os.environ.get("CARDIOLOGY_MAX_DOWNLOAD_MB", 200)) * 1024 * 1024
+
+
+def keyset_pager(key, fetch_page, page_size):
+    """Show one page of rows in a single table, with previous/next buttons.
+
+    ``fetch_page(after_id, limit)`` returns rows (a list of dicts or a
+    DataFrame) with an "ID" column ordered by it.  The stack of cursors
+    (last ID of every previous page) lives in ``st.session_state[key]``;
+    one extra row is fetched to know whether a next page exists.
+    """
+    cursors = st.session_state.setdefault(key, [0])
+    rows = fetch_page(after_id=cursors[-1], limit=page_size + 1)
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    if len(rows):
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    col1, col2, col3 = st.columns([1, 1, 2])
+    if col1.button("⬅️ Προηγούμενη", key=f"{key}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if col2.button("Επόμενη ➡️", key=f"{key}_next", disabled=not has_next):
+        cursors.append(int(rows["ID"].iloc[-1]) if hasattr(rows, "iloc") else rows[-1]["ID"])
+        st.rerun()
+    col3.caption(f"Σελίδα {len(cursors)}")
+    return rows
+
+
+def offset_pager(key, query, fetch_page, page_size):
+    """Like ``keyset_pager`` for rows that are not ordered by ID (e.g. ranked search results).
+
+    ``fetch_page(offset, limit)``; the page number lives in
+    ``st.session_state[key]`` and goes back to the first page when ``query``
+    changes.
+    """
+    state = st.session_state.setdefault(key, {"query": query, "page": 0})
+    if state["query"] != query:
+        state.update(query=query, page=0)
+    rows = fetch_page(offset=state["page"] * page_size, limit=page_size + 1)
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    if len(rows):
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    col1, col2, col3 = st.columns([1, 1, 2])
+    if col1.button("⬅️ Προηγούμενη", key=f"{key}_prev", disabled=state["page"] == 0):
+        state["page"] -= 1
+        st.rerun()
+    if col2.button("Επόμενη ➡️", key=f"{key}_next", disabled=not has_next):
+        state["page"] += 1
+        st.rerun()
+    col3.caption(f"Σελίδα {state['page'] + 1}")
+    return rows
+
+
+def page_size_input(key):
+    return st.selectbox("Εγγραφές ανά σελίδα", PAGE_SIZES, index=1, key=key)
+
+
+def export_panel(key, engine, criteria=None, total=None):
+    """Column/format selection and a download button for the streamed export.
+
+    The export runs as a background job (see start_job): the rows are
+    streamed chunk by chunk into a temporary file on the server, and the
+    download button appears when the file is ready.  The file is read only
+    when the button is clicked, and only up to MAX_DOWNLOAD_BYTES.
+    ``total`` is the expected number of rows, for the progress bar.
+    """
+    # Deferred so that the standalone app, which has no database, does not
+    # pull in SQLAlchemy and the models through this module.
+    from .export import FORMATS
+    from .queries import FULL_DATA_COLUMNS
+
+    with st.expander("📤 Εξαγωγή (CSV / Parquet)"):
+        columns = st.multiselect("Στήλες", FULL_DATA_COLUMNS, default=FULL_DATA_COLUMNS, key=f"{key}_columns")
+        fmt = st.radio("Μορφή", FORMATS, horizontal=True, key=f"{key}_format")
+        job_key = (fmt, columns, criteria)
+        if st.button("📤 Δημιουργία αρχείου", key=f"{key}_export", disabled=not columns):
+            start_job(key, job_key, _export_file, engine, fmt, criteria, columns, total=total)
+        job = job_result(key, job_key)
+        if job:
+            exported = job.result
+            if exported.size > MAX_DOWNLOAD_BYTES:
+                st.warning(
+                    f"⚠️ Το αρχείο ({exported.size / 2**20:.0f} MiB, {exported.rows} εγγραφές) είναι πολύ μεγάλο "
+                    f"για λήψη από τον browser· χρησιμοποιήστε το `python -m cardiology.export patients.{fmt}`."
+                )
+            else:
+                st.download_button(
+                    f"💾 Λήψη ({exported.rows} εγγραφές)", exported.read, file_name=f"patients.{fmt}",
+                    key=f"{key}_download", on_click="ignore",
+                )
+
+
+class ExportFile:
+    """A finished export in a temporary file: the job keeps this, not the file's contents."""
+
+    def __init__(self, path, rows):
+        self.path = path
+        self.rows = rows
+        self.size = os.path.getsize(path)
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self):
+        """Delete the file (called by the job runner when the job is dropped)."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _export_file(engine, fmt, criteria, columns, progress):
+    from .export import export
+
+    fd, path = tempfile.mkstemp(prefix="cardiology-export-", suffix=f".{fmt}")  # readable by its owner only
+    try:
+        with os.fdopen(fd, "wb") as f:
+            rows = export(engine, f, fmt, criteria, columns, progress=progress)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return ExportFile(path, rows)
+
+
+# === Εργασίες στο παρασκήνιο (cardiology.jobs) ===
+def job_owner():
+    """This browser session's ID: its jobs are its own."""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "bare"
+
+
+def start_job(slot, key, fn, *args, total=None):
+    """Run ``fn(*args, progress=...)`` in the background in this session's ``slot``.
+
+    ``key`` identifies what is computed (e.g. the criteria) for job_result.
+    Returns False, with a warning, if the session already has too many jobs.
+    """
+    try:
+        job_runner.submit(job_owner(), slot, key, fn, *args, total=total)
+    except JobLimitError as exc:
+        st.warning(f"⏳ {exc}")
+        return False
+    return True
+
+
+def job_result(slot, key, unit="γραμμές"):
+    """The slot's finished job if it computed ``key``, else None.
+
+    While the job runs, shows its progress and a cancel button, refreshed
+    every JOB_POLL_SECONDS; the page reruns when it finishes.  A failed or
+    cancelled job is reported instead.  A result for another key (the
+    criteria changed since) is not shown.
+    """
+    job = job_runner.get(job_owner(), slot)
+    if job is None:
+        return None
+    if not job.finished:
+        _job_progress(slot, unit)
+        return None
+    if job.status == FAILED:
+        st.error(f"❌ {job.error}")
+    elif job.status == CANCELLED:
+        st.info("✖️ Η εργασία ακυρώθηκε.")
+    elif job.key == key:
+        return job
+    return None
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _job_progress(slot, unit):
+    job = job_runner.get(job_owner(), slot)
+    if job is None or job.finished:
+        st.rerun()  # the whole page, to show the result
+    if job.status == QUEUED:
+        text = "⏳ Σε αναμονή (όλες οι θέσεις εκτέλεσης είναι κατειλημμένες)…"
+    else:
+        text = f"⏳ {job.done}{f' / {job.total}' if job.total else ''} {unit} · {job.elapsed():.0f} δευτ."
+    st.progress(job.fraction or 0.0, text=text)
+    if st.button("✖️ Ακύρωση", key=f"{slot}_cancel"):
+        job_runner.cancel(job_owner(), slot)
+
+
+def encounter_form(key):
+    """One form for a whole encounter; returns the POST /encounters/ body when submitted, else None.
+
+    Submitting reruns the script once, whatever the number of fields.
+    """
+    with st.form(key, clear_on_submit=True):
+        st.markdown("#### Ασθενής")
+        new = st.radio("Ασθενής", ["Νέος ασθενής", "Υπάρχων ασθενής"], horizontal=True,
+                       label_visibility="collapsed") == "Νέος ασθενής"
+        col1, col2, col3 = st.columns(3)
+        first_name = col1.text_input("Όνομα")
+        last_name = col2.text_input("Επώνυμο")
+        age = col3.number_input("Ηλικία", min_value=1, max_value=120, step=1)
+        medical_history = st.text_area("Ιατρικό Ιστορικό (σημειώσεις)")
+        patient_id = st.number_input("ID υπάρχοντος ασθενή", min_value=1, step=1, key=f"{key}_patient_id")
+
+        st.markdown("#### Ιατρικό Ιστορικό")
+        with_history = st.checkbox("Καταχώρηση ιστορικού", value=True)
+        col1, col2, col3 = st.columns(3)
+        gender = col1.selectbox("Φύλο", ["Male", "Female"])
+        diabetes = col2.selectbox("Διαβήτης", ["None", "Type 1", "Type 2"])
+        BMI = col3.number_input("BMI", min_value=10.0, max_value=50.0, value=25.0, step=0.1)
+        col1, col2, col3, col4 = st.columns(4)
+        hypertension = col1.checkbox("Υπέρταση")
+        smoking = col2.checkbox("Κάπνισμα")
+        hereditary = col3.checkbox("Κληρονομικό Ιστορικό")
+        atrial_fibrillation = col4.checkbox("Κολπική Μαρμαρυγή")
+
+        st.markdown("#### Βλάβες / Αγγεία / PCI")
+        col1, col2, col3 = st.columns(3)
+        with_lesion = col1.checkbox("Καταχώρηση βλαβών", value=True)
+        LAD, LCX, RCA = col1.checkbox("LAD"), col1.checkbox("LCX"), col1.checkbox("RCA")
+        with_vessel = col2.checkbox("Καταχώρηση αγγείων", value=True)
+        num_vessels = col2.number_input("Αριθμός Αγγείων", min_value=0, max_value=10, step=1)
+        angioplasty = col2.checkbox("Αγγειοπλαστική")
+        imaging = col2.selectbox("Απεικόνιση", ["NONE", "OCT", "IVUS"])
+        with_pci = col3.checkbox("Καταχώρηση PCI", value=True)
+        balloon, IVL, ROTA = col3.checkbox("Balloon"), col3.checkbox("IVL"), col3.checkbox("ROTA")
+
+        if not st.form_submit_button("📝 Καταχώρηση επέμβασης"):
+            return None
+    if new and not (first_name.strip() and last_name.strip()):
+        st.error("❌ Συμπληρώστε όνομα και επώνυμο.")
+        return None
+    body = {"patient": None, "patient_id": None}
+    if new:
+        body["patient"] = {"first_name": first_name, "last_name": last_name, "age": age,
+                           "medical_history": medical_history}
+    else:
+        body["patient_id"] = patient_id
+    body["history"] = {
+        "gender": gender, "hypertension": hypertension, "smoking": smoking, "diabetes": diabetes,
+        "hereditary": hereditary, "BMI": BMI, "atrial_fibrillation": atrial_fibrillation,
+    } if with_history else None
+    body["lesion"] = {"LAD": LAD, "LCX": LCX, "RCA": RCA} if with_lesion else None
+    body["vessel"] = {"num_vessels": num_vessels, "angioplasty": angioplasty, "imaging": imaging} if with_vessel else None
+    body["pci"] = {"balloon": balloon, "IVL": IVL, "ROTA": ROTA} if with_pci else None
+    return body
+
+
+def stats_dashboard(data):
+    """The "Στατιστικά" page, from the dict returned by ``stats.load``."""
+    import pandas as pd
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Ασθενείς", data["patients"])
+    col2.metric("Μέση ηλικία", data["mean_age"] if data["mean_age"] is not None else "—")
+    col3.metric("Αγγειοπλαστική", f"{data['angioplasty']}%")
+
+    st.subheader("Παράγοντες κινδύνου")
+    risk = pd.DataFrame(data["risk_factors"]).set_index("Παράγοντας")
+    st.bar_chart(risk["%"])
+
+    st.subheader("Βλάβες (LAD / LCX / RCA)")
+    col1, col2 = st.columns(2)
+    col1.bar_chart(pd.DataFrame(data["lesion_sites"]).set_index("Αγγείο")["%"])
+    col2.dataframe(data["lesion_patterns"], hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Τεχνικές PCI")
+        st.bar_chart(pd.DataFrame(data["pci_techniques"]).set_index("Τεχνική")["%"])
+    with col2:
+        st.subheader("Απεικόνιση")
+        st.dataframe(data["imaging"], hide_index=True)
+
+    st.subheader("Ανά τύπο διαβήτη")
+    st.dataframe(data["by_diabetes"], hide_index=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.caption("Κατανομή BMI")
+        st.bar_chart(pd.DataFrame(data["bmi_by_diabetes"]).fillna(0))
+    with col2:
+        st.caption("Κατανομή ηλικίας")
+        st.bar_chart(pd.DataFrame(data["age_by_diabetes"]).fillna(0))
+
+    st.caption("Ηλικίες: " + ", ".join(f"{a['Ηλικία']}: {a['Ασθενείς']}" for a in data["age"]))
+
+
+def query_panel(run, pages):
+    """Sidebar debug panel: this rerun's ``PageRun`` and the per-page totals."""
+    with st.sidebar.expander("🐞 Ερωτήματα SQL", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Ερωτήματα", run.statements)
+        col2.metric("SQL (ms)", f"{run.seconds * 1000:.1f}")
+        col3.metric("Γραμμές", run.rows)
+        if run.slowest:
+            st.caption(f"Πιο αργό ({run.max_seconds * 1000:.1f} ms):")
+            st.code(run.slowest, language="sql")
+        st.dataframe(pages, hide_index=True)
@@ -0,0 +1,43 @@
+"""Columnar wire format for the table routes of the API.
+
+``/all_data/`` and ``/search_patients/`` answer with a JSON list of row
+dicts by default.  With ``?format=arrow`` they send the on-screen columns
+(same names and values as the direct app's tables) as one zstd-compressed
+Arrow IPC stream instead, which the client reads straight into a
+DataFrame without a per-row loop.
+"""
+import io
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+WIRE_FORMATS = ("json", "arrow")
+
+
+def encode_arrow(rows, columns):
+    """Row dicts -> Arrow IPC stream bytes (zstd-compressed record batches)."""
+    import pyarrow as pa  # optional: only needed for format=arrow
+
+    from .export import arrow_table  # server side only: keeps SQLAlchemy out of the client
+
+    table = arrow_table([tuple(row[c] for c in columns) for row in rows], columns)
+    # ΝΑΙ/ΟΧΙ, gender, diabetes, imaging and most names repeat: send each
+    # text column as small integer codes plus one dictionary of values.
+    table = pa.Table.from_arrays(
+        [c.dictionary_encode() if pa.types.is_string(c.type) else c for c in table.columns],
+        names=table.column_names,
+    )
+    sink = io.BytesIO()
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def is_arrow(response):
+    return response.headers.get("content-type", "").startswith(ARROW_MEDIA_TYPE)
+
+
+def decode_arrow(payload):
+    """Arrow IPC stream bytes -> pandas DataFrame."""
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
@@ -0,0 +1,43 @@
+"""Shared fixtures: throwaway SQLite files with the full schema (triggers included)."""
+import atexit
+import os
+import shutil
+import tempfile
+
+# cardiology.api binds DATABASE_URL when it is imported: point it (and the
+# snapshots next to it) at a scratch directory, not ./database.db.
+_scratch = tempfile.mkdtemp(prefix="cardiology-tests-")
+atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+os.environ["CARDIOLOGY_DATABASE_URL"] = f"sqlite:///{_scratch}/api.db"
+
+import pytest
+
+from cardiology.db import DATABASE_URL, get_engine
+from benchmarks.synthetic import populate
+
+
+@pytest.fixture
+def database(tmp_path):
+    """URL of a new, empty database file (get_engine creates and migrates it)."""
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    get_engine(url)
+    return url
+
+
+@pytest.fixture
+def registry(database):
+    """A database with 300 synthetic patients, bulk-imported."""
+    populate(get_engine(database), 300)
+    return database
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    """TestClient of cardiology.api over its scratch database, with 300 synthetic patients."""
+    from fastapi.testclient import TestClient
+
+    from cardiology.api import app
+
+    populate(get_engine(DATABASE_URL), 300)
+    with TestClient(app) as client:
+        yield client
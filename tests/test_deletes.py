@@ -0,0 +1,49 @@
+"""Batch delete: the ID list syntax and the DELETE /patients/ route (deletes.py, api.py)."""
+import pytest
+from sqlalchemy import select
+
+from cardiology.db import DATABASE_URL, session_scope
+from cardiology.deletes import parse_ids
+from cardiology.models import Patient
+
+
+@pytest.mark.parametrize("spec, ranges", [
+    ("7", [(7, 7)]),
+    ("3, 7-9 12", [(3, 3), (7, 9), (12, 12)]),
+    (" 1-1,,40-60 ", [(1, 1), (40, 60)]),
+    ("", []),
+])
+def test_parse_ids(spec, ranges):
+    assert parse_ids(spec) == ranges
+
+
+@pytest.mark.parametrize("spec", ["abc", "7-x", "9-7", "0", "-3", "1.5", "2-3-4"])
+def test_parse_ids_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_ids(spec)
+
+
+@pytest.fixture
+def client(api_client):
+    return api_client
+
+
+def _ids(low, high):
+    with session_scope(DATABASE_URL) as db:
+        return db.scalars(select(Patient.patient_id).where(Patient.patient_id.between(low, high))).all()
+
+
+def test_delete_ranges(client):
+    assert _ids(250, 262)
+    missing = 1_000_000
+    response = client.delete("/patients/", params={"ids": f"250-260, 262 {missing}"})
+    assert response.status_code == 200
+    assert _ids(250, 262) == [261]
+    assert response.json()["deleted"] == 12
+
+
+@pytest.mark.parametrize("spec", ["abc", "9-7", "0"])
+def test_delete_rejects_bad_ids(client, spec):
+    response = client.delete("/patients/", params={"ids": spec})
+    assert response.status_code == 422
+    assert response.json()["detail"]
@@ -0,0 +1,89 @@
+"""The in-memory bitmap and risk indexes agree with plain SQL after writes (bitmap.py, risk.py)."""
+import pytest
+from sqlalchemy import select, text, update
+
+from cardiology.bitmap import bitmap_index
+from cardiology.bulk_import import import_rows
+from cardiology.db import get_engine, session_scope
+from cardiology.deletes import delete_patients
+from cardiology.encounters import record_encounter
+from cardiology.models import Lesion, MedicalHistory, PatientSummary, PCI
+from cardiology.queries import search_patients
+from cardiology.risk import RISK_COLUMN, ranked_page, risk_index, score_row, search_at_least
+from benchmarks.replica import ENCOUNTER
+from benchmarks.synthetic import registry_rows
+
+CRITERIA = [
+    {},
+    {"hypertension": True},
+    {"LAD": True, "smoking": True},
+    {"diabetes": "Type 2", "min_vessels": 2},
+    {"gender": "Female", "age": 60, "balloon": True},
+    {"imaging": "OCT", "angioplasty": True, "RCA": True},
+]
+
+
+def _write(url):
+    """One write of each kind through ORM sessions, then a bulk-import batch."""
+    with session_scope(url) as db:
+        record_encounter(db, **ENCOUNTER)
+        db.commit()
+        db.execute(update(MedicalHistory).where(MedicalHistory.patient_id.in_([1, 2, 3]))
+                   .values(hypertension=True, smoking=True, diabetes="Type 2"))
+        db.add(PCI(patient_id=4, balloon=True, IVL=True, ROTA=True))  # not its first row
+        db.add(Lesion(patient_id=db.scalar(select(PatientSummary.patient_id).where(PatientSummary.lesion_id.is_(None))),
+                      LAD=True, LCX=False, RCA=False))
+        db.commit()
+        delete_patients(db, [5, 6])
+        db.commit()
+    import_rows(get_engine(url), registry_rows(50, seed=2))
+
+
+def _expected_scores(db):
+    return {r.patient_id: score_row(r) for r in db.execute(select(PatientSummary)).scalars()}
+
+
+@pytest.fixture(params=["before writes", "after writes"])
+def db(request, registry):
+    engine = get_engine(registry)
+    bitmap_index.sync(engine)
+    risk_index.sync(engine)
+    if request.param == "after writes":
+        _write(registry)
+    with session_scope(registry) as db:
+        yield db
+
+
+@pytest.mark.parametrize("criteria", CRITERIA)
+def test_bitmap_matches_the_search_query(db, criteria):
+    engine = db.get_bind()
+    expected = {row["ID"] for row in search_patients(db, criteria)}
+    assert set(bitmap_index.patient_ids(engine, criteria)) == expected
+    assert bitmap_index.count(engine, criteria) == len(expected)
+
+
+@pytest.mark.parametrize("min_score", [0, 8, 14])
+def test_risk_filter_matches_the_plain_scores(db, min_score):
+    engine, scores = db.get_bind(), _expected_scores(db)
+    for criteria in CRITERIA[:3]:
+        rows = search_at_least(db, engine, criteria, min_score)
+        expected = {row["ID"] for row in search_patients(db, criteria) if scores[row["ID"]] >= min_score}
+        assert {row["ID"] for row in rows} == expected
+        assert all(row[RISK_COLUMN] == scores[row["ID"]] for row in rows)
+
+
+def test_ranking_matches_the_plain_scores(db):
+    engine, scores = db.get_bind(), _expected_scores(db)
+    rows = ranked_page(db, engine, 0, len(scores))
+    assert [row["ID"] for row in rows] == sorted(scores, key=lambda pid: (-scores[pid], pid))
+
+
+def test_commit_from_another_connection_is_seen(db):
+    engine = db.get_bind()
+    bitmap_index.sync(engine)
+    # Outside the ORM sessions, as another process would write.
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE medical_history SET atrial_fibrillation = 1"))
+    expected = {row["ID"] for row in search_patients(db, {"atrial_fibrillation": True})}
+    assert set(bitmap_index.patient_ids(engine, {"atrial_fibrillation": True})) == expected
+    assert risk_index.verify(engine) == []
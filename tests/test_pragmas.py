@@ -0,0 +1,30 @@
+"""The SQLite PRAGMA profiles (db.PRAGMA_PROFILES) on new connections."""
+from sqlalchemy import text
+
+from cardiology.db import get_engine, make_engine
+
+
+def _pragmas(engine, *names):
+    with engine.connect() as conn:
+        return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
+
+
+def test_concurrent_profile(database):
+    assert _pragmas(get_engine(database), "journal_mode", "busy_timeout", "foreign_keys", "auto_vacuum") == {
+        "journal_mode": "wal", "busy_timeout": 5000, "foreign_keys": 1, "auto_vacuum": 2,  # 2: incremental
+    }
+
+
+def test_legacy_profile_keeps_defaults_but_enforces_foreign_keys(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'legacy.db'}", profile="legacy")
+    assert _pragmas(engine, "journal_mode", "foreign_keys") == {"journal_mode": "delete", "foreign_keys": 1}
+    engine.dispose()
+
+
+def test_readers_are_not_blocked_by_a_writer(registry):
+    engine = get_engine(registry)
+    with engine.connect() as writer, engine.connect() as reader:
+        writer.execute(text("BEGIN IMMEDIATE"))
+        writer.execute(text("UPDATE patients SET age = age + 1 WHERE patient_id = 1"))
+        assert reader.execute(text("SELECT count(*) FROM patients")).scalar() == 300
+        writer.execute(text("ROLLBACK"))
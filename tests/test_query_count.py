@@ -0,0 +1,28 @@
+"""The full-data loader issues the same number of statements for any registry size."""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from cardiology.migrations import init_db
+from cardiology.models import Lesion
+from cardiology.queries import load_full_data
+from benchmarks.query_count import count_statements, legacy_load_full_data
+from benchmarks.synthetic import seed
+
+
+@pytest.mark.parametrize("n", (10, 200))
+def test_one_statement_and_same_rows_as_the_per_patient_loop(n):
+    engine = create_engine("sqlite://")
+    init_db(engine)
+    with sessionmaker(bind=engine)() as db:
+        seed(db, n, seed=n)
+        # A second procedure for some patients must not change which row is shown.
+        db.add_all([Lesion(patient_id=pid, LAD=False, LCX=False, RCA=True) for pid in range(1, n + 1, 7)])
+        db.commit()
+
+        count, _, rows = count_statements(engine, lambda: load_full_data(db))
+        assert count == 1
+        assert len(rows) == n
+        db.expire_all()
+        assert rows == legacy_load_full_data(db)
+    engine.dispose()
@@ -0,0 +1,73 @@
+"""The cohort_stats counters follow every write (stats.py triggers)."""
+import pytest
+from sqlalchemy import select, update
+
+from cardiology import stats
+from cardiology.db import get_engine, session_scope
+from cardiology.deletes import delete_patients
+from cardiology.encounters import record_encounter
+from cardiology.models import CohortStat, Lesion, MedicalHistory, Patient
+from benchmarks.replica import ENCOUNTER
+
+
+def _counter(db, metric, bucket):
+    stmt = select(CohortStat.n, CohortStat.total).where(CohortStat.metric == metric, CohortStat.bucket == bucket)
+    return tuple(db.execute(stmt).first() or (0, 0.0))
+
+
+def _drift(url):
+    with get_engine(url).connect() as conn:
+        return stats.verify(conn)
+
+
+@pytest.fixture
+def db(registry):
+    with session_scope(registry) as db:
+        yield db
+
+
+def test_bulk_import_counts(registry, db):
+    assert _drift(registry) == []
+    assert stats.patient_count(db) == 300
+
+
+def test_insert(registry, db):
+    before = _counter(db, "age_by_diabetes", "Type 2|60-69")
+    record_encounter(db, **ENCOUNTER)
+    db.commit()
+    assert stats.patient_count(db) == 301
+    assert _counter(db, "age_by_diabetes", "Type 2|60-69") == (before[0] + 1, before[1] + 64)
+    assert _drift(registry) == []
+
+
+def test_update_of_a_first_row(registry, db):
+    db.execute(update(MedicalHistory).where(MedicalHistory.patient_id.in_([1, 2, 3])).values(smoking=True))
+    db.commit()
+    assert _drift(registry) == []
+
+
+def test_later_rows_do_not_count(registry, db):
+    patient_ids = db.scalars(select(Lesion.patient_id).distinct().limit(3)).all()
+    before = [_counter(db, "lesions", "all"), _counter(db, "lesion_site", "LCX")]
+    db.add_all([Lesion(patient_id=pid, LAD=True, LCX=True, RCA=True) for pid in patient_ids])
+    db.commit()
+    assert [_counter(db, "lesions", "all"), _counter(db, "lesion_site", "LCX")] == before
+    assert _drift(registry) == []
+
+
+def test_age_update_moves_age_by_diabetes(registry, db):
+    record_encounter(db, **ENCOUNTER)
+    db.commit()
+    patient_id = db.scalar(select(Patient.patient_id).order_by(Patient.patient_id.desc()))
+    before = _counter(db, "age_by_diabetes", "Type 2|80-89")
+    db.execute(update(Patient).where(Patient.patient_id == patient_id).values(age=84))
+    db.commit()
+    assert _counter(db, "age_by_diabetes", "Type 2|80-89") == (before[0] + 1, before[1] + 84)
+    assert _drift(registry) == []
+
+
+def test_delete(registry, db):
+    delete_patients(db, [1, 2, 3, 150])
+    db.commit()
+    assert stats.patient_count(db) == 296
+    assert _drift(registry) == []
@@ -0,0 +1,61 @@
+"""patient_summary and the patient_search index follow every write (summary.py, fulltext.py)."""
+import pytest
+from sqlalchemy import delete, select, update
+
+from cardiology import fulltext, summary
+from cardiology.bulk_import import import_rows
+from cardiology.db import get_engine, session_scope
+from cardiology.deletes import delete_patients
+from cardiology.encounters import record_encounter
+from cardiology.models import MedicalHistory, Patient, Vessel
+from benchmarks.replica import ENCOUNTER
+from benchmarks.synthetic import registry_rows
+
+
+def _drift(url):
+    with get_engine(url).connect() as conn:
+        return summary.verify(conn), fulltext.verify(conn)
+
+
+def _found(db, query):
+    return {row["ID"] for row in fulltext.find_patients(db, query, limit=1000)}
+
+
+@pytest.fixture
+def db(registry):
+    with session_scope(registry) as db:
+        yield db
+
+
+def test_bulk_import(registry):
+    assert _drift(registry) == ([], [])
+    import_rows(get_engine(registry), registry_rows(250, seed=1), batch_size=100)
+    assert _drift(registry) == ([], [])
+
+
+def test_inserts_updates_and_deletes(registry, db):
+    record_encounter(db, **ENCOUNTER)
+    db.execute(update(MedicalHistory).where(MedicalHistory.patient_id == 5).values(diabetes="Type 1", BMI=31.0))
+    db.execute(delete(Vessel).where(Vessel.patient_id == 6))
+    db.add(Vessel(patient_id=7, num_vessels=3, angioplasty=True, imaging="IVUS"))  # not its first row
+    delete_patients(db, [8])
+    db.commit()
+    assert _drift(registry) == ([], [])
+
+
+def test_search_follows_name_changes(db):
+    db.execute(update(Patient).where(Patient.patient_id == 9).values(first_name="Ευάγγελος", last_name="Ζυγούρης"))
+    db.commit()
+    assert _found(db, "ευαγγ ζυγου") == {9}
+    assert _found(db, "ΖΥΓΟΥΡΗΣ") == {9}
+    delete_patients(db, [9])
+    db.commit()
+    assert _found(db, "ζυγουρης") == set()
+
+
+def test_bulk_imported_names_are_folded(registry, db):
+    rows = [(2, {"Όνομα": "Ηλίας", "Επώνυμο": "Ξυλούρης", "Ηλικία": "70", "Ιστορικό": "Σταθερή στηθάγχη"})]
+    import_rows(get_engine(registry), rows)
+    patient_id = db.scalar(select(Patient.patient_id).where(Patient.last_name == "Ξυλούρης"))
+    assert _found(db, "ηλιας ξυλουρ") == {patient_id}
+    assert patient_id in _found(db, "ξυλουρης σταθερη")